@@ -0,0 +1,69 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from companies.sharding import find_user_shard, is_sharded, shard_map
+from core.db.routers import activate_shard
+from .models import User
+from .tokens import COMPANY_CLAIM, ROLE_CLAIM, VERSION_CLAIM, get_token_state
+
+
+def check_token_version(token):
+    """Reject ``token`` if its user is gone, inactive or has a newer token version."""
+    try:
+        user_id = token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    state = get_token_state(user_id)
+    if state is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    token_version, is_active = state
+    if not is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    if token.get(VERSION_CLAIM) != token_version:
+        raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+    return user_id, token_version
+
+
+def activate_token_shard(token):
+    """Route the request to the shard of the tenant ``token`` was issued for."""
+    company_id = token.get(COMPANY_CLAIM)
+    if company_id is None and VERSION_CLAIM not in token and is_sharded():
+        # Tokens issued before the claims were embedded: look for the user
+        user_id = token.get(api_settings.USER_ID_CLAIM)
+        shard = find_user_shard(**{api_settings.USER_ID_FIELD: user_id}) or DEFAULT_DB_ALIAS
+        moving = False
+    else:
+        shard, moving = shard_map.get(company_id)
+    activate_shard(shard, moving=moving)
+    return shard
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication that builds the user from the token's claims.
+
+    The returned ``User`` has only ``id``, ``role``, ``company_id``,
+    ``is_active`` and ``token_version`` loaded; the remaining columns are
+    fetched in one query the first time a view reads any of them.
+
+    The tenant's shard is activated before the user is checked, so the rest
+    of the request reads and writes that shard.
+    """
+
+    def get_user(self, validated_token):
+        shard = activate_token_shard(validated_token)
+        if VERSION_CLAIM not in validated_token or ROLE_CLAIM not in validated_token:
+            # Tokens issued before the claims were embedded
+            return super().get_user(validated_token)
+
+        user_id, token_version = check_token_version(validated_token)
+        return User.from_token_claims(
+            user_id=user_id,
+            role=validated_token[ROLE_CLAIM],
+            company_id=validated_token.get(COMPANY_CLAIM),
+            token_version=token_version,
+            using=shard,
+        )
@@ -0,0 +1,39 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .models import User
+from companies.sharding import find_user_shard, get_shards, is_sharded, shard_map
+from core.db.routers import activate_shard, use_shard
+
+
+class ShardedModelBackend(ModelBackend):
+    """``ModelBackend`` that finds the user on whichever tenant shard holds them.
+
+    On success the user's shard is activated for the rest of the request.
+    With a single shard this is exactly ``ModelBackend``.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if not is_sharded():
+            return super().authenticate(request, username=username, password=password, **kwargs)
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        shard = find_user_shard(**{User.USERNAME_FIELD: username}) if username else None
+        if shard is None:
+            # Still hash the password, like ModelBackend, to keep timing uniform
+            return super().authenticate(request, username=username, password=password, **kwargs)
+        with use_shard(shard):
+            user = super().authenticate(request, username=username, password=password, **kwargs)
+        if user is not None:
+            activate_shard(shard, moving=shard_map.is_moving(user.company_id))
+        return user
+
+    def get_user(self, user_id):
+        if not is_sharded():
+            return super().get_user(user_id)
+        for shard in get_shards():
+            with use_shard(shard):
+                user = super().get_user(user_id)
+            if user is not None:
+                activate_shard(shard, moving=shard_map.is_moving(user.company_id))
+                return user
+        return None
@@ -0,0 +1,96 @@
+"""Password hashing for batches, spread across a pool of worker processes.
+
+PBKDF2 is deliberately slow, and hashing dominates the CPU time of bulk user
+creation such as the employee import. ``hash_passwords`` hands a batch to a
+per-process pool of worker processes so it uses every core.
+
+Single passwords are hashed inline with ``make_password``. PBKDF2 runs in
+OpenSSL with the GIL released, so other request threads keep running, and a
+round trip to the pool would only add latency to a caller that has to wait
+for the hash anyway.
+
+Settings:
+
+``PASSWORD_HASHING_WORKERS``
+    Size of the worker pool. Defaults to ``os.cpu_count()``.
+``PASSWORD_HASHING_BATCH_THRESHOLD``
+    Batches smaller than this are hashed inline; the pool round-trip is not
+    worth it for a handful of passwords. Defaults to 8.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.utils.module_loading import import_string
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _encode(hasher_path, password, salt):
+    # Runs in a worker process: instantiate the hasher from its path so the
+    # worker does not need Django settings configured.
+    return import_string(hasher_path)().encode(password, salt)
+
+
+def _hasher_path(hasher):
+    return f"{type(hasher).__module__}.{type(hasher).__qualname__}"
+
+
+def worker_count():
+    return getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or os.cpu_count() or 1
+
+
+def get_pool():
+    """Return this process's hashing pool, creating it on first use."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        # A pool inherited across fork (e.g. a gunicorn worker) is unusable
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(
+                max_workers=worker_count(),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def hash_passwords(passwords, hasher='default'):
+    """Hash a batch of passwords across the pool, preserving order."""
+    passwords = list(passwords)
+    threshold = getattr(settings, 'PASSWORD_HASHING_BATCH_THRESHOLD', 8)
+    if len(passwords) < threshold:
+        return [make_password(password, hasher=hasher) for password in passwords]
+
+    hasher = get_hasher(hasher)
+    path = _hasher_path(hasher)
+    usable = [(index, password) for index, password in enumerate(passwords) if password is not None]
+    chunksize = max(1, len(usable) // (worker_count() * 4))
+    encoded = get_pool().map(
+        _encode,
+        [path] * len(usable),
+        [password for _, password in usable],
+        [hasher.salt() for _ in usable],
+        chunksize=chunksize,
+    )
+    hashed = [make_password(None) if password is None else None for password in passwords]
+    for (index, _), value in zip(usable, encoded):
+        hashed[index] = value
+    return hashed
+
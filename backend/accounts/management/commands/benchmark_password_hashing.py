@@ -0,0 +1,51 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+
+from accounts import hashing
+
+
+class Command(BaseCommand):
+    help = 'Measure password hashes per second as the hashing pool grows from one worker to every core.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--passwords', type=int, default=200, help='Passwords hashed per run.')
+        parser.add_argument(
+            '--workers', type=int, action='append',
+            help='Pool size to measure (may be repeated). Defaults to 1, 2, 4, ... up to the core count.'
+        )
+
+    def handle(self, *args, **options):
+        count = options['passwords']
+        cores = os.cpu_count() or 1
+        sizes = options['workers'] or sorted({min(2 ** n, cores) for n in range(cores.bit_length() + 1)})
+        hasher = get_hasher()
+        path = hashing._hasher_path(hasher)
+        passwords = [f"benchmark-password-{i}" for i in range(count)]
+        salts = [hasher.salt() for _ in passwords]
+
+        self.stdout.write(f"{hasher.algorithm}, {count} passwords, {cores} cores")
+        self.stdout.write(f"{'workers':>8} {'seconds':>9} {'hashes/s':>10} {'speedup':>8}")
+
+        started = time.perf_counter()
+        for password, salt in zip(passwords, salts):
+            hashing._encode(path, password, salt)
+        baseline = count / (time.perf_counter() - started)
+        self.stdout.write(f"{'inline':>8} {count / baseline:>9.2f} {baseline:>10.1f} {1.0:>8.2f}")
+
+        for workers in sizes:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                # Warm the workers up so process start-up is not measured
+                list(pool.map(hashing._encode, [path] * workers, passwords[:workers], salts[:workers]))
+                started = time.perf_counter()
+                list(pool.map(
+                    hashing._encode, [path] * count, passwords, salts,
+                    chunksize=max(1, count // (workers * 4)),
+                ))
+                elapsed = time.perf_counter() - started
+            rate = count / elapsed
+            self.stdout.write(f"{workers:>8} {elapsed:>9.2f} {rate:>10.1f} {rate / baseline:>8.2f}")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from companies.sharding import get_shards
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted JWTs in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows deleted per statement.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = aware_utcnow()
+        purged = 0
+        for shard in get_shards():
+            tokens = OutstandingToken.objects.using(shard)
+            expired = tokens.filter(expires_at__lte=now).order_by()
+            while True:
+                # Small batches keep each DELETE (and its cascade to the blacklist) short
+                ids = list(expired.values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                tokens.filter(id__in=ids).delete()
+                purged += len(ids)
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired tokens.'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_token_version'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('companies', '0006_companystats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['company', 'role'], name='user_company_role_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_tenant_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('companies', '0009_companystats_breakdowns'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_company_role_idx',
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['company', 'role', 'date_joined'], name='user_company_role_idx'),
+        ),
+    ]
@@ -1,14 +1,19 @@
 import uuid
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, models
+from django.db.models import DEFERRED
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
+from companies.sharding import TenantQuerySet, find_user_shard, is_sharded
 
-class CustomUserManager(BaseUserManager):
+class CustomUserManager(BaseUserManager.from_queryset(TenantQuerySet)):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError(_('The Email field must be set'))
         email = self.normalize_email(email)
+        if is_sharded() and find_user_shard(email=email):
+            # The unique index only covers a single shard
+            raise ValueError(_('A user with that email already exists'))
         user = self.model(email=email, **extra_fields)
         user.set_password(password)
         user.save(using=self._db)
@@ -44,6 +49,8 @@ class User(AbstractUser):
     is_active = models.BooleanField(default=True)
     date_joined = models.DateTimeField(auto_now_add=True)
     last_login = models.DateTimeField(null=True, blank=True)
+    # Embedded in issued JWTs; bumped to revoke them (see accounts/tokens.py)
+    token_version = models.PositiveIntegerField(default=0)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
@@ -53,10 +60,81 @@ class User(AbstractUser):
     class Meta:
         verbose_name = _('user')
         verbose_name_plural = _('users')
+        indexes = [
+            # Admin user lists filter on both and page on date_joined; counts use the prefix
+            models.Index(fields=['company', 'role', 'date_joined'], name='user_company_role_idx'),
+        ]
 
     def __str__(self):
         return self.email
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the tenant membership as loaded so role or company changes
+        # can be detected on save without re-reading the row.
+        # Columns that were deferred are recorded as DEFERRED, i.e. unknown.
+        loaded = instance.__dict__
+        instance._loaded_membership = (loaded.get('role', DEFERRED), loaded.get('company_id', DEFERRED))
+        instance._loaded_is_active = loaded.get('is_active', DEFERRED)
+        # The columns of the employee search index (see employees/search.py)
+        instance._loaded_names = tuple(loaded.get(field, DEFERRED) for field in cls.SEARCH_FIELDS)
+        return instance
+
+    SEARCH_FIELDS = ('first_name', 'last_name', 'email')
+
+    TOKEN_CLAIM_FIELDS = ('id', 'role', 'company_id', 'is_active', 'token_version')
+
+    @classmethod
+    def from_token_claims(cls, user_id, role, company_id, token_version, using=DEFAULT_DB_ALIAS):
+        """Build a user from verified JWT claims without querying the database.
+
+        Every other column is deferred and loaded in a single query, from the
+        ``using`` shard, the first time any of them is read.
+        """
+        instance = cls.from_db(
+            using, cls.TOKEN_CLAIM_FIELDS,
+            [uuid.UUID(str(user_id)), role, uuid.UUID(company_id) if company_id else None, True, token_version]
+        )
+        instance._from_token_claims = True
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        if fields is not None and getattr(self, '_from_token_claims', False):
+            # Load all remaining columns at once instead of one query per attribute
+            fields = set(fields) | self.get_deferred_fields()
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is not None:
+            # Deferred columns loaded just now hold their database values
+            self._loaded_names = tuple(
+                getattr(self, field) if loaded is DEFERRED and field in fields else loaded
+                for field, loaded in zip(self.SEARCH_FIELDS, getattr(self, '_loaded_names', (DEFERRED,) * 3))
+            )
+
+    def save(self, *args, **kwargs):
+        # Issued tokens embed role and company, so a change to either (or a
+        # deactivation) must revoke them.
+        revoke_tokens = not self._state.adding and self._token_claims_changed()
+        if revoke_tokens:
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_is_active = self.is_active
+        if revoke_tokens:
+            from .tokens import forget_token_state  # Import here to avoid loading JWT classes with the models
+            forget_token_state(self.pk)
+
+    def _token_claims_changed(self):
+        loaded_role, loaded_company_id = getattr(self, '_loaded_membership', (DEFERRED, DEFERRED))
+        loaded_is_active = getattr(self, '_loaded_is_active', DEFERRED)
+        return (
+            (loaded_role is not DEFERRED and loaded_role != self.role)
+            or (loaded_company_id is not DEFERRED and loaded_company_id != self.company_id)
+            or (loaded_is_active is True and not self.is_active)
+        )
+
     @property
     def is_parent(self):
         return self.role == self.UserRole.PARENT
@@ -0,0 +1,188 @@
+"""In-process view of the JWT blacklist.
+
+Every refresh and blacklist request checks whether the presented refresh
+token has been revoked. Instead of querying the blacklist table each time,
+each worker keeps a Bloom filter of the blacklisted, unexpired ``jti`` values
+plus small exact sets of confirmed answers:
+
+* a ``jti`` the filter has never seen is definitely not revoked, so no query
+  is needed; this is the common case;
+* a ``jti`` already confirmed revoked or not revoked is answered from the
+  exact sets;
+* only a Bloom hit that has not been confirmed yet is checked against the
+  database.
+
+Each worker builds the filter as it starts: ``core/wsgi.py`` and
+``core/asgi.py`` call ``preload()`` unless ``TOKEN_REVOCATION_PRELOAD`` is
+off. It is not built in ``AccountsConfig.ready()``, because Django
+discourages queries during app loading and ``ready()`` also runs for
+``migrate``, before the blacklist table exists. Where nothing preloads it
+(tests, management commands) or the table is missing, the filter is built on
+first use. After that it picks up new blacklist rows incrementally, by
+primary key, at most once every ``TOKEN_REVOCATION_REFRESH_INTERVAL``
+seconds. It is rebuilt from scratch every
+``TOKEN_REVOCATION_REBUILD_INTERVAL`` seconds to shed expired entries.
+
+With several ``TENANT_SHARDS`` the filter covers the blacklists of all of
+them, each refreshed from its own last primary key.
+
+Another worker may accept a token blacklisted elsewhere until its next
+refresh. Rotation still cannot be replayed in that window, because
+``ClaimsRefreshToken.blacklist`` treats an existing blacklist row as a reuse.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from companies.sharding import get_shards
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationFilter:
+    # Bound on each exact set; when exceeded it is simply cleared
+    exact_limit = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._revoked = set()
+        self._not_revoked = set()
+        self._last_ids = {}
+        self._refreshed_at = 0.0
+        self._built_at = 0.0
+
+    @property
+    def refresh_interval(self):
+        return getattr(settings, 'TOKEN_REVOCATION_REFRESH_INTERVAL', 5)
+
+    @property
+    def rebuild_interval(self):
+        return getattr(settings, 'TOKEN_REVOCATION_REBUILD_INTERVAL', 3600)
+
+    @property
+    def error_rate(self):
+        return getattr(settings, 'TOKEN_REVOCATION_ERROR_RATE', 0.001)
+
+    def rebuild(self):
+        """Load every unexpired blacklisted jti into a freshly sized filter."""
+        with self._lock:
+            rows = {
+                alias: list(
+                    BlacklistedToken.objects.using(alias)
+                    .filter(token__expires_at__gt=timezone.now()).values_list('id', 'token__jti')
+                )
+                for alias in get_shards()
+            }
+            bloom = BloomFilter(max(sum(map(len, rows.values())) * 2, 1024), self.error_rate)
+            for alias, shard_rows in rows.items():
+                for _, jti in shard_rows:
+                    bloom.add(jti)
+                self._last_ids[alias] = max((row_id for row_id, _ in shard_rows), default=self._last_ids.get(alias, 0))
+            self._bloom = bloom
+            self._revoked.clear()
+            self._not_revoked.clear()
+            self._built_at = self._refreshed_at = time.monotonic()
+
+    def preload(self):
+        """Build the filter at worker startup, so that no request waits for it."""
+        if not getattr(settings, 'TOKEN_REVOCATION_PRELOAD', True):
+            return
+        try:
+            self.rebuild()
+        except DatabaseError:
+            logger.warning('Could not load the token revocation filter; it will load on first use', exc_info=True)
+        finally:
+            # A preforking server may copy this process; do not share its connections
+            connections.close_all()
+
+    def refresh(self):
+        """Add blacklist rows created since the last load or refresh."""
+        with self._lock:
+            for alias in get_shards():
+                rows = list(
+                    BlacklistedToken.objects.using(alias).filter(id__gt=self._last_ids.get(alias, 0))
+                    .order_by('id').values_list('id', 'token__jti')
+                )
+                for row_id, jti in rows:
+                    self._add(jti)
+                    self._last_ids[alias] = row_id
+            self._refreshed_at = time.monotonic()
+        if self._bloom.count > self._bloom.capacity:
+            self.rebuild()
+
+    def _ensure_current(self):
+        now = time.monotonic()
+        if self._bloom is None or now - self._built_at > self.rebuild_interval:
+            self.rebuild()
+        elif now - self._refreshed_at > self.refresh_interval:
+            self.refresh()
+
+    def _add(self, jti):
+        self._bloom.add(jti)
+        self._not_revoked.discard(jti)
+        if len(self._revoked) >= self.exact_limit:
+            self._revoked.clear()
+        self._revoked.add(jti)
+
+    def add(self, jti):
+        """Record a token this worker has just blacklisted."""
+        self._ensure_current()
+        with self._lock:
+            self._add(jti)
+
+    def is_revoked(self, jti):
+        self._ensure_current()
+        if jti in self._revoked:
+            return True
+        if jti not in self._bloom or jti in self._not_revoked:
+            return False
+        # Possible false positive: confirm against the table and remember the answer
+        revoked = any(BlacklistedToken.objects.using(alias).filter(token__jti=jti).exists() for alias in get_shards())
+        with self._lock:
+            target = self._revoked if revoked else self._not_revoked
+            if len(target) >= self.exact_limit:
+                target.clear()
+            target.add(jti)
+        return revoked
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+            self._revoked.clear()
+            self._not_revoked.clear()
+            self._last_ids.clear()
+
+
+revocation_filter = RevocationFilter()
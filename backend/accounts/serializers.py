@@ -1,6 +1,16 @@
+import uuid
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.db import transaction
+from rest_framework_simplejwt.serializers import (
+    TokenBlacklistSerializer,
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from core.db.routers import use_shard
+from .tokens import ClaimsRefreshToken
 
 User = get_user_model()
 
@@ -59,17 +69,54 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         # Set role to PARENT for company registration
         validated_data['role'] = User.UserRole.PARENT
         
-        # Create user
-        user = User.objects.create_user(**validated_data)
+        # Import here to avoid circular dependency
+        from companies.models import Company
+        from companies.sharding import place_company
+
+        # The owner and the company are created on the company's shard
+        company_id = uuid.uuid4()
+        shard = place_company(company_id)
+        with use_shard(shard), transaction.atomic(using=shard, savepoint=False):
+            # Create user
+            user = User.objects.create_user(**validated_data)
 
-        # Create company and link to user
-        from companies.models import Company  # Import here to avoid circular dependency
-        company = Company.objects.create(owner=user, **company_data)
-        user.company = company
-        user.save()
+            # Create company and link to user
+            company = Company.objects.create(id=company_id, owner=user, **company_data)
+            user.company = company
+            user.save()
 
         return user
 
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField(required=True)
-    password = serializers.CharField(required=True, write_only=True) 
\ No newline at end of file
+    password = serializers.CharField(required=True, write_only=True) 
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        from .authentication import activate_token_shard, check_token_version  # Import here to avoid circular dependency
+
+        # The refresh token's claims are copied into the new access token, so
+        # a refresh token issued before a role change must not be honoured.
+        refresh = self.token_class(attrs['refresh'])
+        # Rotation blacklists the token on its tenant's shard
+        activate_token_shard(refresh)
+        if 'ver' in refresh:
+            check_token_version(refresh)
+        return super().validate(attrs)
+
+
+class ClaimsTokenBlacklistSerializer(TokenBlacklistSerializer):
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        from .authentication import activate_token_shard  # Import here to avoid circular dependency
+
+        activate_token_shard(self.token_class(attrs['refresh']))
+        return super().validate(attrs)
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import User
+from .tokens import forget_token_state
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    # Tokens of a deleted user must stop authenticating straight away
+    forget_token_state(instance.pk)
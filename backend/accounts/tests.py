@@ -0,0 +1,263 @@
+import datetime
+import io
+import uuid
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password, identify_hasher, is_password_usable
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts import hashing
+from accounts.models import User
+from accounts.revocation import BloomFilter, RevocationFilter
+from accounts.tokens import ClaimsAccessToken
+from core.tests.factories import PASSWORD, TenantTestCase
+
+# The production hasher, not the fast MD5 one the test settings use elsewhere
+PBKDF2 = 'django.contrib.auth.hashers.PBKDF2PasswordHasher'
+USER_URL = '/accounts/api/user/'
+
+
+@override_settings(PASSWORD_HASHERS=[PBKDF2], PASSWORD_HASHING_WORKERS=2, PASSWORD_HASHING_BATCH_THRESHOLD=8)
+class HashPasswordsTests(SimpleTestCase):
+    def setUp(self):
+        hashing.shutdown_pool()
+        self.addCleanup(hashing.shutdown_pool)
+
+    def test_batches_are_hashed_in_the_pool(self):
+        passwords = [f'password-{n}' for n in range(8)] + [None]
+        hashed = hashing.hash_passwords(passwords)
+
+        self.assertIsNotNone(hashing._pool, 'the batch should have gone to the pool')
+        self.assertEqual(len(hashed), 9)
+        for password, encoded in zip(passwords[:-1], hashed):
+            self.assertEqual(identify_hasher(encoded).algorithm, 'pbkdf2_sha256')
+            self.assertTrue(check_password(password, encoded))
+        # Each password has its own salt
+        self.assertEqual(len({encoded.split('$')[2] for encoded in hashed[:-1]}), 8)
+        self.assertFalse(is_password_usable(hashed[-1]))
+
+    def test_small_batches_are_hashed_inline(self):
+        hashed = hashing.hash_passwords(['one', 'two'])
+        self.assertIsNone(hashing._pool)
+        self.assertTrue(check_password('one', hashed[0]))
+        self.assertTrue(check_password('two', hashed[1]))
+
+
+class TokenClaimsTests(TenantTestCase):
+    prefix = 'tokens'
+    sizes = {'employees': 1, 'departments': 1, 'admins': 1}
+
+    def get_user(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client.get(USER_URL)
+
+    def test_bumping_the_token_version_revokes_older_tokens(self):
+        admin = User.objects.get(pk=self.tenant.admin.pk)
+        token = ClaimsAccessToken.for_user(admin)
+        self.assertEqual(self.get_user(token).status_code, 200)
+
+        admin.role = User.UserRole.EMPLOYEE
+        admin.save()
+        self.assertEqual(admin.token_version, self.tenant.admin.token_version + 1)
+
+        response = self.get_user(token)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'token_revoked')
+        response = self.get_user(ClaimsAccessToken.for_user(admin))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['role'], User.UserRole.EMPLOYEE)
+
+    def test_deactivated_and_deleted_users_are_rejected(self):
+        user = User.objects.get(pk=self.tenant.employee.user.pk)
+        token = ClaimsAccessToken.for_user(user)
+        user.is_active = False
+        user.save()
+        # Deactivation also bumps the version, which is checked after is_active
+        self.assertEqual(self.get_user(token).json()['code'], 'user_inactive')
+        self.assertEqual(self.get_user(ClaimsAccessToken.for_user(user)).json()['code'], 'user_inactive')
+
+        token = ClaimsAccessToken.for_user(self.tenant.admin)
+        User.objects.filter(pk=self.tenant.admin.pk).delete()
+        response = self.get_user(token)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'user_not_found')
+
+    def test_claims_spare_the_user_query(self):
+        token = ClaimsAccessToken.for_user(self.tenant.admin)
+        self.assertEqual(self.get_user(token).status_code, 200)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        # The token version is cached; only the view's own read of the user remains
+        with self.assertNumQueries(1):
+            self.assertEqual(client.get(USER_URL).status_code, 200)
+
+    def test_tokens_without_claims_fall_back_to_the_database(self):
+        legacy = AccessToken.for_user(self.tenant.admin)
+        self.assertNotIn('ver', legacy)
+        self.assertNotIn('role', legacy)
+        response = self.get_user(legacy)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['email'], self.tenant.admin.email)
+        self.assertEqual(response.json()['role'], User.UserRole.ADMIN)
+
+        # The database lookup still rejects inactive users
+        User.objects.filter(pk=self.tenant.admin.pk).update(is_active=False)
+        response = self.get_user(legacy)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'user_inactive')
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        keys = [uuid.uuid4().hex for _ in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        self.assertEqual(bloom.count, 1000)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, 0.01)
+        for _ in range(1000):
+            bloom.add(uuid.uuid4().hex)
+        false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10000))
+        # Sized for 1% at capacity; allow for sampling noise
+        self.assertLess(false_positives, 300)
+
+    def test_empty_filter(self):
+        bloom = BloomFilter(0, 0.001)
+        self.assertGreaterEqual(bloom.size, 8)
+        self.assertNotIn('anything', bloom)
+
+
+@override_settings(TOKEN_REVOCATION_REFRESH_INTERVAL=3600, TOKEN_REVOCATION_REBUILD_INTERVAL=3600)
+class RevocationFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='tokens@revoke.example', password=PASSWORD)
+
+    def outstanding(self, expires_in=datetime.timedelta(days=1)):
+        return OutstandingToken.objects.create(
+            user=self.user, jti=uuid.uuid4().hex, token='token', created_at=timezone.now(),
+            expires_at=timezone.now() + expires_in,
+        )
+
+    def revoke(self, expires_in=datetime.timedelta(days=1)):
+        return BlacklistedToken.objects.create(token=self.outstanding(expires_in)).token.jti
+
+    def test_lookups_without_a_bloom_hit_skip_the_database(self):
+        revoked = self.revoke()
+        revocations = RevocationFilter()
+        self.assertTrue(revocations.is_revoked(revoked))
+        with self.assertNumQueries(0):
+            self.assertFalse(revocations.is_revoked(uuid.uuid4().hex))
+            # Confirmed answers are remembered
+            self.assertTrue(revocations.is_revoked(revoked))
+
+    def test_false_positive_is_confirmed_against_the_database(self):
+        revocations = RevocationFilter()
+        revocations.rebuild()
+        ghost = uuid.uuid4().hex
+        revocations._bloom.add(ghost)
+        with self.assertNumQueries(1):
+            self.assertFalse(revocations.is_revoked(ghost))
+        with self.assertNumQueries(0):
+            self.assertFalse(revocations.is_revoked(ghost))
+
+    def test_refresh_picks_up_tokens_blacklisted_elsewhere(self):
+        revocations = RevocationFilter()
+        revocations.rebuild()
+        # Blacklisted by another worker after this one loaded the filter
+        revoked = self.revoke()
+        self.assertFalse(revocations.is_revoked(revoked))
+        revocations.refresh()
+        with self.assertNumQueries(0):
+            self.assertTrue(revocations.is_revoked(revoked))
+
+    def test_refresh_is_throttled(self):
+        revocations = RevocationFilter()
+        revocations.rebuild()
+        revoked = self.revoke()
+        loaded = revocations._refreshed_at
+        with mock.patch('accounts.revocation.time.monotonic', return_value=loaded + 1):
+            self.assertFalse(revocations.is_revoked(revoked))
+        with override_settings(TOKEN_REVOCATION_REFRESH_INTERVAL=5, TOKEN_REVOCATION_REBUILD_INTERVAL=60):
+            with mock.patch('accounts.revocation.time.monotonic', return_value=loaded + 6):
+                self.assertTrue(revocations.is_revoked(revoked))
+
+    # preload() closes its connections, which would end the test transaction
+    @override_settings(TOKEN_REVOCATION_PRELOAD=True)
+    @mock.patch('accounts.revocation.connections')
+    def test_preload_builds_the_filter(self, connections):
+        revoked = self.revoke()
+        revocations = RevocationFilter()
+        revocations.preload()
+        connections.close_all.assert_called_once_with()
+        self.assertIn(revoked, revocations._bloom)
+        with self.assertNumQueries(0):
+            self.assertFalse(revocations.is_revoked(uuid.uuid4().hex))
+
+    @override_settings(TOKEN_REVOCATION_PRELOAD=True)
+    @mock.patch('accounts.revocation.connections')
+    def test_preload_leaves_a_missing_table_to_the_first_use(self, connections):
+        revocations = RevocationFilter()
+        with mock.patch.object(revocations, 'rebuild', side_effect=DatabaseError('no such table')):
+            with self.assertLogs('accounts.revocation', 'WARNING'):
+                revocations.preload()
+        self.assertIsNone(revocations._bloom)
+
+    def test_rebuild_drops_expired_tokens(self):
+        expired = self.revoke(expires_in=-datetime.timedelta(minutes=1))
+        current = self.revoke()
+        revocations = RevocationFilter()
+        revocations.rebuild()
+        self.assertIn(current, revocations._bloom)
+        self.assertEqual(revocations._bloom.count, 1)
+        self.assertNotIn(expired, revocations._bloom)
+
+    def test_full_filter_is_rebuilt_on_refresh(self):
+        revocations = RevocationFilter()
+        revocations.rebuild()
+        capacity = revocations._bloom.capacity
+        for _ in range(capacity):
+            revocations._bloom.add(uuid.uuid4().hex)
+        revoked = self.revoke()
+        revocations.refresh()
+        self.assertEqual(revocations._bloom.count, 1)
+        self.assertTrue(revocations.is_revoked(revoked))
+
+    def test_tokens_blacklisted_here_are_revoked_at_once(self):
+        revocations = RevocationFilter()
+        jti = uuid.uuid4().hex
+        revocations.add(jti)
+        with self.assertNumQueries(0):
+            self.assertTrue(revocations.is_revoked(jti))
+
+
+class PurgeExpiredTokensTests(TestCase):
+    def test_purges_expired_tokens_and_their_blacklist_rows(self):
+        user = User.objects.create_user(email='purge@revoke.example', password=PASSWORD)
+        now = timezone.now()
+
+        def outstanding(expires_at):
+            return OutstandingToken.objects.create(
+                user=user, jti=uuid.uuid4().hex, token='token', created_at=now, expires_at=expires_at
+            )
+
+        expired = [outstanding(now - datetime.timedelta(hours=n + 1)) for n in range(3)]
+        current = outstanding(now + datetime.timedelta(hours=1))
+        BlacklistedToken.objects.create(token=expired[0])
+        BlacklistedToken.objects.create(token=current)
+
+        out = io.StringIO()
+        call_command('purge_expired_tokens', batch_size=2, stdout=out)
+        self.assertIn('Purged 3 expired tokens.', out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('pk', flat=True)), [current.pk])
+        self.assertEqual(list(BlacklistedToken.objects.values_list('token_id', flat=True)), [current.pk])
@@ -0,0 +1,81 @@
+"""JWT classes that carry the user's role, company and token version.
+
+Access tokens issued here embed ``role``, ``company_id`` and ``ver`` (the
+user's ``token_version``). ``ClaimsJWTAuthentication`` builds the request
+user from those claims and only checks the version, which is cached, so an
+authenticated request normally costs no database query. Changing a user's
+role or company, or deactivating them, bumps ``token_version`` and every
+token issued before the change is rejected.
+
+The cached version lives in Django's cache for ``TOKEN_VERSION_CACHE_TTL``
+seconds. With the default per-process cache another worker may accept a
+revoked token until its entry expires; configure a shared cache backend to
+make revocation immediate across workers.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .revocation import revocation_filter
+
+ROLE_CLAIM = 'role'
+COMPANY_CLAIM = 'company_id'
+VERSION_CLAIM = 'ver'
+
+_MISSING_USER = 'missing'
+
+
+def _cache_key(user_id):
+    return f"accounts:token-state:{user_id}"
+
+
+def get_token_state(user_id):
+    """Return ``(token_version, is_active)`` for a user, or None if they do not exist."""
+    from .models import User  # Import here to avoid circular dependency
+
+    key = _cache_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        state = User.objects.filter(pk=user_id).values_list('token_version', 'is_active').first() or _MISSING_USER
+        cache.set(key, state, getattr(settings, 'TOKEN_VERSION_CACHE_TTL', 60))
+    return None if state == _MISSING_USER else tuple(state)
+
+
+def forget_token_state(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+class ClaimsTokenMixin:
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLE_CLAIM] = user.role
+        token[COMPANY_CLAIM] = str(user.company_id) if user.company_id else None
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+class ClaimsAccessToken(ClaimsTokenMixin, AccessToken):
+    pass
+
+
+class ClaimsRefreshToken(ClaimsTokenMixin, RefreshToken):
+    # Claims set on the refresh token are copied into the access tokens it mints
+    access_token_class = ClaimsAccessToken
+
+    def check_blacklist(self):
+        # Answered from the in-process filter; see accounts/revocation.py
+        if revocation_filter.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted, created = super().blacklist()
+        if not created:
+            # Someone blacklisted it first, e.g. the same token rotated on
+            # another worker before that worker's filter caught up.
+            raise TokenError(_("Token is blacklisted"))
+        revocation_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted, created
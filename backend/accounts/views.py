@@ -14,6 +14,8 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.exceptions import PermissionDenied, NotFound
 from django.contrib.auth import authenticate, login, logout
 from django.db import transaction
+from core.async_views import AsyncReadMixin
+from .models import User
 from .serializers import UserSerializer, UserRegistrationSerializer, LoginSerializer
 
 def login_view(request):
@@ -168,6 +170,24 @@ class UserDetailView(generics.RetrieveUpdateAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+class UserDetailAsyncView(AsyncReadMixin, UserDetailView):
+    """``UserDetailView`` with an async GET, for ASGI (see core/async_views.py)."""
+
+    async def aget(self, request, *args, **kwargs):
+        # Same as retrieve(), error handling included
+        try:
+            # Authentication only loads the token's claims; read the whole row
+            # from the database the user was loaded from
+            user = request.user
+            instance = await User.objects.db_manager(user._state.db).aget(pk=user.pk)
+            serializer = self.get_serializer(instance)
+            return Response(serializer.data)
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
 class TestView(APIView):
     permission_classes = (AllowAny,)
 
@@ -0,0 +1,29 @@
+import django_filters
+
+from accounts.models import User
+from core.filters import IndexedFilterSet
+from .models import Department
+
+
+class DepartmentFilter(IndexedFilterSet):
+    ordering = django_filters.OrderingFilter(fields=('name',))
+
+    default_ordering = 'name'
+    # The (company, name) unique constraint
+    indexes = [((), 'name')]
+
+    class Meta:
+        model = Department
+        fields = []
+
+
+class AdminUserFilter(IndexedFilterSet):
+    ordering = django_filters.OrderingFilter(fields=('date_joined',))
+
+    default_ordering = 'date_joined'
+    # The (company, role, date_joined) index of User.Meta.indexes
+    indexes = [((), 'date_joined')]
+
+    class Meta:
+        model = User
+        fields = []
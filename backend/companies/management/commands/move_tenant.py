@@ -0,0 +1,199 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from accounts.models import User
+from companies.models import Company, CompanyStats, Department, TenantShard
+from companies.sharding import get_shards, place_company, shard_map
+from employees.models import Employee, EmployeeIdSequence, EmployeeSearchToken, ExportJob
+from employees.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Move a company's rows to another tenant shard. The company stays readable throughout; "
+        "its writes are refused with HTTP 503 only while the last changes are copied."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('company_id')
+        parser.add_argument('target', help='Alias of the shard to move the company to.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows copied or deleted per transaction.')
+        parser.add_argument(
+            '--keep-source', action='store_true',
+            help='Leave the rows on the source shard instead of deleting them after the switch.'
+        )
+
+    def handle(self, *args, **options):
+        company_id, target = options['company_id'], options['target']
+        if target not in get_shards():
+            raise CommandError(f"{target!r} is not one of TENANT_SHARDS ({', '.join(get_shards())})")
+        shard_map.invalidate(company_id)
+        source = shard_map.shard_for(company_id)
+        if source == target:
+            raise CommandError(f'Company {company_id} is already on {target!r}')
+        self.company = Company.objects.using(source).filter(pk=company_id).first()
+        if self.company is None:
+            raise CommandError(f'Company {company_id} not found on {source!r}')
+        self.batch_size = options['batch_size']
+
+        # 1. Copy everything while the company keeps working on the source
+        started = timezone.now()
+        copied = self.copy(source, target)
+        self.stdout.write(f'Copied {copied} rows from {source!r} to {target!r}.')
+
+        # 2. Refuse writes, wait for every worker to notice, then copy what changed meanwhile
+        self.set_moving(source)
+        try:
+            self.wait()
+            self.delete_missing(source, target)
+            copied = self.copy(source, target, since=started)
+            self.stdout.write(f'Copied {copied} rows changed during the copy.')
+            # Token ids come from each database's own sequence, so the index is rebuilt rather than copied
+            indexed = rebuild_index([self.company.pk], using=target, batch_size=self.batch_size)
+            self.stdout.write(f'Indexed {indexed} employees for search on {target!r}.')
+        except BaseException:
+            place_company(self.company.pk, shard=source)
+            raise
+
+        # 3. Switch, then drop the source rows once no worker reads them any more
+        place_company(self.company.pk, shard=target)
+        self.stdout.write(self.style.SUCCESS(f'Company {company_id} now lives on {target!r}.'))
+        if not options['keep_source']:
+            self.wait()
+            deleted = self.delete_tenant(source)
+            self.stdout.write(f'Deleted {deleted} rows from {source!r}.')
+
+    def wait(self):
+        # Workers cache company locations for this long (see companies/sharding.py)
+        time.sleep(shard_map.ttl)
+
+    def set_moving(self, source):
+        TenantShard.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+            company_id=self.company.pk, defaults={'shard': source, 'moving': True}
+        )
+        shard_map.invalidate(self.company.pk)
+
+    def users(self, alias):
+        return User.objects.using(alias).filter(Q(company_id=self.company.pk) | Q(pk=self.company.owner_id))
+
+    def tenant_rows(self, alias):
+        """The company's rows on ``alias`` as ``(model, queryset)`` pairs, referenced rows first."""
+        company_id = self.company.pk
+        return [
+            (Company, Company.objects.using(alias).filter(pk=company_id)),
+            (User, self.users(alias)),
+            (CompanyStats, CompanyStats.objects.using(alias).filter(company_id=company_id)),
+            (Department, Department.objects.using(alias).filter(company_id=company_id)),
+            (Employee, Employee.objects.using(alias).filter(company_id=company_id)),
+            (EmployeeIdSequence, EmployeeIdSequence.objects.using(alias).filter(company_id=company_id)),
+            # The files live in MEDIA_ROOT, shared by every shard
+            (ExportJob, ExportJob.objects.using(alias).filter(company_id=company_id)),
+        ]
+
+    def batches(self, queryset):
+        queryset = queryset.order_by('pk')
+        last_pk = None
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            batch = list(page[:self.batch_size])
+            if not batch:
+                return
+            yield batch
+            last_pk = batch[-1].pk
+
+    def copy(self, source, target, since=None):
+        """Upsert the company's rows from ``source`` into ``target``; returns the row count.
+
+        With ``since``, models that track ``updated_at`` only copy rows changed
+        after it. Rows are saved raw, as ``loaddata`` does, so timestamps are
+        kept and the counter signal handlers stay out of the way.
+        """
+        copied = 0
+        # Company and its owner reference each other
+        with connections[target].constraint_checks_disabled():
+            for model, queryset in self.tenant_rows(source):
+                if since is not None and any(field.name == 'updated_at' for field in model._meta.fields):
+                    queryset = queryset.filter(updated_at__gte=since)
+                for batch in self.batches(queryset):
+                    with transaction.atomic(using=target):
+                        for row in batch:
+                            row.save_base(raw=True, using=target)
+                    copied += len(batch)
+        return copied + self.copy_tokens(source, target, since)
+
+    def copy_tokens(self, source, target, since=None):
+        # Token ids come from each database's own sequence, so tokens are matched by jti
+        outstanding = OutstandingToken.objects.using(source).filter(
+            user__in=self.users(source), expires_at__gt=timezone.now()
+        )
+        blacklisted = BlacklistedToken.objects.using(source).filter(token__in=outstanding).select_related('token')
+        if since is not None:
+            outstanding = outstanding.filter(created_at__gte=since)
+            blacklisted = blacklisted.filter(blacklisted_at__gte=since)
+        target_tokens = OutstandingToken.objects.using(target)
+        copied = 0
+        for batch in self.batches(outstanding):
+            existing = set(target_tokens.filter(jti__in=[token.jti for token in batch]).values_list('jti', flat=True))
+            target_tokens.bulk_create([
+                OutstandingToken(
+                    user_id=token.user_id, jti=token.jti, token=token.token,
+                    created_at=token.created_at, expires_at=token.expires_at,
+                )
+                for token in batch if token.jti not in existing
+            ])
+            copied += len(batch) - len(existing)
+        for batch in self.batches(blacklisted):
+            token_ids = dict(target_tokens.filter(jti__in=[entry.token.jti for entry in batch]).values_list('jti', 'id'))
+            existing = set(
+                BlacklistedToken.objects.using(target).filter(token_id__in=token_ids.values())
+                .values_list('token_id', flat=True)
+            )
+            with transaction.atomic(using=target):
+                for entry in batch:
+                    token_id = token_ids.get(entry.token.jti)
+                    if token_id is not None and token_id not in existing:
+                        BlacklistedToken(token_id=token_id, blacklisted_at=entry.blacklisted_at).save_base(
+                            raw=True, using=target
+                        )
+                        copied += 1
+        return copied
+
+    def delete_missing(self, source, target):
+        """Delete rows from ``target`` that were deleted on ``source`` after being copied."""
+        for (model, on_source), (_, on_target) in reversed(list(zip(self.tenant_rows(source), self.tenant_rows(target)))):
+            kept = set(on_source.values_list('pk', flat=True))
+            stale = [pk for pk in on_target.values_list('pk', flat=True) if pk not in kept]
+            for start in range(0, len(stale), self.batch_size):
+                model._base_manager.using(target).filter(pk__in=stale[start:start + self.batch_size]).delete()
+
+    def delete_tenant(self, alias):
+        # Users are fetched first: deleting the owner deletes the company,
+        # which detaches the remaining users from it.
+        user_ids = list(self.users(alias).values_list('pk', flat=True))
+        rows = dict(self.tenant_rows(alias))
+        # Dependent rows first, so no single delete cascades over the whole company
+        querysets = [
+            OutstandingToken.objects.using(alias).filter(user_id__in=user_ids),
+            rows[EmployeeIdSequence],
+            rows[ExportJob],
+            EmployeeSearchToken.objects.using(alias).filter(company_id=self.company.pk),
+            rows[Employee],
+            rows[Department],
+            rows[CompanyStats],
+            User.objects.using(alias).filter(pk__in=user_ids),
+            rows[Company],
+        ]
+        deleted = 0
+        for queryset in querysets:
+            while True:
+                pks = list(queryset.order_by().values_list('pk', flat=True)[:self.batch_size])
+                if not pks:
+                    break
+                with transaction.atomic(using=alias):
+                    deleted += queryset.model._base_manager.using(alias).filter(pk__in=pks).delete()[0]
+        return deleted
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from companies.models import CompanyStats
+from companies.sharding import get_shards
+from core.db.routers import use_shard
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized per-company counters from the source tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company', action='append', dest='company_ids', metavar='COMPANY_ID',
+            help='Only rebuild the given company (may be repeated). Defaults to all companies.'
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = 0
+        for shard in get_shards():
+            with use_shard(shard):
+                rebuilt += len(CompanyStats.rebuild(options['company_ids']))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt counters for {rebuilt} companies.'))
@@ -0,0 +1,55 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_company_stats(apps, schema_editor):
+    Company = apps.get_model('companies', 'Company')
+    CompanyStats = apps.get_model('companies', 'CompanyStats')
+    Department = apps.get_model('companies', 'Department')
+    Employee = apps.get_model('employees', 'Employee')
+    User = apps.get_model('accounts', 'User')
+
+    def grouped(queryset):
+        return dict(queryset.values_list('company_id').annotate(n=Count('pk')).order_by())
+
+    departments = grouped(Department.objects.all())
+    employees = grouped(Employee.objects.all())
+    admins = grouped(User.objects.filter(role='ADMIN'))
+    CompanyStats.objects.bulk_create([
+        CompanyStats(
+            company_id=company_id,
+            departments_count=departments.get(company_id, 0),
+            employees_count=employees.get(company_id, 0),
+            admin_count=admins.get(company_id, 0),
+        )
+        for company_id in Company.objects.values_list('id', flat=True)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_company'),
+        ('companies', '0005_alter_company_address_alter_company_city_and_more'),
+        ('employees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyStats',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='companies.company')),
+                ('departments_count', models.IntegerField(default=0, verbose_name='departments count')),
+                ('employees_count', models.IntegerField(default=0, verbose_name='employees count')),
+                ('admin_count', models.IntegerField(default=0, verbose_name='admin count')),
+            ],
+            options={
+                'verbose_name': 'company stats',
+                'verbose_name_plural': 'company stats',
+            },
+        ),
+        migrations.RunPython(backfill_company_stats, migrations.RunPython.noop),
+    ]
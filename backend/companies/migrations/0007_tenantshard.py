@@ -0,0 +1,26 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_companystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantShard',
+            fields=[
+                ('company_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('shard', models.CharField(max_length=64)),
+                ('moving', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'tenant shard',
+                'verbose_name_plural': 'tenant shards',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0007_tenantshard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companystats',
+            name='data_version',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='data version'),
+        ),
+    ]
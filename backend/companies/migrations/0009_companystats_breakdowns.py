@@ -0,0 +1,66 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:28
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+def backfill_breakdowns(apps, schema_editor):
+    CompanyStats = apps.get_model('companies', 'CompanyStats')
+    Department = apps.get_model('companies', 'Department')
+    Employee = apps.get_model('employees', 'Employee')
+    # Each shard is migrated on its own and holds its own tenants' rows
+    db_alias = schema_editor.connection.alias
+
+    rows = {stats.company_id: stats for stats in CompanyStats.objects.using(db_alias)}
+    for company_id, department_id, name in Department.objects.using(db_alias).values_list('company_id', 'id', 'name'):
+        if company_id in rows:
+            rows[company_id].department_headcounts[str(department_id)] = {'name': name, 'headcount': 0}
+    groups = (
+        Employee.objects.using(db_alias)
+        .values_list('company_id', 'department_id', 'is_active', TruncMonth('joining_date'))
+        .annotate(n=Count('pk'))
+        .order_by()
+    )
+    for company_id, department_id, is_active, month, n in groups:
+        stats = rows.get(company_id)
+        if stats is None:
+            continue
+        if is_active:
+            stats.active_employees_count += n
+        if department_id is not None:
+            entry = stats.department_headcounts.setdefault(str(department_id), {'name': '', 'headcount': 0})
+            entry['headcount'] += n
+        if month is not None:
+            key = month.strftime('%Y-%m')
+            stats.joiners_by_month[key] = stats.joiners_by_month.get(key, 0) + n
+    CompanyStats.objects.using(db_alias).bulk_update(
+        rows.values(), ['active_employees_count', 'department_headcounts', 'joiners_by_month'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0008_companystats_data_version'),
+        ('employees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companystats',
+            name='active_employees_count',
+            field=models.IntegerField(default=0, verbose_name='active employees count'),
+        ),
+        migrations.AddField(
+            model_name='companystats',
+            name='department_headcounts',
+            field=models.JSONField(default=dict, verbose_name='department headcounts'),
+        ),
+        migrations.AddField(
+            model_name='companystats',
+            name='joiners_by_month',
+            field=models.JSONField(default=dict, verbose_name='joiners by month'),
+        ),
+        migrations.RunPython(backfill_breakdowns, migrations.RunPython.noop),
+    ]
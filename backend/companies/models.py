@@ -1,7 +1,14 @@
 import uuid
-from django.db import models
+import weakref
+from collections import Counter
+from django.db import models, router, transaction
+from django.db.models import DEFERRED, Case, Count, F, Value, When
+from django.db.models.functions import JSONObject, TruncMonth
+from django.db.models.lookups import Exact
 from django.utils.translation import gettext_lazy as _
 from accounts.models import User
+from core.db.functions import JSONInsert, JSONRemove, JSONSet, json_count, json_path
+from .sharding import TenantManager
 
 class Company(models.Model):
     class IndustryType(models.TextChoices):
@@ -64,6 +71,8 @@ class Department(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TenantManager()
+
     class Meta:
         verbose_name = _('department')
         verbose_name_plural = _('departments')
@@ -71,4 +80,311 @@ class Department(models.Model):
         ordering = ['name']
 
     def __str__(self):
-        return f"{self.company.name} - {self.name}" 
\ No newline at end of file
+        return f"{self.company.name} - {self.name}" 
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # A rename re-indexes the department's employees for search (see
+        # employees/search.py) and renames its entry in CompanyStats
+        instance._loaded_name = instance.__dict__.get('name', DEFERRED)
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Set after the post_save handlers, which compare against the loaded name
+        self._loaded_name = self.name
+
+
+class CompanyStats(models.Model):
+    """Denormalized per-company counters and dashboard breakdowns.
+
+    Kept in step with Department, Employee and ADMIN User writes by the
+    handlers in ``companies.signals`` so the profile and dashboard endpoints
+    can read them with a primary-key lookup instead of running COUNT(*)
+    scans.
+    """
+    company = models.OneToOneField(
+        Company,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    departments_count = models.IntegerField(_('departments count'), default=0)
+    employees_count = models.IntegerField(_('employees count'), default=0)
+    admin_count = models.IntegerField(_('admin count'), default=0)
+    active_employees_count = models.IntegerField(_('active employees count'), default=0)
+    # {"<department id>": {"name": ..., "headcount": n}} for every department
+    department_headcounts = models.JSONField(_('department headcounts'), default=dict)
+    # {"YYYY-MM": n}, by joining date; months without joiners are left out
+    joiners_by_month = models.JSONField(_('joiners by month'), default=dict)
+    # Bumped after every transaction that writes to the company's data; ETags
+    # are built from it (see companies/tenancy.py)
+    data_version = models.PositiveBigIntegerField(_('data version'), default=0)
+
+    COUNTER_FIELDS = ('departments_count', 'employees_count', 'admin_count')
+    BREAKDOWN_FIELDS = ('active_employees_count', 'department_headcounts', 'joiners_by_month')
+
+    class Meta:
+        verbose_name = _('company stats')
+        verbose_name_plural = _('company stats')
+
+    def __str__(self):
+        return f"{self.company_id} stats"
+
+    @property
+    def inactive_employees_count(self):
+        return self.employees_count - self.active_employees_count
+
+    @property
+    def unassigned_employees_count(self):
+        return self.employees_count - sum(entry['headcount'] for entry in self.department_headcounts.values())
+
+    @classmethod
+    def adjust(cls, company_id, using=None, breakdowns=None, **deltas):
+        # A single UPDATE ... SET x = x + n, executed on the caller's
+        # connection so it commits or rolls back with the write that caused it.
+        # ``using`` is the database of that write, i.e. the tenant's shard.
+        # ``breakdowns`` maps JSON fields to expressions computing their new
+        # value from the old one in the same UPDATE, so the row is never read
+        # and written back.
+        # Every call also bumps data_version after commit, so call it without
+        # deltas to record any other change to the company's data; that
+        # takes no lock on the row.
+        # A missing row is left alone; it is rebuilt on the next read.
+        if not company_id:
+            return
+        changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        changes.update(breakdowns or {})
+        if changes:
+            cls.objects.db_manager(using).filter(company_id=company_id).update(**changes)
+        cls.bump_data_version(company_id, using)
+
+    @classmethod
+    def bump_data_version(cls, company_id, using=None):
+        """Bump the company's data_version once the current transaction commits.
+
+        Every write to a tenant's data calls this, so the bump is not made
+        inside the write's transaction: that would hold a lock on the
+        company's row until commit and queue every other write to the
+        company behind it. Instead the companies written in a transaction
+        are collected and bumped with one UPDATE after it commits. Outside a
+        transaction the bump is made straight away.
+        """
+        if not company_id:
+            return
+        using = using or router.db_for_write(cls)
+        connection = transaction.get_connection(using)
+        # Join the hook already scheduled at this savepoint level. A hook is
+        # dropped with the transaction or savepoint it was registered in, so
+        # one from an enclosing level would bump for writes rolled back here.
+        # Dropping the hook also drops the only strong reference to the bump,
+        # which takes it out of the connection's pending bumps.
+        pending = getattr(connection, 'data_version_bumps', None)
+        if pending is None:
+            pending = connection.data_version_bumps = weakref.WeakValueDictionary()
+        level = tuple(connection.savepoint_ids)
+        bump = pending.get(level)
+        if bump is not None:
+            bump.company_ids.add(company_id)
+            return
+        bump = DataVersionBump(using, company_id)
+        if connection.in_atomic_block:
+            pending[level] = bump
+        transaction.on_commit(bump, using=using)
+
+    @classmethod
+    def save_department(cls, company_id, using, department_id, name, created=False):
+        """Add a department to the breakdowns, or rename it."""
+        path = json_path(department_id)
+        headcounts = JSONSet(
+            JSONInsert(F('department_headcounts'), path, JSONObject(name=Value(name), headcount=Value(0))),
+            json_path(department_id, 'name'), Value(name),
+        )
+        cls.adjust(
+            company_id, using, departments_count=1 if created else 0,
+            breakdowns={'department_headcounts': headcounts},
+        )
+
+    @classmethod
+    def delete_department(cls, company_id, using, department_id):
+        # The department's employees were unassigned by an UPDATE, which
+        # sends no signals; dropping the entry counts them as unassigned.
+        headcounts = JSONRemove(F('department_headcounts'), json_path(department_id))
+        cls.adjust(company_id, using, departments_count=-1, breakdowns={'department_headcounts': headcounts})
+
+    @classmethod
+    def move_employees(cls, company_id, using=None, leaving=(), joining=()):
+        """Take employees out of the company's counts and add others.
+
+        Each employee is given as ``(department_id, is_active, joining_date)``;
+        an update moves one from its loaded values to its saved ones.
+        """
+        from employees.models import Employee  # Import here to avoid circular dependency
+
+        active, by_department, by_month = 0, Counter(), Counter()
+        for n, employees in ((-1, leaving), (1, joining)):
+            for department_id, is_active, joining_date in employees:
+                if is_active:
+                    active += n
+                if department_id is not None:
+                    by_department[str(department_id)] += n
+                # Unsaved instances may still hold the default, a datetime
+                joining_date = Employee._meta.get_field('joining_date').to_python(joining_date)
+                if joining_date is not None:
+                    by_month[joining_date.strftime('%Y-%m')] += n
+
+        # Each key's new value is computed from the column's old value
+        headcounts = F('department_headcounts')
+        for department_id, n in by_department.items():
+            if n:
+                # Created by save_department; rebuild() repairs the name if it was missed
+                headcounts = JSONSet(
+                    JSONInsert(headcounts, json_path(department_id), JSONObject(name=Value(''), headcount=Value(0))),
+                    json_path(department_id, 'headcount'),
+                    json_count(F('department_headcounts'), department_id, 'headcount') + n,
+                )
+        joiners = F('joiners_by_month')
+        # Months that may drop to zero first: each one's CASE repeats what it wraps
+        for month, n in sorted(by_month.items(), key=lambda item: item[1]):
+            count = json_count(F('joiners_by_month'), month) + n
+            if n < 0:
+                joiners = Case(
+                    When(Exact(count, 0), then=JSONRemove(joiners, json_path(month))),
+                    default=JSONSet(joiners, json_path(month), count),
+                )
+            elif n:
+                joiners = JSONSet(joiners, json_path(month), count)
+
+        breakdowns = {}
+        if any(by_department.values()):
+            breakdowns['department_headcounts'] = headcounts
+        if any(by_month.values()):
+            breakdowns['joiners_by_month'] = joiners
+        cls.adjust(
+            company_id, using, breakdowns=breakdowns,
+            employees_count=len(joining) - len(leaving), active_employees_count=active,
+        )
+
+    def count_employee(self, department_id, is_active, joining_date, n=1):
+        """Add ``n`` employees (remove, if negative) with these values to the counts."""
+        from employees.models import Employee  # Import here to avoid circular dependency
+
+        self.employees_count += n
+        if is_active:
+            self.active_employees_count += n
+        if department_id is not None:
+            # Created by department_saved; rebuild() repairs the name if it was missed
+            entry = self.department_headcounts.setdefault(str(department_id), {'name': '', 'headcount': 0})
+            entry['headcount'] += n
+        # Unsaved instances may still hold the default, a datetime
+        joining_date = Employee._meta.get_field('joining_date').to_python(joining_date)
+        if joining_date is not None:
+            month = joining_date.strftime('%Y-%m')
+            joiners = self.joiners_by_month.get(month, 0) + n
+            if joiners:
+                self.joiners_by_month[month] = joiners
+            else:
+                self.joiners_by_month.pop(month, None)
+
+    @classmethod
+    def get_for(cls, company_id):
+        """Return the company's row, rebuilding it if it is missing."""
+        stats = cls.objects.filter(company_id=company_id).first()
+        return stats if stats is not None else cls.rebuild([company_id])[0]
+
+    @classmethod
+    def get_data_version(cls, company_id):
+        return cls.objects.filter(company_id=company_id).values_list('data_version', flat=True).first()
+
+    @classmethod
+    def rebuild(cls, company_ids=None):
+        """Recompute the counters and breakdowns from the source tables and return the rows."""
+        from employees.models import Employee  # Import here to avoid circular dependency
+
+        companies = Company.objects.all()
+        if company_ids is not None:
+            companies = companies.filter(id__in=company_ids)
+
+        def tenant_rows(queryset):
+            if company_ids is not None:
+                queryset = queryset.filter(company_id__in=company_ids)
+            return queryset.order_by()
+
+        with transaction.atomic(using=router.db_for_write(cls)):
+            ids = list(companies.values_list('id', flat=True))
+            existing = set(
+                cls.objects.select_for_update().filter(company_id__in=ids).values_list('company_id', flat=True)
+            )
+            admins = dict(
+                tenant_rows(User.objects.filter(role=User.UserRole.ADMIN))
+                .values_list('company_id').annotate(n=Count('pk'))
+            )
+            rows = {
+                company_id: cls(company_id=company_id, admin_count=admins.get(company_id, 0))
+                for company_id in ids
+            }
+            for company_id, department_id, name in tenant_rows(Department.objects.all()).values_list(
+                'company_id', 'id', 'name'
+            ):
+                if company_id in rows:
+                    rows[company_id].departments_count += 1
+                    rows[company_id].department_headcounts[str(department_id)] = {'name': name, 'headcount': 0}
+            # One row per (company, department, active, month) with its employee count
+            groups = tenant_rows(Employee.objects.all()).values_list(
+                'company_id', 'department_id', 'is_active', TruncMonth('joining_date')
+            ).annotate(n=Count('pk'))
+            for company_id, department_id, is_active, month, n in groups:
+                if company_id in rows:
+                    rows[company_id].count_employee(department_id, is_active, month, n=n)
+
+            rows = list(rows.values())
+            cls.objects.bulk_update(
+                [row for row in rows if row.company_id in existing],
+                [*cls.COUNTER_FIELDS, *cls.BREAKDOWN_FIELDS],
+                batch_size=500,
+            )
+            # The counters may have changed what the profile shows
+            cls.objects.filter(company_id__in=existing).update(data_version=F('data_version') + 1)
+            cls.objects.bulk_create(
+                [row for row in rows if row.company_id not in existing], batch_size=500
+            )
+        return rows
+
+
+class DataVersionBump:
+    """On-commit hook bumping the data_version of the companies written in one transaction."""
+
+    def __init__(self, using, company_id):
+        self.using = using
+        self.company_ids = {company_id}
+
+    def __call__(self):
+        # Writes made from here on are bumped by a hook of their own
+        pending = transaction.get_connection(self.using).data_version_bumps
+        for level, bump in list(pending.items()):
+            if bump is self:
+                del pending[level]
+        CompanyStats.objects.db_manager(self.using).filter(company_id__in=self.company_ids).update(
+            data_version=F('data_version') + 1
+        )
+
+
+class TenantShard(models.Model):
+    """The database holding a company's rows (see companies/sharding.py).
+
+    Always read and written on ``default``. Companies without a row live on
+    ``default``.
+    """
+    company_id = models.UUIDField(primary_key=True)
+    shard = models.CharField(max_length=64)
+    # Set by move_tenant while the final changes are copied; writes are refused
+    moving = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _('tenant shard')
+        verbose_name_plural = _('tenant shards')
+
+    def __str__(self):
+        return f"{self.company_id} on {self.shard}"
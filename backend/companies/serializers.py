@@ -1,6 +1,8 @@
 from rest_framework import serializers
-from .models import Company, Department
+from .models import Company, CompanyStats, Department
 from accounts.models import User
+from core.fieldsets import SparseFieldsMixin
+from core.serializers import ValuesSerializer
 
 class CompanySerializer(serializers.ModelSerializer):
     owner = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -29,6 +31,32 @@ class CompanySerializer(serializers.ModelSerializer):
         return data
 
 
+class DashboardSerializer(serializers.ModelSerializer):
+    """The company dashboard's numbers, all read from its CompanyStats row."""
+    inactive_employees_count = serializers.IntegerField(read_only=True)
+    unassigned_employees_count = serializers.IntegerField(read_only=True)
+    departments = serializers.SerializerMethodField()
+    joiners_by_month = serializers.SerializerMethodField()
+
+    class Meta:
+        model = CompanyStats
+        fields = [
+            'company', 'employees_count', 'active_employees_count', 'inactive_employees_count',
+            'unassigned_employees_count', 'departments_count', 'admin_count',
+            'departments', 'joiners_by_month'
+        ]
+
+    def get_departments(self, stats):
+        departments = [
+            {'id': department_id, 'name': entry['name'], 'headcount': entry['headcount']}
+            for department_id, entry in stats.department_headcounts.items()
+        ]
+        return sorted(departments, key=lambda department: (department['name'], department['id']))
+
+    def get_joiners_by_month(self, stats):
+        return [{'month': month, 'count': count} for month, count in sorted(stats.joiners_by_month.items())]
+
+
 class CompanyRegistrationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Company
@@ -38,7 +66,21 @@ class CompanyRegistrationSerializer(serializers.ModelSerializer):
         ]
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class CompanySummarySerializer(serializers.ModelSerializer):
+    """A company as a nested object, for ``?expand=company``."""
+    class Meta:
+        model = Company
+        fields = ['id', 'name']
+
+
+class DepartmentSummarySerializer(serializers.ModelSerializer):
+    """A department as a nested object, for ``?expand=department``."""
+    class Meta:
+        model = Department
+        fields = ['id', 'name']
+
+
+class DepartmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     company_name = serializers.CharField(source='company.name', read_only=True)
 
     class Meta:
@@ -47,6 +89,12 @@ class DepartmentSerializer(serializers.ModelSerializer):
             'id', 'name', 'company', 'company_name', 'description', 'created_at'
         ]
         read_only_fields = ('id', 'created_at', 'company', 'company_name')
+        expandable_fields = {'company': CompanySummarySerializer}
+
+
+class DepartmentValuesSerializer(ValuesSerializer):
+    """DepartmentSerializer's output for list views, read from values() rows."""
+    serializer_class = DepartmentSerializer
 
 
 class AdminUserCreateSerializer(serializers.ModelSerializer):
@@ -91,10 +139,16 @@ class AdminUserCreateSerializer(serializers.ModelSerializer):
         )
         return admin_user
 
-class AdminUserSerializer(serializers.ModelSerializer):
+class AdminUserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
             'id', 'email', 'first_name', 'last_name', 'phone', 'is_active', 'date_joined'
         ]
-        read_only_fields = ('id', 'email', 'first_name', 'last_name', 'phone', 'is_active', 'date_joined') 
\ No newline at end of file
+        read_only_fields = ('id', 'email', 'first_name', 'last_name', 'phone', 'is_active', 'date_joined')
+        expandable_fields = {'company': CompanySummarySerializer}
+
+
+class AdminUserValuesSerializer(ValuesSerializer):
+    """AdminUserSerializer's output for list views, read from values() rows."""
+    serializer_class = AdminUserSerializer
@@ -0,0 +1,145 @@
+"""Place each company's rows on one of the ``TENANT_SHARDS`` databases.
+
+A tenant is a company with its owner, users, departments, employees,
+counters and JWTs; all of them live on the same shard. ``TenantShard`` rows
+on ``default`` record where each company lives. New companies are placed by
+``company_id`` (``place_company``). Companies without an entry live on
+``default``, so a deployment with a single shard needs no map at all.
+
+Requests find their shard when the user is authenticated: JWTs carry the
+company id, which is looked up here (cached per process for
+``TENANT_SHARD_CACHE_TTL`` seconds), and email logins search the shards
+(``find_user_shard``). ``core.db.routers.TenantShardRouter`` then sends the
+request's tenant queries to that shard. Outside requests, wrap tenant work in
+``core.db.routers.use_shard()`` or use the ``for_company()`` managers.
+
+``manage.py move_tenant`` moves a company between shards while it stays
+readable; writes are refused with HTTP 503 only while the final changes are
+copied.
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import APIException
+
+# Models whose rows belong to exactly one tenant, as app_label.model_name
+TENANT_MODELS = {
+    'accounts.user',
+    'companies.company',
+    'companies.companystats',
+    'companies.department',
+    'employees.employee',
+    'employees.employeeidsequence',
+    'employees.employeesearchtoken',
+    'employees.exportjob',
+    'token_blacklist.outstandingtoken',
+    'token_blacklist.blacklistedtoken',
+}
+
+
+def get_shards():
+    return list(getattr(settings, 'TENANT_SHARDS', None) or [DEFAULT_DB_ALIAS])
+
+
+def is_sharded():
+    return len(get_shards()) > 1
+
+
+def is_tenant_model(model):
+    return model._meta.label_lower in TENANT_MODELS
+
+
+class TenantMoving(APIException):
+    status_code = 503
+    default_detail = _('This company is being moved to another database. Please retry shortly.')
+    default_code = 'tenant_moving'
+
+
+class ShardMap:
+    """Per-process cache of ``company_id -> (shard, moving)``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'TENANT_SHARD_CACHE_TTL', 5)
+
+    def get(self, company_id):
+        if not company_id or not is_sharded():
+            return DEFAULT_DB_ALIAS, False
+        company_id = uuid.UUID(str(company_id))
+        entry = self._entries.get(company_id)
+        if entry is None or entry[2] < time.monotonic():
+            from .models import TenantShard  # Import here to avoid circular dependency
+
+            row = TenantShard.objects.using(DEFAULT_DB_ALIAS).filter(company_id=company_id).values_list(
+                'shard', 'moving'
+            ).first()
+            shard, moving = row or (DEFAULT_DB_ALIAS, False)
+            entry = (shard, moving, time.monotonic() + self.ttl)
+            with self._lock:
+                self._entries[company_id] = entry
+        return entry[0], entry[1]
+
+    def shard_for(self, company_id):
+        return self.get(company_id)[0]
+
+    def is_moving(self, company_id):
+        return self.get(company_id)[1]
+
+    def invalidate(self, company_id=None):
+        with self._lock:
+            if company_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(uuid.UUID(str(company_id)), None)
+
+
+shard_map = ShardMap()
+
+
+def place_company(company_id, shard=None):
+    """Choose and record the shard for a new company; returns its alias.
+
+    Without an explicit ``shard`` the company id picks one, spreading new
+    tenants evenly over the configured shards.
+    """
+    shards = get_shards()
+    if shard is None:
+        shard = shards[uuid.UUID(str(company_id)).int % len(shards)]
+    if is_sharded():
+        from .models import TenantShard  # Import here to avoid circular dependency
+
+        TenantShard.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+            company_id=company_id, defaults={'shard': shard, 'moving': False}
+        )
+        shard_map.invalidate(company_id)
+    return shard
+
+
+def find_user_shard(**lookup):
+    """Return the alias of the first shard holding a user matching ``lookup``, or None."""
+    from accounts.models import User  # Import here to avoid circular dependency
+
+    for alias in get_shards():
+        if User._default_manager.db_manager(alias).filter(**lookup).exists():
+            return alias
+    return None
+
+
+class TenantQuerySet(models.QuerySet):
+    def for_company(self, company):
+        """Rows of ``company`` (an instance or id), read from the shard that holds them."""
+        company_id = getattr(company, 'pk', company)
+        queryset = self.filter(company_id=company_id)
+        shard = shard_map.shard_for(company_id)
+        return queryset if shard == DEFAULT_DB_ALIAS else queryset.using(shard)
+
+
+TenantManager = models.Manager.from_queryset(TenantQuerySet)
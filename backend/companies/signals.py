@@ -0,0 +1,107 @@
+from django.db.models import DEFERRED
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from employees.models import Employee
+from .models import Company, CompanyStats, Department
+from .tenancy import tenant_cache
+
+
+@receiver(post_save, sender=Company)
+def create_company_stats(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    if created:
+        CompanyStats.objects.using(using).create(company=instance)
+    else:
+        CompanyStats.adjust(instance.pk, using)
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def company_changed(sender, instance, **kwargs):
+    tenant_cache.invalidate_company(instance.pk)
+    tenant_cache.invalidate_user(instance.owner_id)
+
+
+@receiver(post_save, sender=Department)
+def department_saved(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    if not created and getattr(instance, '_loaded_name', DEFERRED) == instance.name:
+        # Only the name and the count are kept in the stats row
+        CompanyStats.adjust(instance.company_id, using)
+        return
+
+    CompanyStats.save_department(instance.company_id, using, instance.pk, instance.name, created=created)
+
+
+@receiver(post_delete, sender=Department)
+def department_deleted(sender, instance, using=None, **kwargs):
+    CompanyStats.delete_department(instance.company_id, using, instance.pk)
+
+
+@receiver(post_save, sender=Employee)
+def employee_saved(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    loaded = None if created else getattr(instance, '_loaded_stats', (DEFERRED, (DEFERRED,)))
+    current = (instance.company_id, instance.counted_as())
+    instance._loaded_stats = current
+    if loaded is None:
+        CompanyStats.move_employees(instance.company_id, using, joining=[current[1]])
+    elif DEFERRED in (loaded[0], *loaded[1]):
+        # The counted values were not loaded, so a change cannot be detected
+        # here; rebuild_company_stats repairs any drift.
+        CompanyStats.adjust(instance.company_id, using)
+    elif loaded == current:
+        CompanyStats.adjust(instance.company_id, using)
+    elif loaded[0] == instance.company_id:
+        CompanyStats.move_employees(instance.company_id, using, leaving=[loaded[1]], joining=[current[1]])
+    else:
+        CompanyStats.move_employees(loaded[0], using, leaving=[loaded[1]])
+        CompanyStats.move_employees(instance.company_id, using, joining=[current[1]])
+
+
+@receiver(post_delete, sender=Employee)
+def employee_deleted(sender, instance, using=None, **kwargs):
+    CompanyStats.move_employees(instance.company_id, using, leaving=[instance.counted_as()])
+
+
+def _admin_company(role, company_id):
+    return company_id if role == User.UserRole.ADMIN else None
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, using=None, update_fields=None, **kwargs):
+    if raw:
+        return
+    loaded = (None, None) if created else getattr(instance, '_loaded_membership', (DEFERRED, DEFERRED))
+    current = _admin_company(instance.role, instance.company_id)
+    instance._loaded_membership = (instance.role, instance.company_id)
+    tenant_cache.invalidate_user(instance.pk)
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        # Logins change nothing the company's pages show
+        return
+    if DEFERRED in loaded:
+        # Membership was not loaded, so a change cannot be detected here;
+        # rebuild_company_stats repairs any drift.
+        CompanyStats.adjust(instance.company_id, using)
+        return
+    # Companies the user left or joined, or whose user changed
+    changed = {loaded[1], instance.company_id}
+    previous = _admin_company(*loaded)
+    if previous != current:
+        CompanyStats.adjust(previous, using, admin_count=-1)
+        CompanyStats.adjust(current, using, admin_count=1)
+        changed -= {previous, current}
+    for company_id in changed:
+        CompanyStats.adjust(company_id, using)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, using=None, **kwargs):
+    tenant_cache.invalidate_user(instance.pk)
+    is_admin = _admin_company(instance.role, instance.company_id) is not None
+    CompanyStats.adjust(instance.company_id, using, admin_count=-1 if is_admin else 0)
@@ -0,0 +1,175 @@
+"""Resolve the company (tenant) a request acts on, once per request.
+
+``get_request_company`` caches the result on the request, and a small
+per-process LRU keyed by user id, company id and token version lets
+consecutive requests from the same user skip the lookup entirely. Entries
+expire after ``TENANT_CACHE_TTL`` seconds and are dropped early when the
+user or company changes in this process (see ``companies.signals``).
+
+``TenantETagMixin`` answers conditional GETs from the company's
+``CompanyStats.data_version``, which goes up after every transaction that
+writes to its company, department, user or employee rows. A request whose ``If-None-Match``
+still matches gets a 304 after one primary-key lookup, before the view
+runs its queries or serializer.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.crypto import salted_hmac
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Company, CompanyStats
+
+_MISSING = object()
+
+
+class TenantCache:
+    """LRU of resolved companies, keyed by ``(user id, company id, token version)``.
+
+    A user moved to another company, or whose role changed, has a new
+    ``company_id`` or ``token_version`` (see accounts/tokens.py). Their next
+    request misses in every process, not only the one that saw the change.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(user):
+        return user.pk, user.company_id, user.token_version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            company, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return company
+
+    def set(self, key, company):
+        with self._lock:
+            self._entries[key] = (company, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def invalidate_company(self, company_id):
+        with self._lock:
+            for key, (company, _) in list(self._entries.items()):
+                if company is not None and company.pk == company_id:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+tenant_cache = TenantCache(
+    maxsize=getattr(settings, 'TENANT_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'TENANT_CACHE_TTL', 30),
+)
+
+
+def resolve_company(user):
+    """Look up the company ``user`` belongs to, bypassing all caches."""
+    if user.is_parent:
+        return Company.objects.filter(owner=user).first()
+    if user.company_id:
+        return Company.objects.filter(pk=user.company_id).first()
+    return None
+
+
+def get_user_company(user):
+    if not user or not user.is_authenticated:
+        return None
+    key = tenant_cache.key(user)
+    company = tenant_cache.get(key)
+    if company is _MISSING:
+        company = resolve_company(user)
+        tenant_cache.set(key, company)
+    # Hand out a copy so a view modifying its instance cannot leak into the cache
+    return copy.copy(company)
+
+
+def get_request_company(request):
+    """Return the current request's company, resolving it at most once."""
+    # Store on the underlying HttpRequest so every DRF Request wrapping it shares the result
+    http_request = getattr(request, '_request', request)
+    company = getattr(http_request, '_tenant_company', _MISSING)
+    if company is _MISSING:
+        company = get_user_company(request.user)
+        http_request._tenant_company = company
+    return company
+
+
+class TenantMixin:
+    """View mixin exposing the request's company as ``self.get_company()``."""
+
+    def get_company(self):
+        return get_request_company(self.request)
+
+
+class TenantETagMixin(TenantMixin):
+    """View mixin adding tenant-versioned ETags and 304 responses to GET."""
+
+    def get_etag(self, request):
+        company = self.get_company()
+        if company is None:
+            return None
+        version = self.get_data_version(company)
+        if version is None:
+            return None
+        # Responses depend on the user's role, the format and the query
+        # string (?fields=, ?expand=); the HMAC keeps the tag from revealing
+        # ids or being guessed for another user.
+        value = (
+            f'{company.pk}:{version}:{request.user.pk}:{request.accepted_renderer.format}:'
+            f'{request.META.get("QUERY_STRING", "")}'
+        )
+        return quote_etag(salted_hmac('companies.etag', value).hexdigest()[:32])
+
+    def get_data_version(self, company):
+        return CompanyStats.get_data_version(company.pk)
+
+    def check_etag(self, request):
+        """Return the ETag for this response and, if the client's copy is current, a 304 to send instead."""
+        etag = self.get_etag(request)
+        if etag is not None:
+            # If-None-Match uses the weak comparison
+            etags = {tag.removeprefix('W/') for tag in parse_etags(request.headers.get('If-None-Match', ''))}
+            if etag in etags or '*' in etags:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response['ETag'] = etag
+                return etag, response
+        return etag, None
+
+    def add_etag(self, response, etag):
+        if etag is not None and response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+            # Let browsers keep the response but revalidate it on every use
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get(self, request, *args, **kwargs):
+        etag, not_modified = self.check_etag(request)
+        if not_modified is not None:
+            return not_modified
+        return self.add_etag(super().get(request, *args, **kwargs), etag)
@@ -0,0 +1,462 @@
+import datetime
+import io
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from accounts.models import User
+from accounts.revocation import revocation_filter
+from accounts.tokens import ClaimsRefreshToken
+from companies.models import Company, CompanyStats, Department, TenantShard
+from companies.sharding import place_company, shard_map
+from companies.tenancy import TenantCache, get_user_company
+from core.db.routers import use_shard
+from core.tests.factories import PASSWORD, TenantTestCase, TenantTestMixin, create_tenant
+from employees.models import Employee, EmployeeSearchToken, ExportJob
+
+ADMIN_USERS_URL = '/companies/api/admin-users/'
+DEPARTMENTS_URL = '/companies/api/departments/'
+DASHBOARD_URL = '/companies/api/dashboard/'
+
+
+class TenantCacheTests(SimpleTestCase):
+    def company(self, pk):
+        return SimpleNamespace(pk=pk)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        tenant_cache = TenantCache(maxsize=2, ttl=30)
+        tenant_cache.set('a', self.company(1))
+        tenant_cache.set('b', self.company(2))
+        tenant_cache.get('a')
+        tenant_cache.set('c', self.company(3))
+        self.assertEqual(tenant_cache.get('a').pk, 1)
+        self.assertIs(tenant_cache.get('b'), tenant_cache.get('missing'))
+        self.assertEqual(tenant_cache.get('c').pk, 3)
+
+    def test_entries_expire(self):
+        tenant_cache = TenantCache(maxsize=2, ttl=30)
+        with mock.patch('companies.tenancy.time.monotonic', return_value=100):
+            tenant_cache.set('a', self.company(1))
+        with mock.patch('companies.tenancy.time.monotonic', return_value=129):
+            self.assertEqual(tenant_cache.get('a').pk, 1)
+        with mock.patch('companies.tenancy.time.monotonic', return_value=131):
+            self.assertIs(tenant_cache.get('a'), tenant_cache.get('missing'))
+
+    def test_invalidation(self):
+        tenant_cache = TenantCache(maxsize=10, ttl=30)
+        missing = tenant_cache.get('missing')
+        tenant_cache.set(('u1', 'c1', 0), self.company('c1'))
+        tenant_cache.set(('u1', 'c1', 1), self.company('c1'))
+        tenant_cache.set(('u2', 'c1', 0), self.company('c1'))
+        tenant_cache.set(('u3', 'c2', 0), self.company('c2'))
+        tenant_cache.set(('u4', None, 0), None)
+
+        tenant_cache.invalidate_user('u1')
+        self.assertIs(tenant_cache.get(('u1', 'c1', 0)), missing)
+        self.assertIs(tenant_cache.get(('u1', 'c1', 1)), missing)
+        self.assertEqual(tenant_cache.get(('u2', 'c1', 0)).pk, 'c1')
+
+        tenant_cache.invalidate_company('c1')
+        self.assertIs(tenant_cache.get(('u2', 'c1', 0)), missing)
+        self.assertEqual(tenant_cache.get(('u3', 'c2', 0)).pk, 'c2')
+        self.assertIsNone(tenant_cache.get(('u4', None, 0)))
+
+
+class TenantResolutionTests(TenantTestCase):
+    prefix = 'tenancy'
+    sizes = {'employees': 1, 'departments': 1, 'admins': 1}
+
+    def test_cache_misses_after_a_move_in_another_process(self):
+        admin = User.objects.get(pk=self.tenant.admin.pk)
+        self.assertEqual(get_user_company(admin).pk, self.tenant.company.pk)
+        # Another worker moves the admin; this process sees no signal
+        User.objects.filter(pk=admin.pk).update(company=self.other.company, token_version=admin.token_version + 1)
+        moved = User.objects.get(pk=admin.pk)
+        self.assertEqual(get_user_company(moved).pk, self.other.company.pk)
+
+    def test_owner_without_company_sees_no_orphaned_admins(self):
+        owner = User.objects.create_user(email='owner@nocompany.example', password=PASSWORD, role=User.UserRole.PARENT)
+        orphan = User.objects.create_user(email='orphan@nocompany.example', password=PASSWORD, role=User.UserRole.ADMIN)
+        client = self.client_for(owner)
+
+        response = client.get(ADMIN_USERS_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+        self.assertEqual(client.get(f'{ADMIN_USERS_URL}{orphan.id}/').status_code, 404)
+        self.assertEqual(client.delete(f'{ADMIN_USERS_URL}{orphan.id}/').status_code, 404)
+        response = client.post(ADMIN_USERS_URL, {
+            'email': 'new@nocompany.example', 'password': PASSWORD, 'first_name': 'New', 'last_name': 'Admin',
+            'company_id': str(self.tenant.company.id),
+        }, format='json')
+        self.assertEqual(response.status_code, 403, response.content)
+        self.assertTrue(User.objects.filter(pk=orphan.pk).exists())
+        self.assertFalse(User.objects.filter(email='new@nocompany.example').exists())
+
+
+@override_settings(TENANT_SHARDS=['default', 'shard1'], TENANT_SHARD_CACHE_TTL=0)
+class TenantShardingTests(TenantTestMixin, TestCase):
+    databases = {'default', 'shard1'}
+
+    def setUp(self):
+        super().setUp()
+        shard_map.invalidate()
+
+    def create_tenant_on(self, shard, prefix):
+        with use_shard(shard):
+            tenant = create_tenant(prefix, employees=2, departments=2, admins=1)
+        place_company(tenant.company.id, shard=shard)
+        return tenant
+
+    def test_tenant_rows_stay_on_their_shard(self):
+        tenant = self.create_tenant_on('shard1', 'sharded')
+        for model in (User, Company, CompanyStats, Department, Employee):
+            self.assertFalse(model.objects.using('default').exists(), model.__name__)
+        self.assertEqual(Employee.objects.using('shard1').count(), 2)
+        self.assertEqual(CompanyStats.objects.using('shard1').get(company=tenant.company).employees_count, 2)
+        self.assertEqual(Department.objects.for_company(tenant.company).count(), 2)
+
+    def test_registration_creates_tenant_on_one_shard(self):
+        response = APIClient().post(reverse('accounts:api_register'), {
+            'email': 'founder@new.example', 'password': PASSWORD, 'confirm_password': PASSWORD,
+            'company_name': 'New Ltd', 'registration_number': 'NEW',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+        owner = User.objects.filter(email='founder@new.example')
+        shards = [alias for alias in ('default', 'shard1') if owner.using(alias).exists()]
+        self.assertEqual(len(shards), 1)
+        company = Company.objects.using(shards[0]).get(owner__email='founder@new.example')
+        self.assertEqual(shard_map.shard_for(company.id), shards[0])
+
+    def test_email_must_be_unique_across_shards(self):
+        tenant = self.create_tenant_on('shard1', 'sharded')
+        with self.assertRaises(ValueError):
+            User.objects.create_user(email=tenant.admin.email, password=PASSWORD)
+
+    def test_requests_use_the_tenant_shard(self):
+        tenant = self.create_tenant_on('shard1', 'sharded')
+        client = self.client_for(tenant.admin)
+
+        response = client.get(DEPARTMENTS_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+
+        response = client.post(DEPARTMENTS_URL, {'name': 'Added'}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertTrue(Department.objects.using('shard1').filter(name='Added').exists())
+        self.assertFalse(Department.objects.using('default').exists())
+        self.assertEqual(CompanyStats.objects.using('shard1').get(company=tenant.company).departments_count, 3)
+
+        response = client.get('/employees/api/employees/search/', {'q': tenant.employee.user.email})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual([row['id'] for row in response.json()['results']], [str(tenant.employee.id)])
+        self.assertFalse(EmployeeSearchToken.objects.using('default').exists())
+
+    def test_login_finds_user_on_shard(self):
+        tenant = self.create_tenant_on('shard1', 'sharded')
+        response = APIClient().post(
+            reverse('accounts:token_obtain_pair'), {'email': tenant.admin.email, 'password': PASSWORD}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertTrue(OutstandingToken.objects.using('shard1').filter(user_id=tenant.admin.pk).exists())
+
+        response = APIClient().post(reverse('accounts:token_refresh'), {'refresh': response.json()['refresh']}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_writes_refused_while_tenant_moves(self):
+        tenant = self.create_tenant_on('shard1', 'sharded')
+        TenantShard.objects.filter(company_id=tenant.company.id).update(moving=True)
+        client = self.client_for(tenant.admin)
+
+        self.assertEqual(client.get(DEPARTMENTS_URL).status_code, 200)
+        response = client.post(DEPARTMENTS_URL, {'name': 'Added'}, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(Department.objects.using('shard1').filter(name='Added').exists())
+
+    def test_move_tenant(self):
+        tenant = create_tenant('moving', employees=3, departments=2, admins=1)
+        refresh = ClaimsRefreshToken.for_user(tenant.admin)
+        revoked = ClaimsRefreshToken.for_user(tenant.admin)
+        revoked.blacklist()
+        job = ExportJob.objects.create(company=tenant.company, requested_by=tenant.admin, status=ExportJob.Status.DONE)
+        tokens = EmployeeSearchToken.objects.count()
+
+        call_command('move_tenant', str(tenant.company.id), 'shard1', stdout=io.StringIO())
+
+        self.assertEqual(shard_map.shard_for(tenant.company.id), 'shard1')
+        for model, count in (
+            (User, 5), (Company, 1), (Department, 2), (Employee, 3), (ExportJob, 1), (OutstandingToken, 2),
+            (EmployeeSearchToken, tokens),
+        ):
+            self.assertEqual(model.objects.using('shard1').count(), count, model.__name__)
+            self.assertFalse(model.objects.using('default').exists(), model.__name__)
+        stats = CompanyStats.objects.using('shard1').get(company=tenant.company)
+        self.assertEqual((stats.departments_count, stats.employees_count, stats.admin_count), (2, 3, 1))
+
+        response = self.client_for(tenant.admin).get(DEPARTMENTS_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+        response = self.client_for(tenant.admin).get(f'/employees/api/exports/{job.pk}/')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['status'], 'done')
+        # Tokens issued before the move keep working, and revoked ones stay revoked
+        revocation_filter.reset()
+        response = APIClient().post(reverse('accounts:token_refresh'), {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        response = APIClient().post(reverse('accounts:token_refresh'), {'refresh': str(revoked)}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class ConditionalGetTests(TenantTestCase):
+    prefix = 'etag'
+    sizes = {'employees': 2, 'departments': 2, 'admins': 1}
+
+    def profile_url(self, company):
+        return f'/companies/api/profile/{company.id}/'
+
+    def assertNotModified(self, client, url):
+        etag = client.get(url)['ETag']
+        # Only the data version is read: no list query, no serializer
+        with self.assertNumQueries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        return etag
+
+    def test_unchanged_resources_are_not_modified(self):
+        client = self.client_for(self.tenant.owner)
+        for url in (DEPARTMENTS_URL, ADMIN_USERS_URL, self.profile_url(self.tenant.company)):
+            with self.subTest(url=url):
+                self.assertNotModified(client, url)
+
+    def test_weak_and_wildcard_validators_match(self):
+        client = self.client_for(self.tenant.admin)
+        etag = client.get(DEPARTMENTS_URL)['ETag']
+        self.assertEqual(client.get(DEPARTMENTS_URL, HTTP_IF_NONE_MATCH=f'W/{etag}').status_code, 304)
+        self.assertEqual(client.get(DEPARTMENTS_URL, HTTP_IF_NONE_MATCH='*').status_code, 304)
+
+    def test_writes_change_the_etag(self):
+        owner = self.client_for(self.tenant.owner)
+        writes = [
+            lambda: Department.objects.create(company=self.tenant.company, name='New'),
+            lambda: Department.objects.filter(pk=self.tenant.departments[0].pk).get().save(),
+            lambda: self.tenant.employee.save(),
+            lambda: self.tenant.employee.user.save(),
+            lambda: self.tenant.company.save(),
+            lambda: self.tenant.employees[1].delete(),
+        ]
+        for write in writes:
+            etag = owner.get(DEPARTMENTS_URL)['ETag']
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+            response = owner.get(DEPARTMENTS_URL, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+
+    def test_version_is_bumped_once_after_commit(self):
+        company_id = self.tenant.company.id
+        version = CompanyStats.get_data_version(company_id)
+        employee = self.tenant.employees[0]
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                employee.role = 'Lead'
+                employee.save()
+                employee.user.first_name = 'Renamed'
+                employee.user.save()
+                department = self.tenant.departments[0]
+                department.description = 'Updated'
+                department.save()
+                # Nothing in the transaction touches the company's stats row
+                self.assertFalse([query for query in queries if 'companies_companystats' in query['sql']])
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(len([query for query in queries if 'companies_companystats' in query['sql']]), 1)
+        self.assertEqual(CompanyStats.get_data_version(company_id), version + 1)
+
+    def test_rolled_back_writes_keep_the_version(self):
+        company_id = self.tenant.company.id
+        version = CompanyStats.get_data_version(company_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.tenant.employee.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            # A later write in the same test transaction still gets its own bump
+            self.tenant.employees[1].save()
+        self.assertEqual(CompanyStats.get_data_version(company_id), version + 1)
+
+    def test_other_tenants_writes_keep_the_etag(self):
+        client = self.client_for(self.tenant.owner)
+        etag = client.get(DEPARTMENTS_URL)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(company=self.other.company, name='Elsewhere')
+        self.assertEqual(client.get(DEPARTMENTS_URL, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_logins_keep_the_etag(self):
+        version = CompanyStats.get_data_version(self.tenant.company.id)
+        self.assertTrue(self.client.login(email=self.tenant.admin.email, password=PASSWORD))
+        self.assertEqual(CompanyStats.get_data_version(self.tenant.company.id), version)
+
+    def test_etags_differ_per_user(self):
+        owner_etag = self.client_for(self.tenant.owner).get(DEPARTMENTS_URL)['ETag']
+        admin = self.client_for(self.tenant.admin)
+        self.assertEqual(admin.get(DEPARTMENTS_URL, HTTP_IF_NONE_MATCH=owner_etag).status_code, 200)
+
+    def test_other_companies_profile_is_never_not_modified(self):
+        client = self.client_for(self.tenant.owner)
+        etag = client.get(self.profile_url(self.tenant.company))['ETag']
+        response = client.get(self.profile_url(self.other.company), HTTP_IF_NONE_MATCH=etag)
+        self.assertNotEqual(response.status_code, 304)
+        self.assertNotIn('ETag', response)
+
+
+class DashboardTests(TenantTestCase):
+    prefix = 'dash'
+    sizes = {'employees': 4, 'departments': 2, 'admins': 2}
+
+    def stats(self, tenant=None):
+        return CompanyStats.objects.get(company=(tenant or self.tenant).company)
+
+    def assertMatchesRebuild(self, tenant=None):
+        """The incrementally maintained row must equal one recomputed from scratch."""
+        company_id = (tenant or self.tenant).company.id
+        stats = CompanyStats.objects.get(company_id=company_id)
+        rebuilt = CompanyStats.rebuild([company_id])[0]
+        for field in (*CompanyStats.COUNTER_FIELDS, *CompanyStats.BREAKDOWN_FIELDS):
+            self.assertEqual(getattr(stats, field), getattr(rebuilt, field), field)
+
+    def test_summary(self):
+        department = self.tenant.departments[0]
+        employee = self.tenant.employees[1]
+        employee.is_active = False
+        employee.department = None
+        employee.joining_date = datetime.date(2024, 3, 15)
+        employee.save()
+
+        response = self.client_for(self.tenant.owner).get(DASHBOARD_URL)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        this_month = datetime.date.today().strftime('%Y-%m')
+        self.assertEqual(data['company'], str(self.tenant.company.id))
+        self.assertEqual(data['employees_count'], 4)
+        self.assertEqual(data['active_employees_count'], 3)
+        self.assertEqual(data['inactive_employees_count'], 1)
+        self.assertEqual(data['unassigned_employees_count'], 1)
+        self.assertEqual(data['departments_count'], 2)
+        self.assertEqual(data['admin_count'], 2)
+        self.assertEqual(data['departments'], [
+            {'id': str(department.id), 'name': department.name, 'headcount': 2},
+            {'id': str(self.tenant.departments[1].id), 'name': self.tenant.departments[1].name, 'headcount': 1},
+        ])
+        self.assertEqual(data['joiners_by_month'], [
+            {'month': '2024-03', 'count': 1}, {'month': this_month, 'count': 3},
+        ])
+        self.assertMatchesRebuild()
+
+    def test_one_lookup_serves_etag_and_body(self):
+        client = self.client_for(self.tenant.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(DASHBOARD_URL)
+        self.assertEqual(response.status_code, 200)
+        stats_reads = [query for query in queries if 'companies_companystats' in query['sql']]
+        self.assertEqual(len(stats_reads), 1, stats_reads)
+
+        self.assertEqual(client.get(DASHBOARD_URL, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(company=self.tenant.company, name='New')
+        response = client.get(DASHBOARD_URL, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('New', [department['name'] for department in response.json()['departments']])
+
+    def test_permissions(self):
+        self.assertEqual(APIClient().get(DASHBOARD_URL).status_code, 401)
+        response = self.client_for(self.tenant.employee.user).get(DASHBOARD_URL)
+        self.assertEqual(response.status_code, 403)
+        # Each company sees its own numbers
+        response = self.client_for(self.other.owner).get(DASHBOARD_URL)
+        self.assertEqual(response.json()['company'], str(self.other.company.id))
+        self.assertEqual(response.json()['employees_count'], 1)
+
+    def test_missing_row_is_rebuilt(self):
+        CompanyStats.objects.filter(company=self.tenant.company).delete()
+        response = self.client_for(self.tenant.owner).get(DASHBOARD_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['employees_count'], 4)
+        self.assertEqual(len(response.json()['departments']), 2)
+
+    def test_writes_keep_the_breakdowns_current(self):
+        first, second = self.tenant.departments
+        Department.objects.filter(pk=first.pk).get().save()  # unchanged
+        first.name = 'Renamed'
+        first.save()
+        self.assertEqual(self.stats().department_headcounts[str(first.id)]['name'], 'Renamed')
+
+        user = User.objects.create_user(email='late@dash.example', password=PASSWORD, company=self.tenant.company)
+        hired = Employee.objects.create(
+            user=user, company=self.tenant.company, department=second, role='Analyst',
+            joining_date=datetime.date(2023, 12, 1),
+        )
+        self.assertMatchesRebuild()
+
+        # Moved, deactivated and back-dated through a freshly loaded instance
+        employee = Employee.objects.get(pk=self.tenant.employee.pk)
+        employee.department = second
+        employee.is_active = False
+        employee.joining_date = datetime.date(2020, 1, 31)
+        employee.save()
+        self.assertMatchesRebuild()
+        self.assertEqual(self.stats().inactive_employees_count, 1)
+
+        # Deferred columns cannot be compared, so the counts are left alone
+        Employee.objects.only('id', 'role').get(pk=hired.pk).save()
+        self.assertMatchesRebuild()
+
+        hired.delete()
+        self.assertMatchesRebuild()
+
+        # Employees of a deleted department become unassigned
+        second.delete()
+        stats = self.stats()
+        self.assertNotIn(str(second.id), stats.department_headcounts)
+        self.assertEqual(stats.unassigned_employees_count, 3)
+        self.assertMatchesRebuild()
+        self.assertMatchesRebuild(self.other)
+
+    def test_writes_update_the_row_without_reading_it(self):
+        employee = Employee.objects.get(pk=self.tenant.employee.pk)
+        employee.department = self.tenant.departments[1]
+        employee.joining_date = datetime.date(2021, 5, 1)
+        with CaptureQueriesContext(connection) as queries:
+            employee.save()
+            self.tenant.departments[0].delete()
+        stats_queries = [query['sql'] for query in queries if 'companies_companystats' in query['sql']]
+        self.assertEqual(len(stats_queries), 2, stats_queries)
+        self.assertTrue(all(sql.startswith('UPDATE') for sql in stats_queries), stats_queries)
+        self.assertMatchesRebuild()
+
+    def test_import_updates_the_breakdowns(self):
+        department = self.tenant.departments[0]
+        upload = SimpleUploadedFile('employees.csv', (
+            'email,first_name,last_name,password,role,department,joining_date\n'
+            f'a@imp.example,Imported,A,{PASSWORD},Analyst,{department.name},2022-06-01\n'
+            f'b@imp.example,Imported,B,{PASSWORD},Analyst,,2022-06-30\n'
+        ).encode())
+        response = self.client_for(self.tenant.admin).post(
+            '/employees/api/employees/import/', {'file': upload}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['created'], 2)
+        stats = self.stats()
+        self.assertEqual(stats.employees_count, 6)
+        self.assertEqual(stats.joiners_by_month['2022-06'], 2)
+        self.assertEqual(stats.department_headcounts[str(department.id)]['headcount'], 3)
+        self.assertMatchesRebuild()
@@ -8,6 +8,7 @@ urlpatterns = [
     # API endpoints for companies
     path('api/register/', views.CompanyRegistrationView.as_view(), name='api_company_register'),
     path('api/profile/<uuid:id>/', views.CompanyDetailView.as_view(), name='api_company_profile'),
+    path('api/dashboard/', views.CompanyDashboardView.as_view(), name='api_company_dashboard'),
     
     # API endpoints for departments
     path('api/departments/', views.DepartmentListCreateView.as_view(), name='api_department_list_create'),
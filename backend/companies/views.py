@@ -1,12 +1,23 @@
+import uuid
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
+from django.db import DEFAULT_DB_ALIAS
 from django.db.models import Count
-from .models import Company, Department
+from .models import Company, CompanyStats, Department
+from .filters import AdminUserFilter, DepartmentFilter
 from .forms import CompanyRegistrationForm, AdminUserCreationForm, DepartmentForm
+from .sharding import place_company
+from .tenancy import TenantETagMixin, TenantMixin
+from core.async_views import AsyncListMixin, AsyncRetrieveMixin
+from core.db.routers import current_shard
+from core.fieldsets import SparseFieldsViewMixin
+from core.pagination import KeysetPagination
 from accounts.models import User
-from employees.models import Employee
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
@@ -14,9 +25,12 @@ from rest_framework.exceptions import PermissionDenied, NotFound
 from .serializers import (
     CompanySerializer,
     CompanyRegistrationSerializer,
+    DashboardSerializer,
     DepartmentSerializer,
     AdminUserCreateSerializer,
-    AdminUserSerializer
+    AdminUserSerializer,
+    AdminUserValuesSerializer,
+    DepartmentValuesSerializer,
 )
 
 def register_company(request):
@@ -42,11 +56,12 @@ def company_dashboard(request):
         messages.info(request, _('Please register your company first.'))
         return redirect('companies:register')
 
+    stats = CompanyStats.get_for(company.pk)
     context = {
         'company': company,
-        'admin_count': User.objects.filter(role=User.UserRole.ADMIN, company=company).count(),
-        'employee_count': Employee.objects.filter(company=company).count(),
-        'department_count': Department.objects.filter(company=company).count(),
+        'admin_count': stats.admin_count,
+        'employee_count': stats.employees_count,
+        'department_count': stats.departments_count,
     }
     return render(request, 'companies/dashboard.html', context)
 
@@ -62,11 +77,12 @@ def admin_dashboard(request):
         messages.error(request, _('Company not found or linked.'))
         return redirect('home')
 
+    stats = CompanyStats.get_for(company.pk)
     context = {
         'company': company,
-        'employee_count': Employee.objects.filter(company=company).count(),
-        'department_count': Department.objects.filter(company=company).count(),
-        'admin_count': User.objects.filter(role=User.UserRole.ADMIN, company=company).count(),
+        'employee_count': stats.employees_count,
+        'department_count': stats.departments_count,
+        'admin_count': stats.admin_count,
         # Add other admin-specific context here
     }
     return render(request, 'companies/admin_dashboard.html', context)
@@ -249,22 +265,34 @@ class CompanyRegistrationView(generics.CreateAPIView):
     serializer_class = CompanyRegistrationSerializer
 
     def perform_create(self, serializer):
-        # The owner is the current authenticated user who is registering the company
-        serializer.save(owner=self.request.user)
-
-class CompanyDetailView(generics.RetrieveUpdateAPIView):
-    queryset = Company.objects.all()
+        # The owner is the current authenticated user who is registering the company.
+        # The company lives on the owner's shard, which authentication activated.
+        company_id = uuid.uuid4()
+        place_company(company_id, shard=current_shard() or DEFAULT_DB_ALIAS)
+        serializer.save(owner=self.request.user, id=company_id)
+
+class CompanyDetailView(TenantETagMixin, generics.RetrieveUpdateAPIView):
+    # The denormalized counters are joined so a profile read is one query.
+    queryset = Company.objects.select_related('stats')
     serializer_class = CompanySerializer
     permission_classes = [IsAuthenticated]
     lookup_field = 'id'
+    replica_reads = True  # see core/db/routers.py
 
     def get_queryset(self):
         # Ensure users can only access their own company's details
-        if self.request.user.is_parent:
-            return Company.objects.filter(owner=self.request.user)
-        elif self.request.user.is_admin or self.request.user.is_employee:
-            return Company.objects.filter(id=self.request.user.company.id)
-        return Company.objects.none()
+        queryset = super().get_queryset()
+        company = self.get_company()
+        if company is None:
+            return queryset.none()
+        return queryset.filter(id=company.id)
+
+    def get_etag(self, request):
+        # Other companies' profiles are not found, never "not modified"
+        company = self.get_company()
+        if company is None or str(company.pk) != str(self.kwargs[self.lookup_field]):
+            return None
+        return super().get_etag(request)
 
     def get_object(self):
         try:
@@ -272,13 +300,20 @@ class CompanyDetailView(generics.RetrieveUpdateAPIView):
         except NotFound:
             raise NotFound("Company not found or you don't have permission to access it.")
 
+    def set_counts(self, instance, stats):
+        # Add counts for related objects from the denormalized counters
+        instance.departments_count = stats.departments_count
+        instance.employees_count = stats.employees_count
+        instance.admin_count = stats.admin_count
+
     def retrieve(self, request, *args, **kwargs):
         try:
             instance = self.get_object()
-            # Add counts for related objects
-            instance.departments_count = Department.objects.filter(company=instance).count()
-            instance.employees_count = Employee.objects.filter(company=instance).count()
-            instance.admin_count = User.objects.filter(company=instance, role=User.UserRole.ADMIN).count()
+            try:
+                stats = instance.stats
+            except CompanyStats.DoesNotExist:
+                stats = CompanyStats.rebuild([instance.id])[0]
+            self.set_counts(instance, stats)
             serializer = self.get_serializer(instance)
             return Response(serializer.data)
         except Exception as e:
@@ -303,66 +338,135 @@ class CompanyDetailView(generics.RetrieveUpdateAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-class DepartmentListCreateView(generics.ListCreateAPIView):
+class CompanyDetailAsyncView(AsyncRetrieveMixin, CompanyDetailView):
+    """``CompanyDetailView`` with an async GET, for ASGI (see core/async_views.py)."""
+
+    async def aget(self, request, *args, **kwargs):
+        # Same as retrieve(), error handling included
+        try:
+            instance = await self.aget_object()
+            try:
+                stats = instance.stats
+            except CompanyStats.DoesNotExist:
+                stats = (await sync_to_async(CompanyStats.rebuild)([instance.id]))[0]
+            self.set_counts(instance, stats)
+            serializer = self.get_serializer(instance)
+            return Response(serializer.data)
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class CompanyDashboardView(TenantETagMixin, generics.RetrieveAPIView):
+    """Headcount, active/inactive split, headcount by department, joiners per
+    month and admin count of the user's company.
+
+    All of it comes from the company's CompanyStats row, which the signal
+    handlers keep current on every write; one primary-key lookup serves both
+    the ETag and the response.
+    """
+    serializer_class = DashboardSerializer
+    permission_classes = [IsAuthenticated]
+    replica_reads = True  # see core/db/routers.py
+
+    def get_object(self):
+        user = self.request.user
+        if not (user.is_parent or user.is_admin):
+            raise PermissionDenied("Only company owners and admin users can view the dashboard.")
+        company = self.get_company()
+        if company is None:
+            raise NotFound("Company not found.")
+        if not hasattr(self, '_stats'):
+            self._stats = CompanyStats.get_for(company.pk)
+        return self._stats
+
+    def get_data_version(self, company):
+        return self.get_object().data_version
+
+class DepartmentListCreateView(SparseFieldsViewMixin, TenantETagMixin, generics.ListCreateAPIView):
+    # DepartmentSerializer reads company.name for every row; joining the
+    # company keeps the list at a constant number of queries.
+    queryset = Department.objects.select_related('company')
     serializer_class = DepartmentSerializer
     permission_classes = [IsAuthenticated]
+    replica_reads = True  # see core/db/routers.py
+    values_list = True  # see core/serializers.py
+    # Keyset pages in name order (see core/filters.py, core/pagination.py)
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = DepartmentFilter
+    pagination_class = KeysetPagination
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET' and self.values_list:
+            return DepartmentValuesSerializer
+        return DepartmentSerializer
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_parent:
-            return Department.objects.filter(company__owner=user)
-        elif user.is_admin:
-            return Department.objects.filter(company=user.company)
-        return Department.objects.none()
+        queryset = super().get_queryset()
+        if user.is_parent or user.is_admin:
+            return queryset.filter(company=self.get_company())
+        return queryset.none()
 
     def perform_create(self, serializer):
         user = self.request.user
-        if user.is_parent:
-            company = Company.objects.get(owner=user)
-        elif user.is_admin:
-            company = user.company
-        else:
-            raise generics.exceptions.PermissionDenied("You do not have permission to add departments.")
-        serializer.save(company=company)
+        if not (user.is_parent or user.is_admin):
+            raise PermissionDenied("You do not have permission to add departments.")
+        serializer.save(company=self.get_company())
+
+class DepartmentListAsyncView(AsyncListMixin, DepartmentListCreateView):
+    """``DepartmentListCreateView`` with an async GET, for ASGI (see core/async_views.py)."""
 
-class DepartmentDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Department.objects.all()
+class DepartmentDetailView(TenantMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Department.objects.select_related('company')
     serializer_class = DepartmentSerializer
     permission_classes = [IsAuthenticated]
     lookup_field = 'id'
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_parent:
-            return Department.objects.filter(company__owner=user)
-        elif user.is_admin:
-            return Department.objects.filter(company=user.company)
-        return Department.objects.none()
-
-class AdminUserListCreateView(generics.ListCreateAPIView):
+        queryset = super().get_queryset()
+        if user.is_parent or user.is_admin:
+            return queryset.filter(company=self.get_company())
+        return queryset.none()
+
+class AdminUserListCreateView(SparseFieldsViewMixin, TenantETagMixin, generics.ListCreateAPIView):
+    # AdminUserSerializer only reads columns of the User row itself, so the
+    # list is a single SELECT however many admins the company has. Keep it
+    # that way: any relation added to the serializer must be joined here.
     serializer_class = AdminUserSerializer
     permission_classes = [IsAuthenticated]
+    values_list = True  # see core/serializers.py
+    # Keyset pages in date_joined order (see core/filters.py, core/pagination.py)
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = AdminUserFilter
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return AdminUserCreateSerializer
+        if self.values_list:
+            return AdminUserValuesSerializer
         return AdminUserSerializer
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_parent:
-            return User.objects.filter(company__owner=user, role=User.UserRole.ADMIN)
+        company = self.get_company()
+        # Without a company the filter would match every company-less admin
+        if user.is_parent and company is not None:
+            return User.objects.filter(company=company, role=User.UserRole.ADMIN)
         return User.objects.none()
 
     def perform_create(self, serializer):
         user = self.request.user
-        if user.is_parent:
-            company = Company.objects.get(owner=user)
+        company = self.get_company()
+        if user.is_parent and company is not None:
             serializer.save(company=company) # Pass company to the serializer's create method
         else:
-            raise generics.exceptions.PermissionDenied("Only company owners can create admin users.")
+            raise PermissionDenied("Only company owners can create admin users.")
 
-class AdminUserDetailView(generics.RetrieveDestroyAPIView):
+class AdminUserDetailView(TenantMixin, generics.RetrieveDestroyAPIView):
     queryset = User.objects.all()
     serializer_class = AdminUserSerializer
     permission_classes = [IsAuthenticated]
@@ -370,11 +474,13 @@ class AdminUserDetailView(generics.RetrieveDestroyAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_parent:
-            return User.objects.filter(company__owner=user, role=User.UserRole.ADMIN)
+        company = self.get_company()
+        # Without a company the filter would match every company-less admin
+        if user.is_parent and company is not None:
+            return User.objects.filter(company=company, role=User.UserRole.ADMIN)
         return User.objects.none()
 
     def perform_destroy(self, instance):
         if not self.request.user.is_parent or instance.role != User.UserRole.ADMIN:
-            raise generics.exceptions.PermissionDenied("You do not have permission to delete this admin user.")
+            raise PermissionDenied("You do not have permission to delete this admin user.")
         instance.delete() 
\ No newline at end of file
@@ -2,6 +2,9 @@
 ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests are resolved against ``ASGI_URLCONF``, which serves the read
+endpoints with async views (see core/async_views.py). Run it with an ASGI
+server, e.g. ``uvicorn core.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -9,8 +12,28 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
+
+class AsyncURLConfASGIHandler(ASGIHandler):
+    """ASGI handler resolving requests against ``ASGI_URLCONF`` instead of ``ROOT_URLCONF``."""
+
+    async def get_response_async(self, request):
+        request.urlconf = getattr(settings, 'ASGI_URLCONF', settings.ROOT_URLCONF)
+        return await super().get_response_async(request)
+
+
+def get_asgi_application():
+    # As django.core.asgi.get_asgi_application()
+    django.setup(set_prefix=False)
+    # Each worker starts with the JWT blacklist filter loaded
+    from accounts.revocation import revocation_filter
+    revocation_filter.preload()
+    return AsyncURLConfASGIHandler()
+
+
 application = get_asgi_application()
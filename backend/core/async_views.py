@@ -0,0 +1,155 @@
+"""Async versions of read-only API views, served under ASGI.
+
+DRF views are synchronous. Under an ASGI server, Django runs each one in a
+worker thread, which stays blocked while the view waits for the database.
+The mixins here add an async GET to an existing DRF view class:
+
+    class EmployeeListAsyncView(AsyncListMixin, EmployeeListCreateView):
+        pass
+
+The async class inherits everything else from the sync view: authentication,
+permissions, throttling, ``get_queryset``, serializers, ``replica_reads`` and
+ETags. A GET runs in three steps:
+
+1. Authentication, permission checks, the ETag check and building the
+   queryset and serializer all run in one ``sync_to_async`` call. These steps
+   use caches and the sync ORM.
+2. Rows are fetched with the async ORM: ``aget``, ``async for``, or
+   ``ValuesListSerializer.ato_representation``. Paginated lists fetch the
+   page that ``KeysetPagination.get_page_queryset`` selects.
+3. Errors go through the view's ``handle_exception``. The response is
+   rendered in the event loop and returned as a plain ``HttpResponse``, which
+   saves Django another thread switch to render it.
+
+Any other method (POST, PATCH, DELETE, OPTIONS) is passed to the sync view.
+Object permissions and serializers must not run queries of their own: the
+queryset must join everything that the serializer reads.
+
+The async views are mounted by ``core.urls_async``. ``core.asgi`` uses that
+URLconf, while ``core.wsgi`` keeps the sync views.
+"""
+import abc
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.http import Http404, HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+
+SAFE_READS = ('GET', 'HEAD')
+
+
+class AsyncReadMixin(abc.ABC):
+    """Serve GET and HEAD of a DRF view with an async handler; see the module docstring.
+
+    Subclasses implement ``aget``.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        sync_view = sync_to_async(super().as_view(**initkwargs))
+
+        async def view(request, *args, **kwargs):
+            if request.method not in SAFE_READS:
+                return await sync_view(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            return await self.adispatch(request, *args, **kwargs)
+
+        # ReplicaRoutingMiddleware reads replica_reads from the class
+        view.cls = cls
+        view.initkwargs = initkwargs
+        # As for APIView: session-authenticated requests are checked by DRF
+        return csrf_exempt(view)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """The async counterpart of ``APIView.dispatch`` for reads."""
+        self.setup(request, *args, **kwargs)
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        etag = None
+        try:
+            etag, response = await sync_to_async(self.initial_read)(request, *args, **kwargs)
+            if response is None:
+                response = await self.aget(request, *args, **kwargs)
+                if etag is not None:
+                    response = self.add_etag(response, etag)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        response = self.finalize_response(request, response, *args, **kwargs)
+        return self.rendered(response)
+
+    def initial_read(self, request, *args, **kwargs):
+        """Run everything before the row fetch; returns ``(etag, response)`` like ``check_etag``."""
+        self.initial(request, *args, **kwargs)
+        etag, response = self.check_etag(request) if hasattr(self, 'check_etag') else (None, None)
+        if response is None:
+            self.prepare_read()
+        return etag, response
+
+    def prepare_read(self):
+        """Build whatever ``aget`` needs that takes sync queries, e.g. the tenant's queryset."""
+
+    @abc.abstractmethod
+    async def aget(self, request, *args, **kwargs):
+        """Fetch the rows with the async ORM and return a DRF ``Response``."""
+
+    @staticmethod
+    def rendered(response):
+        response.render()
+        plain = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            plain[header] = value
+        return plain
+
+
+class AsyncListMixin(AsyncReadMixin):
+    """Async GET for list views, unpaginated or paged by ``core.pagination.KeysetPagination``."""
+
+    def prepare_read(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is not None:
+            assert hasattr(self.paginator, 'get_page_queryset'), (
+                f'{self.__class__.__name__}: async lists are paged with core.pagination.KeysetPagination'
+            )
+            queryset = self.paginator.get_page_queryset(queryset, self.request, view=self)
+        self.read_queryset = queryset
+        self.read_serializer = self.get_serializer(self.read_queryset, many=True)
+
+    async def aget(self, request, *args, **kwargs):
+        if self.paginator is not None:
+            page = self.paginator.paginate_rows([row async for row in self.read_queryset])
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        serializer = self.read_serializer
+        if hasattr(serializer, 'ato_representation'):
+            data = await serializer.ato_representation(self.read_queryset)
+        else:
+            data = serializer.to_representation([instance async for instance in self.read_queryset])
+        return Response(data)
+
+
+class AsyncRetrieveMixin(AsyncReadMixin):
+    """Async GET for detail views looking an object up by ``lookup_field``."""
+
+    def prepare_read(self):
+        self.read_queryset = self.filter_queryset(self.get_queryset())
+
+    async def aget_object(self):
+        """The async counterpart of ``GenericAPIView.get_object``."""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        assert lookup_url_kwarg in self.kwargs, (
+            f'Expected view {self.__class__.__name__} to be called with a URL keyword argument '
+            f'named "{lookup_url_kwarg}".'
+        )
+        queryset = self.read_queryset
+        try:
+            instance = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (ObjectDoesNotExist, TypeError, ValueError, ValidationError):
+            # Same as get_object_or_404
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def aget(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
@@ -0,0 +1,13 @@
+from rest_framework.authentication import BaseAuthentication
+
+
+class BatchAuthentication(BaseAuthentication):
+    """Authenticate a batched sub-request as the user of its batch.
+
+    ``core.batch.BatchView`` sets ``batch_auth`` to the batch's
+    ``(user, token)`` on the requests it builds, and does not pass the token
+    on; any other request is left to the other authentication classes.
+    """
+
+    def authenticate(self, request):
+        return getattr(request, 'batch_auth', None)
@@ -0,0 +1,202 @@
+"""``POST /api/batch/``: several API calls in one HTTP round trip.
+
+The dashboards load a page with several independent calls (profile,
+departments, admin users, employees). Each call pays for its own JWT
+check, middleware and connection checkout. A batch makes them together:
+
+    POST /api/batch/
+    {"requests": [
+        {"method": "GET", "url": "/companies/api/departments/?fields=id,name"},
+        {"method": "PATCH", "url": "/accounts/api/user/", "body": {"phone": "555"}},
+        {"method": "GET", "url": "/employees/api/employees/", "headers": {"If-None-Match": "\\"...\\""}}
+    ]}
+
+The answer holds one ``{"status", "headers", "body"}`` per sub-request, in
+order, and is ``200`` even if some of the sub-requests failed.
+
+- The batch request is authenticated once. Sub-requests run as the same user
+  without repeating the token checks (see core/authentication.py), and
+  reuse the tenant the batch resolved (see companies/tenancy.py).
+- Sub-requests call the views of ``ROOT_URLCONF`` directly, bypassing the
+  middleware. Only DRF API views can be called, and not the batch endpoint
+  itself.
+- Reads (GET, HEAD, OPTIONS) run concurrently on ``BATCH_WORKERS`` threads.
+  Each thread uses its own database connections. A write waits for the reads
+  before it, runs in the request's thread, and is finished before any later
+  sub-request starts. Reads after a write in the same batch use the primary
+  database (see core/db/routers.py). The queries of the worker threads are
+  counted in the batch's ``Server-Timing`` header.
+- Sub-requests are not atomic: one that fails does not undo the others.
+"""
+import contextvars
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import serializers, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from companies.tenancy import get_request_company
+from .db import routers
+from .middleware import RequestTimingMiddleware
+from .renderers import dumps
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Request-specific META keys that each sub-request sets for itself. The
+# batch's token is not passed on: sub-requests use BatchAuthentication.
+_OWN_META = {
+    'REQUEST_METHOD', 'PATH_INFO', 'SCRIPT_NAME', 'QUERY_STRING', 'CONTENT_TYPE', 'CONTENT_LENGTH',
+    'HTTP_AUTHORIZATION', 'HTTP_CONTENT_TYPE', 'HTTP_CONTENT_LENGTH', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MATCH',
+    'HTTP_IF_MODIFIED_SINCE', 'wsgi.input',
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BATCH_WORKERS', 4), thread_name_prefix='batch'
+            )
+        return _executor
+
+
+class BatchItemSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=[*SAFE_METHODS, 'POST', 'PUT', 'PATCH', 'DELETE'], default='GET')
+    url = serializers.CharField()
+    body = serializers.JSONField(required=False)
+    headers = serializers.DictField(child=serializers.CharField(), required=False)
+
+    def validate_method(self, value):
+        return value.upper()
+
+    def validate_url(self, value):
+        url = urlsplit(value)
+        if url.scheme or url.netloc or not url.path.startswith('/'):
+            raise serializers.ValidationError('Must be a path on this server, such as /companies/api/departments/.')
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        limit = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+        if len(value) > limit:
+            raise serializers.ValidationError(f'At most {limit} requests can be batched.')
+        return value
+
+
+def _error(status_code, detail):
+    return {'status': status_code, 'headers': {}, 'body': {'detail': detail}}
+
+
+class BatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Resolved once, here, for every sub-request
+        get_request_company(request)
+
+        items = serializer.validated_data['requests']
+        workers = getattr(settings, 'BATCH_WORKERS', 4)
+        results = [None] * len(items)
+        running = []
+        for index, item in enumerate(items):
+            if item['method'] in SAFE_METHODS and workers:
+                context = contextvars.copy_context()
+                running.append((index, _get_executor().submit(context.run, self.call_in_thread, request, item)))
+                continue
+            for pending, future in running:
+                results[pending] = future.result()
+            running = []
+            results[index] = self.call(request, item)
+        for pending, future in running:
+            results[pending] = future.result()
+        return Response({'responses': results})
+
+    def call_in_thread(self, request, item):
+        timer = getattr(request, 'query_timer', None)
+        try:
+            if timer is None:
+                return self.call(request, item)
+            with RequestTimingMiddleware.timed_connections(timer):
+                return self.call(request, item)
+        finally:
+            # Pool threads have their own connections; do not leave them open
+            connections.close_all()
+
+    def call(self, request, item):
+        """Run one sub-request and return its ``{"status", "headers", "body"}``."""
+        url = urlsplit(item['url'])
+        try:
+            match = resolve(url.path, urlconf=settings.ROOT_URLCONF)
+        except Resolver404:
+            return _error(status.HTTP_404_NOT_FOUND, 'Not found.')
+        view_class = getattr(match.func, 'cls', None)
+        if view_class is None or not issubclass(view_class, APIView):
+            return _error(status.HTTP_400_BAD_REQUEST, 'Only API endpoints can be batched.')
+        if issubclass(view_class, BatchView):
+            return _error(status.HTTP_400_BAD_REQUEST, 'Batches cannot be nested.')
+
+        sub = self.build_request(request, item, url)
+        sub.resolver_match = match
+        token = routers.begin_subrequest(sub)
+        try:
+            if item['method'] in SAFE_METHODS and getattr(view_class, 'replica_reads', False):
+                routers.allow_replica_reads()
+            response = match.func(sub, *match.args, **match.kwargs)
+        except Exception:
+            logger.exception('Batched %s %s failed', item['method'], item['url'])
+            return _error(status.HTTP_500_INTERNAL_SERVER_ERROR, 'Server error.')
+        finally:
+            routers.end_subrequest(token)
+
+        if response.streaming:
+            response.close()
+            return _error(status.HTTP_400_BAD_REQUEST, 'Streaming responses cannot be batched.')
+        if isinstance(response, Response):
+            body = response.data
+        else:
+            body = response.content.decode(response.charset) or None
+        return {'status': response.status_code, 'headers': dict(response.items()), 'body': body}
+
+    def build_request(self, request, item, url):
+        http_request = request._request
+        body = dumps(item['body']) if 'body' in item else b''
+        sub = HttpRequest()
+        sub.method = item['method']
+        sub.path = sub.path_info = url.path
+        sub.META = {key: value for key, value in http_request.META.items() if key not in _OWN_META}
+        sub.META.update(REQUEST_METHOD=sub.method, PATH_INFO=url.path, QUERY_STRING=url.query)
+        if body:
+            sub.META.update(CONTENT_TYPE='application/json', CONTENT_LENGTH=str(len(body)))
+        for name, value in item.get('headers', {}).items():
+            sub.META['HTTP_' + name.upper().replace('-', '_')] = value
+        sub.GET = QueryDict(url.query)
+        sub.COOKIES = http_request.COOKIES
+        sub._stream = io.BytesIO(body)
+        sub._read_started = False
+        if hasattr(http_request, 'session'):
+            sub.session = http_request.session
+        # Authenticate as the batch's user, without checking the token again
+        sub.user = request.user
+        sub.batch_auth = (request.user, request.auth)
+        sub._tenant_company = http_request._tenant_company
+        return sub
@@ -0,0 +1,36 @@
+"""JSON functions for changing a document inside a single UPDATE.
+
+MySQL and SQLite spell these the same way. Paths come from ``json_path()``.
+"""
+from django.db.models import Func, IntegerField, JSONField, Value
+from django.db.models.functions import Cast, Coalesce
+
+
+class JSONSet(Func):
+    """JSON_SET(document, path, value, ...): set each path, creating or replacing it."""
+    function = 'JSON_SET'
+    output_field = JSONField()
+
+
+class JSONInsert(JSONSet):
+    """JSON_INSERT(document, path, value, ...): set each path that does not exist yet."""
+    function = 'JSON_INSERT'
+
+
+class JSONRemove(JSONSet):
+    """JSON_REMOVE(document, path, ...); missing paths are ignored."""
+    function = 'JSON_REMOVE'
+
+
+class JSONExtract(JSONSet):
+    function = 'JSON_EXTRACT'
+
+
+def json_path(*keys):
+    # Keys are quoted so that UUIDs and months, which contain '-', can be used
+    return Value('$' + ''.join(f'."{key}"' for key in keys))
+
+
+def json_count(document, *keys):
+    """The integer at ``keys`` in ``document``, or 0 if it is missing."""
+    return Coalesce(Cast(JSONExtract(document, json_path(*keys)), IntegerField()), 0)
@@ -0,0 +1,69 @@
+"""MySQL backend that draws connections from a per-process pool.
+
+Configure with ``'ENGINE': 'core.db.mysql_pool'`` and an optional ``POOL``
+dict next to ``OPTIONS`` (see ``core.db.pool.DEFAULTS``). Leave
+``CONN_MAX_AGE`` at 0, so Django hands the connection back to the pool at
+the end of every request.
+"""
+from django.db.backends.mysql import base as mysql_base
+
+from ..pool import DEFAULTS, ConnectionPool, PoolTimeout, get_pool
+
+
+def ping(connection):
+    # PyMySQL (installed as MySQLdb) reconnects by default. A reconnected
+    # session would skip init_connection_state and go uncounted, so raise and
+    # let the pool discard the connection instead.
+    connection.ping(False)
+
+
+class DatabaseWrapper(mysql_base.DatabaseWrapper):
+    def _pool(self, conn_params):
+        options = {**DEFAULTS, **self.settings_dict.get('POOL', {})}
+        key = (
+            self.alias, self.settings_dict['NAME'], self.settings_dict['HOST'],
+            self.settings_dict['PORT'], self.settings_dict['USER'],
+        )
+        return get_pool(key, lambda: ConnectionPool(
+            connect=lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+            ping=ping,
+            close=lambda connection: connection.close(),
+            max_size=options['MAX_SIZE'],
+            timeout=options['TIMEOUT'],
+            recycle=options['RECYCLE'],
+            pre_ping=options['PRE_PING'],
+        ))
+
+    def get_new_connection(self, conn_params):
+        pool = self._pool(conn_params)
+        try:
+            connection, self._fresh_connection = pool.acquire()
+        except PoolTimeout as exc:
+            # Surfaces as django.db.OperationalError, like a failed connect
+            raise mysql_base.Database.OperationalError(str(exc)) from exc
+        self._checked_out_from = pool
+        return connection
+
+    def init_connection_state(self):
+        # Session variables outlive the checkout, so only new connections need them
+        if self._fresh_connection:
+            super().init_connection_state()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool, self._checked_out_from = self._checked_out_from, None
+        connection = self.connection
+        if self.in_atomic_block or (self.errors_occurred and not self.is_usable()):
+            # Django keeps a reference to a connection closed inside atomic(),
+            # so it must not be handed to another thread.
+            pool.discard(connection)
+            return
+        try:
+            if not connection.get_autocommit():
+                connection.rollback()
+                connection.autocommit(self.settings_dict['AUTOCOMMIT'])
+        except mysql_base.Database.Error:
+            pool.discard(connection)
+        else:
+            pool.release(connection)
@@ -0,0 +1,197 @@
+"""Per-process pool of raw DB-API connections.
+
+Django opens a connection on a request's first query and closes it when the
+request finishes. With ``core.db.mysql_pool`` as the ENGINE, "open" checks
+out a connection from this pool and "close" returns it, so a request pays
+for a connect, authentication and session setup only when the pool has to
+grow.
+
+Each worker process has its own pools. Each pool holds at most
+``MAX_SIZE`` connections; when they are all checked out, callers wait up
+to ``TIMEOUT`` seconds for one to be returned. Connections are pinged
+before reuse (``PRE_PING``) and replaced after ``RECYCLE`` seconds, so
+server-side ``wait_timeout`` never hands a dead socket to a request.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULTS = {
+    'MAX_SIZE': 10,
+    'TIMEOUT': 30,
+    'RECYCLE': 3600,
+    'PRE_PING': True,
+}
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, connect, ping, close, max_size=10, timeout=30, recycle=3600, pre_ping=True):
+        self._connect = connect
+        self._ping = ping
+        self._close = close
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self._cond = threading.Condition()
+        # Most recently returned last, so reuse favours warm connections
+        self._idle = deque()
+        self._born = {}
+        self._open = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.ping_failures = 0
+
+    def _expired(self, connection):
+        return self.recycle is not None and time.monotonic() - self._born[id(connection)] >= self.recycle
+
+    def acquire(self):
+        """Return ``(connection, fresh)``; ``fresh`` is True for a newly opened connection."""
+        deadline = time.monotonic() + self.timeout
+        waited = None
+        while True:
+            connection = None
+            with self._cond:
+                while not self._idle and self._open >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f'No database connection became free within {self.timeout}s '
+                            f'(pool size {self.max_size})'
+                        )
+                    started = time.monotonic()
+                    self._cond.wait(remaining)
+                    waited = (waited or 0.0) + time.monotonic() - started
+                if self._idle:
+                    connection = self._idle.pop()
+                else:
+                    # Reserve the slot before connecting outside the lock
+                    self._open += 1
+
+            if connection is None:
+                try:
+                    connection = self._connect()
+                except BaseException:
+                    self._forget(None)
+                    raise
+                with self._cond:
+                    self._born[id(connection)] = time.monotonic()
+                    self.created += 1
+                return self._checked_out(connection, True, waited)
+
+            if self._expired(connection):
+                self.discard(connection)
+                continue
+            if self.pre_ping:
+                try:
+                    self._ping(connection)
+                except Exception:
+                    with self._cond:
+                        self.ping_failures += 1
+                    self.discard(connection)
+                    continue
+            return self._checked_out(connection, False, waited)
+
+    def _checked_out(self, connection, fresh, waited):
+        with self._cond:
+            self.checkouts += 1
+            if waited is not None:
+                self.waits += 1
+                self.wait_time += waited
+        return connection, fresh
+
+    def release(self, connection):
+        if self._expired(connection):
+            self.discard(connection)
+            return
+        with self._cond:
+            self._idle.append(connection)
+            self._cond.notify()
+
+    def _forget(self, connection):
+        with self._cond:
+            if connection is not None:
+                self._born.pop(id(connection), None)
+                self.discarded += 1
+            self._open -= 1
+            self._cond.notify()
+
+    def discard(self, connection):
+        try:
+            self._close(connection)
+        except Exception:
+            pass
+        self._forget(connection)
+
+    def close_idle(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for connection in idle:
+            self.discard(connection)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle),
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_ms': round(self.wait_time * 1000, 1),
+                'timeouts': self.timeouts,
+                'created': self.created,
+                'discarded': self.discarded,
+                'ping_failures': self.ping_failures,
+            }
+
+
+_pools = {}
+_pools_pid = None
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, factory):
+    """Return this process's pool for ``key``, creating it with ``factory()`` on first use."""
+    global _pools, _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # Connections inherited across fork belong to the parent; never touch them
+            _pools, _pools_pid = {}, os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = factory()
+        return pool
+
+
+def get_pool_stats():
+    """Metrics of every pool in this process, keyed by database alias."""
+    if _pools_pid != os.getpid():
+        return {}
+    with _pools_lock:
+        pools = list(_pools.items())
+    stats = {}
+    for (alias, *_), pool in pools:
+        # A pool per alias and target database; sum pools sharing an alias
+        current = pool.stats()
+        if alias in stats:
+            current = {name: stats[alias][name] + value for name, value in current.items()}
+        stats[alias] = current
+    return stats
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values()) if _pools_pid == os.getpid() else []
+    for pool in pools:
+        pool.close_idle()
@@ -0,0 +1,276 @@
+"""Send safe reads to read replicas, keeping writers on the primary.
+
+Replica reads are opt-in per view: a view that sets ``replica_reads = True``
+reads from one of the ``DATABASE_REPLICAS`` aliases while handling GET, HEAD
+and OPTIONS requests. Every other read, and every write, uses ``default``.
+Within a replica-eligible request, reads still go to the primary when:
+
+* the user has not been authenticated yet, so authentication and token
+  checks always see current data;
+* the request has written anything, so it reads its own writes;
+* the user wrote within the last ``REPLICA_PIN_SECONDS``, so they see their
+  change on the next page load even if the replicas have not caught up;
+* no replica is healthy. Each worker checks every replica at most once per
+  ``REPLICA_CHECK_INTERVAL`` seconds, and treats it as down if it cannot be
+  reached or lags more than ``REPLICA_MAX_LAG`` seconds.
+
+A request sticks to the replica it first picked. Pins live in Django's cache,
+so configure a shared cache backend to pin users across workers.
+"""
+import contextlib
+import contextvars
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.functional import SimpleLazyObject, empty
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+
+class RoutingState:
+    def __init__(self, request):
+        self.request = request
+        self.replica_reads = False
+        self.wrote = False
+        self.replica = None
+        # Tenant shard serving this request or block (see TenantShardRouter)
+        self.shard = None
+        self.shard_moving = False
+        # The enclosing request of a sub-request (see begin_subrequest)
+        self.parent = None
+
+
+def _pin_key(user_id):
+    return f"db:primary-pin:{user_id}"
+
+
+def _resolved_user(request):
+    """The request's user if it is already known, without triggering a lookup."""
+    if request is None:
+        return None
+    user = request.__dict__.get('user')
+    if user is None or (isinstance(user, SimpleLazyObject) and user._wrapped is empty):
+        return None
+    return user if user.is_authenticated else None
+
+
+def begin_request(request):
+    return _state.set(RoutingState(request))
+
+
+def allow_replica_reads():
+    """Let the current request read from replicas; see ``ReplicaRoutingMiddleware``."""
+    state = _state.get()
+    if state is not None:
+        state.replica_reads = True
+
+
+def activate_shard(alias, moving=False):
+    """Route the rest of the current request's tenant queries to ``alias``.
+
+    ``moving`` marks the tenant as being moved off ``alias``; its writes are
+    then refused.
+    """
+    state = _state.get()
+    if state is not None:
+        state.shard = alias
+        state.shard_moving = moving
+
+
+def current_shard():
+    state = _state.get()
+    return state.shard if state is not None else None
+
+
+@contextlib.contextmanager
+def use_shard(alias):
+    """Route tenant queries inside the block to ``alias``, in or outside a request."""
+    state = _state.get()
+    if state is None:
+        token = _state.set(RoutingState(None))
+        try:
+            _state.get().shard = alias
+            yield
+        finally:
+            _state.reset(token)
+        return
+    previous = state.shard, state.shard_moving
+    state.shard, state.shard_moving = alias, False
+    try:
+        yield
+    finally:
+        state.shard, state.shard_moving = previous
+
+
+def begin_subrequest(request):
+    """Start routing a request made inside the current one, e.g. by the batch endpoint.
+
+    The sub-request keeps the current tenant shard, and reads from the primary
+    if the enclosing request has written anything.
+    """
+    parent = _state.get()
+    state = RoutingState(request)
+    if parent is not None:
+        state.parent = parent
+        state.shard, state.shard_moving, state.wrote = parent.shard, parent.shard_moving, parent.wrote
+    return _state.set(state)
+
+
+def end_subrequest(token):
+    """Clear a sub-request's state, passing any write on to the enclosing request."""
+    state = _state.get()
+    _state.reset(token)
+    if state is not None and state.parent is not None and state.wrote:
+        state.parent.wrote = True
+
+
+def end_request(token):
+    """Pin the request's user to the primary if it wrote, then clear the state."""
+    state = _state.get()
+    _state.reset(token)
+    if state is not None and state.wrote:
+        user = _resolved_user(state.request)
+        if user is not None:
+            cache.set(_pin_key(user.pk), True, getattr(settings, 'REPLICA_PIN_SECONDS', 5))
+
+
+def replica_lag(connection):
+    """Seconds the replica behind ``connection`` lags its source, or None if replication is broken."""
+    if connection.vendor != 'mysql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return 0
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute('SHOW REPLICA STATUS')
+        except DatabaseError:
+            # MySQL before 8.0.22 and MariaDB
+            cursor.execute('SHOW SLAVE STATUS')
+        row = cursor.fetchone()
+        if row is None:
+            # Not configured as a replica, e.g. a second local instance in development
+            return 0
+        status = dict(zip((column[0] for column in cursor.description), row))
+    lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+    return None if lag is None else int(lag)
+
+
+class ReplicaMonitor:
+    """Per-process record of which replicas are up and caught up."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._status = {}
+
+    def is_healthy(self, alias):
+        healthy, checked_at = self._status.get(alias, (False, None))
+        if checked_at is None or time.monotonic() - checked_at > getattr(settings, 'REPLICA_CHECK_INTERVAL', 5):
+            healthy = self._check(alias)
+            with self._lock:
+                self._status[alias] = (healthy, time.monotonic())
+        return healthy
+
+    def _check(self, alias):
+        try:
+            lag = replica_lag(connections[alias])
+        except DatabaseError:
+            connections[alias].close()
+            return False
+        return lag is not None and lag <= getattr(settings, 'REPLICA_MAX_LAG', 5)
+
+    def reset(self):
+        with self._lock:
+            self._status.clear()
+
+
+replica_monitor = ReplicaMonitor()
+
+
+class ReplicaRouter:
+    def _replica_for(self, state):
+        if state.replica is None:
+            user = _resolved_user(state.request)
+            if user is None:
+                return None
+            if cache.get(_pin_key(user.pk)):
+                state.replica = DEFAULT_DB_ALIAS
+            else:
+                healthy = [alias for alias in getattr(settings, 'DATABASE_REPLICAS', []) if replica_monitor.is_healthy(alias)]
+                state.replica = random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica_reads or state.wrote:
+            return DEFAULT_DB_ALIAS
+        return self._replica_for(state) or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *getattr(settings, 'DATABASE_REPLICAS', [])}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas receive schema changes through replication
+        if db in getattr(settings, 'DATABASE_REPLICAS', []):
+            return False
+        return None
+
+
+class TenantShardRouter:
+    """Send tenant-owned models to the shard holding the tenant being served.
+
+    The shard comes from the request (set when the user is authenticated, see
+    ``accounts.authentication``) or from ``use_shard()``; failing that, from
+    the database an instance involved in the query was loaded from. Other
+    models, and tenants on ``default``, fall through to the next router.
+    Writes of a tenant that ``move_tenant`` is moving raise ``TenantMoving``.
+    """
+
+    def _shard(self, model, hints):
+        from companies.sharding import get_shards, is_tenant_model  # Import here to avoid loading models early
+
+        if not is_tenant_model(model):
+            return None
+        shard = current_shard()
+        if shard is None:
+            instance = hints.get('instance')
+            db = getattr(getattr(instance, '_state', None), 'db', None)
+            shard = db if db in get_shards() else None
+        # Tenants on the primary keep its replica routing
+        return None if shard == DEFAULT_DB_ALIAS else shard
+
+    def db_for_read(self, model, **hints):
+        return self._shard(model, hints)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and state.shard_moving:
+            from companies.sharding import TenantMoving, is_tenant_model  # Import here to avoid loading models early
+
+            if is_tenant_model(model):
+                raise TenantMoving()
+        return self._shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        from companies.sharding import get_shards  # Import here to avoid loading models early
+
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        # The primary's replicas hold the primary's rows
+        first, second = (DEFAULT_DB_ALIAS if obj._state.db in replicas else obj._state.db for obj in (obj1, obj2))
+        if first in get_shards() and second in get_shards():
+            # Rows on different shards cannot reference each other
+            return first == second
+        return None
@@ -0,0 +1,87 @@
+"""Sparse fieldsets: ``?fields=`` and ``?expand=`` on list endpoints.
+
+``?fields=id,employee_id,user.email`` limits a response to the named fields.
+Dotted names select fields of a nested object. ``?expand=department`` adds a
+nested object, or replaces a related id with one, taken from the serializer's
+``Meta.expandable_fields``. Selecting a field inside an expandable field, such
+as ``department.name``, expands it too. Unknown names are a 400.
+
+The JSON is trimmed by removing fields from the serializer before it runs.
+The SQL is trimmed by the values() serializers (see core/serializers.py),
+which build their query from the remaining fields. Columns that are not
+selected are not read, and relations that are not needed are not joined.
+"""
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def parse_fieldset(value):
+    """Split a comma-separated query parameter into a frozenset of names, or None if it is empty."""
+    names = frozenset(name.strip() for name in (value or '').split(',') if name.strip())
+    return names or None
+
+
+def _split(names):
+    # {'user.email', 'id'} -> {'user': {'email'}, 'id': None}; None means the whole field
+    fields = {}
+    for name in names:
+        head, _, rest = name.partition('.')
+        if rest:
+            if fields.get(head, set()) is not None:
+                fields.setdefault(head, set()).add(rest)
+        else:
+            fields[head] = None
+    return fields
+
+
+def _select(fields, names, prefix=''):
+    """Remove the entries of ``fields`` (a field dict) that ``names`` does not select."""
+    selected = _split(names)
+    unknown = sorted(prefix + name for name in selected if name not in fields)
+    if unknown:
+        raise ValidationError({'fields': [f'Unknown field: {name}' for name in unknown]})
+    for name in list(fields):
+        if name not in selected:
+            del fields[name]
+        elif selected[name] is not None:
+            nested = fields[name]
+            if not isinstance(nested, serializers.Serializer):
+                raise ValidationError({'fields': [f'{prefix}{name} has no fields to select']})
+            _select(nested.fields, selected[name], f'{prefix}{name}.')
+
+
+class SparseFieldsMixin:
+    """Serializer mixin accepting ``fields`` and ``expand`` keyword arguments."""
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        self._sparse_fields = fields
+        self._expand = expand or frozenset()
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        unknown = sorted(name for name in self._expand if name not in expandable)
+        if unknown:
+            raise ValidationError({'expand': [f'Cannot expand: {name}' for name in unknown]})
+        expand = set(self._expand)
+        expand.update(name for name, nested in _split(self._sparse_fields or ()).items()
+                      if nested is not None and name in expandable)
+        for name in expand:
+            # Replacing an existing field keeps its position in the output
+            fields[name] = expandable[name](read_only=True)
+        if self._sparse_fields is not None:
+            _select(fields, self._sparse_fields)
+        return fields
+
+
+class SparseFieldsViewMixin:
+    """View mixin passing ``?fields=`` and ``?expand=`` to the serializer of GET requests."""
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method in ('GET', 'HEAD'):
+            for param in ('fields', 'expand'):
+                value = parse_fieldset(self.request.query_params.get(param))
+                if value is not None:
+                    kwargs.setdefault(param, value)
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,59 @@
+"""Whitelisted list filters that are always served by an index.
+
+An ``IndexedFilterSet`` is a django-filter ``FilterSet`` that lists, in
+``indexes``, each combination of equality filters and ordering column its
+model has an index for. The list's other conditions, such as the company, come
+first in each index:
+
+    indexes = [
+        ((), 'created_at'),                 # (company, created_at)
+        (('department',), 'created_at'),    # (company, department, created_at)
+    ]
+
+A request must match one entry exactly. Its equality filters are the entry's
+filters, and its ``?ordering=`` is the entry's column, in either direction.
+Range filters are allowed on the ordering column only, where they bound the
+same index scan. Any other combination is a 400 rather than a slow query. The
+filtered queryset is ordered by one column, which is what
+``core.pagination.KeysetPagination`` pages on.
+"""
+import django_filters
+from django_filters.constants import EMPTY_VALUES
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+
+class IndexedFilterSet(django_filters.FilterSet):
+    """FilterSet restricted to the filter and ordering combinations in ``indexes``."""
+    ordering_param = 'ordering'
+    # The ordering without an ?ordering= parameter, e.g. '-created_at'
+    default_ordering = None
+    # (equality filter field names, ordering column) pairs
+    indexes = ()
+
+    def filter_queryset(self, queryset):
+        ordering = self.form.cleaned_data.get(self.ordering_param) or [self.default_ordering]
+        if len(ordering) != 1:
+            raise ValidationError({self.ordering_param: ['Order by a single field.']})
+        self.check_indexed(ordering[0].lstrip('-'))
+        # The ordering filter applies an explicit ordering
+        return super().filter_queryset(queryset).order_by(ordering[0])
+
+    def check_indexed(self, column):
+        equal = set()
+        for name, value in self.form.cleaned_data.items():
+            filter_ = self.filters[name]
+            if name == self.ordering_param or value in EMPTY_VALUES or filter_.field_name == column:
+                continue
+            if filter_.lookup_expr != 'exact':
+                raise ValidationError({name: [f'Requires ordering={filter_.field_name} or -{filter_.field_name}.']})
+            equal.add(filter_.field_name)
+        if not any(set(fields) == equal and column == indexed for fields, indexed in self.indexes):
+            supported = '; '.join(
+                f"{' and '.join(fields) or 'no filters'} ordered by {indexed}" for fields, indexed in self.indexes
+            )
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f'This combination of filters and ordering is not supported. Supported: {supported}.'
+                ]
+            })
@@ -0,0 +1,209 @@
+import asyncio
+import io
+import statistics
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from accounts.models import User
+from accounts.tokens import ClaimsAccessToken
+from companies.tenancy import resolve_company
+from core.asgi import AsyncURLConfASGIHandler
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare one worker process serving the read endpoints with the sync views through '
+        'core.wsgi (a pool of threads) against the async views through core.asgi (one event loop). '
+        'Both stacks run in this process with the same requests, so no server is needed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Email of the user the requests are made as.')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Path to request, repeat for several. Defaults to the dashboard reads of the user.'
+        )
+        parser.add_argument('--requests', type=int, default=500, help='Requests per stack.')
+        parser.add_argument('--threads', type=int, default=8, help='WSGI threads, like gunicorn --threads.')
+        parser.add_argument('--concurrency', type=int, default=64, help='Concurrent ASGI requests.')
+        parser.add_argument(
+            '--db-latency-ms', type=float, default=0.0,
+            help='Delay added to every query, to simulate a database across the network.'
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(email=options['user']).first()
+        if user is None:
+            raise CommandError(f"No user {options['user']!r}")
+        authorization = f'Bearer {ClaimsAccessToken.for_user(user)}'
+        paths = options['paths'] or self.default_paths(user)
+
+        latency = options['db_latency_ms'] / 1000
+
+        def delay(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_delay(sender, connection, **kwargs):
+            # Every thread has its own connections; add the delay to each as it connects
+            if delay not in connection.execute_wrappers:
+                connection.execute_wrappers.append(delay)
+
+        stacks = [
+            ('wsgi', f"{options['threads']} threads", self.run_wsgi),
+            ('asgi', f"{options['concurrency']} tasks", self.run_asgi),
+        ]
+        self.stdout.write(
+            f"{options['requests']} requests per stack over {len(paths)} path(s), "
+            f"{options['db_latency_ms']:g} ms added per query; times in ms"
+        )
+        self.stdout.write(f"{'stack':<6} {'concurrency':>12} {'req/s':>9} {'p50':>8} {'p95':>8} {'errors':>7}")
+        if latency:
+            connection_created.connect(add_delay)
+        try:
+            for label, concurrency, run in stacks:
+                # One untimed round, so imports and caches are warm
+                statuses, _, _ = run(paths, authorization, len(paths), options)
+                failed = {path: status for path, status in zip(paths, statuses) if status != 200}
+                if failed:
+                    raise CommandError(f'{label}: non-200 responses {failed}')
+                statuses, durations, elapsed = run(paths, authorization, options['requests'], options)
+                errors = sum(status != 200 for status in statuses)
+                self.stdout.write(
+                    f"{label:<6} {concurrency:>12} {len(durations) / elapsed:>9.1f} "
+                    f"{statistics.median(durations):>8.2f} {statistics.quantiles(durations, n=20)[-1]:>8.2f} "
+                    f"{errors:>7}"
+                )
+        finally:
+            connection_created.disconnect(add_delay)
+
+    def default_paths(self, user):
+        paths = ['/accounts/api/user/', '/employees/api/employees/']
+        company = resolve_company(user)
+        if company is not None:
+            paths += [f'/companies/api/profile/{company.id}/', '/companies/api/departments/']
+        return paths
+
+    def run_wsgi(self, paths, authorization, requests, options):
+        handler = WSGIHandler()
+        statuses, durations = [None] * requests, [None] * requests
+        counter = iter(range(requests))
+        lock = threading.Lock()
+        errors = []
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        index = next(counter, None)
+                    if index is None:
+                        return
+                    started = time.perf_counter()
+                    statuses[index] = self.call_wsgi(handler, paths[index % len(paths)], authorization)
+                    durations[index] = (time.perf_counter() - started) * 1000
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise CommandError(f'wsgi: {errors[0]}')
+        return statuses, durations, time.perf_counter() - started
+
+    def call_wsgi(self, handler, path, authorization):
+        url = urlsplit(path)
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost',
+            'HTTP_AUTHORIZATION': authorization,
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        status = []
+        response = handler(environ, lambda line, headers, exc_info=None: status.append(line))
+        try:
+            b''.join(response)
+        finally:
+            # As a WSGI server does; sends request_finished
+            response.close()
+        return int(status[0].split()[0])
+
+    def run_asgi(self, paths, authorization, requests, options):
+        application = AsyncURLConfASGIHandler()
+        statuses, durations = [None] * requests, [None] * requests
+        counter = iter(range(requests))
+
+        async def worker():
+            for index in counter:
+                started = time.perf_counter()
+                statuses[index] = await self.call_asgi(application, paths[index % len(paths)], authorization)
+                durations[index] = (time.perf_counter() - started) * 1000
+
+        async def main():
+            await asyncio.gather(*(worker() for _ in range(options['concurrency'])))
+
+        started = time.perf_counter()
+        asyncio.run(main())
+        return statuses, durations, time.perf_counter() - started
+
+    async def call_asgi(self, application, path, authorization):
+        url = urlsplit(path)
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': url.path,
+            'raw_path': url.path.encode(),
+            'query_string': url.query.encode(),
+            'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'authorization', authorization.encode())],
+            'client': ('127.0.0.1', 0),
+            'server': ('localhost', 80),
+        }
+        received = False
+        done = asyncio.Event()
+        status = None
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # The client stays connected until the response is complete
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+
+        await application(scope, receive, send)
+        done.set()
+        return status
@@ -0,0 +1,85 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+
+from core.db.pool import get_pool_stats
+
+ENGINES = {
+    'direct': 'django.db.backends.mysql',
+    'pooled': 'core.db.mysql_pool',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the per-request cost of opening a new MySQL connection with checking one out '
+        'of the connection pool. Each simulated request connects, runs a few queries and closes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias whose settings are used.')
+        parser.add_argument('--requests', type=int, default=500, help='Simulated requests per thread and backend.')
+        parser.add_argument('--queries', type=int, default=3, help='Queries per simulated request.')
+        parser.add_argument('--threads', type=int, default=1, help='Concurrent threads, like a threaded worker.')
+
+    def handle(self, *args, **options):
+        settings_dict = connections[options['database']].settings_dict
+        if settings_dict['ENGINE'] not in ENGINES.values():
+            raise CommandError(f"{options['database']!r} is not a MySQL database")
+
+        self.stdout.write(
+            f"{options['threads']} thread(s) x {options['requests']} requests, "
+            f"{options['queries']} queries each; times per request in ms"
+        )
+        self.stdout.write(f"{'backend':<8} {'connect':>9} {'p50':>8} {'p95':>8} {'req/s':>9}")
+        for label, engine in ENGINES.items():
+            connect, total, elapsed = self.run(engine, settings_dict, options)
+            self.stdout.write(
+                f"{label:<8} {statistics.mean(connect):>9.2f} {statistics.median(total):>8.2f} "
+                f"{statistics.quantiles(total, n=20)[-1]:>8.2f} {len(total) / elapsed:>9.1f}"
+            )
+        for alias, stats in get_pool_stats().items():
+            self.stdout.write(f"pool {alias}: " + ', '.join(f'{name}={value}' for name, value in stats.items()))
+
+    def run(self, engine, settings_dict, options):
+        connect, total, errors = [], [], []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                measure()
+            except Exception as exc:
+                errors.append(exc)
+
+        def measure():
+            # Connection wrappers are per thread, as in a threaded server
+            wrapper = load_backend(engine).DatabaseWrapper({**settings_dict, 'ENGINE': engine}, 'benchmark')
+            local_connect, local_total = [], []
+            for _ in range(options['requests']):
+                started = time.perf_counter()
+                wrapper.ensure_connection()
+                connected = time.perf_counter()
+                with wrapper.cursor() as cursor:
+                    for _ in range(options['queries']):
+                        cursor.execute('SELECT 1')
+                        cursor.fetchall()
+                wrapper.close()
+                local_connect.append((connected - started) * 1000)
+                local_total.append((time.perf_counter() - started) * 1000)
+            with lock:
+                connect.extend(local_connect)
+                total.extend(local_total)
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise CommandError(f'{engine}: {errors[0]}')
+        return connect, total, time.perf_counter() - started
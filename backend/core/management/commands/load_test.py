@@ -0,0 +1,287 @@
+import http.client
+import json
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+# Page loads of the React dashboard, as (weight, calls). Each page first runs
+# ProtectedRoute's getCurrentUser, then the fetches in the component's useEffect.
+# {company} and {employee} are filled in from the virtual user's own data.
+# ('NEXT', route) is a click on the list's "Load more" button: it fetches the
+# page after the last one loaded through that page's ``next`` link, if any.
+PAGES = {
+    'company_dashboard': (3, [
+        ('GET', '/accounts/api/user/'),
+        ('GET', '/companies/api/profile/{company}/'),
+    ]),
+    'admin_dashboard': (3, [
+        ('GET', '/accounts/api/user/'),
+        ('GET', '/companies/api/profile/{company}/'),
+    ]),
+    'employees': (2, [
+        ('GET', '/accounts/api/user/'),
+        ('GET', '/companies/api/departments/'),
+        ('GET', '/employees/api/employees/'),
+        ('NEXT', '/employees/api/employees/'),
+    ]),
+    'employee_detail': (1, [
+        ('GET', '/accounts/api/user/'),
+        ('GET', '/employees/api/employees/{employee}/'),
+    ]),
+    'departments': (1, [
+        ('GET', '/accounts/api/user/'),
+        ('GET', '/companies/api/departments/'),
+        ('NEXT', '/companies/api/departments/'),
+    ]),
+    'admin_users': (1, [
+        ('GET', '/accounts/api/user/'),
+        ('GET', '/companies/api/admin-users/'),
+    ]),
+}
+
+# Lists the API answers one page at a time ({next, previous, results})
+PAGED_ROUTES = {
+    '/companies/api/departments/',
+    '/companies/api/admin-users/',
+    '/employees/api/employees/',
+}
+
+LOGIN_ROUTE = ('POST', '/accounts/api/token/')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, route, elapsed, ok):
+        with self._lock:
+            self.latencies[route].append(elapsed)
+            if not ok:
+                self.errors[route] += 1
+
+    def summary(self, duration):
+        routes = {}
+        for route in sorted(self.latencies):
+            values = sorted(self.latencies[route])
+            routes[route] = {
+                'requests': len(values),
+                'errors': self.errors[route],
+                'throughput_rps': round(len(values) / duration, 2),
+                'mean_ms': round(sum(values) / len(values) * 1000, 2),
+                'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+                'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+                'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+                'max_ms': round(values[-1] * 1000, 2),
+            }
+        total = sum(route['requests'] for route in routes.values())
+        return {
+            'requests': total,
+            'errors': sum(self.errors.values()),
+            'throughput_rps': round(total / duration, 2),
+            'routes': routes,
+        }
+
+
+class VirtualUser(threading.Thread):
+    """One dashboard user: logs in once, then loads pages until ``deadline``."""
+
+    def __init__(self, target, credentials, recorder, deadline, think_time, timeout, seed):
+        super().__init__(daemon=True)
+        self.target = target
+        # Routes are joined onto the base URL's path, e.g. /backend behind a proxy
+        self.prefix = target.path.rstrip('/')
+        self.email, self.password = credentials
+        self.recorder = recorder
+        self.deadline = deadline
+        self.think_time = think_time
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.connection = None
+        self.token = None
+        self.context = {}
+        self.next_links = {}
+        self.failure = None
+
+    def _connect(self):
+        connection_class = http.client.HTTPSConnection if self.target.scheme == 'https' else http.client.HTTPConnection
+        # One keep-alive connection per user, like a browser tab
+        self.connection = connection_class(self.target.hostname, self.target.port, timeout=self.timeout)
+
+    def request(self, method, path, body=None, route=None):
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        payload = json.dumps(body) if body is not None else None
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, self.prefix + path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            # Drop the broken connection; the next request reconnects
+            self.connection.close()
+            self._connect()
+            data, status = b'', 0
+        self.recorder.record(f'{method} {route or path}', time.perf_counter() - started, 200 <= status < 400)
+        return status, data
+
+    def load(self, method, route):
+        """Make one of a page's calls, remembering a list page's ``next`` link for 'NEXT'."""
+        if method == 'NEXT':
+            next_url = self.next_links.get(route)
+            if not next_url:
+                return
+            # The link is absolute; the request goes to the same server
+            next_url = urlsplit(next_url)
+            path = next_url.path
+            if self.prefix and path.startswith(self.prefix + '/'):
+                path = path[len(self.prefix):]
+            status, data = self.request('GET', f'{path}?{next_url.query}', route=f'{route}?cursor=')
+        else:
+            status, data = self.request(method, route.format(**self.context), route=route)
+        if route in PAGED_ROUTES:
+            try:
+                self.next_links[route] = json.loads(data).get('next') if status == 200 else None
+            except (ValueError, AttributeError):
+                self.next_links[route] = None
+
+    def login(self):
+        status, data = self.request(*LOGIN_ROUTE, body={'email': self.email, 'password': self.password})
+        if status != 200:
+            raise CommandError(f'Login failed for {self.email} with HTTP {status}: {data[:200]!r}')
+        self.token = json.loads(data)['access']
+
+        status, data = self.request('GET', '/accounts/api/user/')
+        if status != 200:
+            raise CommandError(f'Could not load the current user for {self.email}: HTTP {status}')
+        self.context['company'] = json.loads(data).get('company')
+
+        status, data = self.request('GET', '/employees/api/employees/')
+        employees = json.loads(data) if status == 200 else []
+        if isinstance(employees, dict):
+            employees = employees.get('results', [])
+        self.context['employee'] = employees[0]['id'] if employees else None
+
+    def pages(self):
+        """Pages this user can load; those needing an id the user lacks are skipped."""
+        return [
+            (weight, calls) for weight, calls in PAGES.values()
+            if all(self.context.get(key) for _, path in calls for key in self.context if f'{{{key}}}' in path)
+        ]
+
+    def run(self):
+        try:
+            self._connect()
+            self.login()
+            pages = self.pages()
+            weights = [weight for weight, _ in pages]
+            while time.monotonic() < self.deadline:
+                _, calls = self.random.choices(pages, weights)[0]
+                for method, route in calls:
+                    self.load(method, route)
+                if self.think_time:
+                    time.sleep(self.random.uniform(0, 2 * self.think_time))
+        except Exception as exc:
+            self.failure = exc
+        finally:
+            if self.connection:
+                self.connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the React dashboard's API call mix against a running backend with concurrent "
+        "virtual users and report throughput and p50/p95/p99 latency per route as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', default='http://localhost:8000',
+            help='Base URL of the backend under test; API paths are appended to it, path included.'
+        )
+        parser.add_argument(
+            '--user', action='append', dest='users', metavar='EMAIL:PASSWORD', required=True,
+            help='Dashboard login (may be repeated); virtual users are spread across them.'
+        )
+        parser.add_argument('--concurrency', type=int, default=10, help='Number of virtual users.')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run after ramp-up starts.')
+        parser.add_argument('--ramp-up', type=float, default=0, help='Seconds over which virtual users are started.')
+        parser.add_argument(
+            '--think-time', type=float, default=0,
+            help='Mean pause in seconds between page loads; 0 measures maximum throughput.'
+        )
+        parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the page mix, so runs are repeatable.')
+        parser.add_argument('--label', default='', help='Free-form label stored in the report, e.g. a commit hash.')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        target = urlsplit(options['url'])
+        if target.scheme not in ('http', 'https') or not target.hostname:
+            raise CommandError(f"Invalid --url {options['url']!r}")
+        credentials = []
+        for value in options['users']:
+            email, sep, password = value.partition(':')
+            if not sep:
+                raise CommandError(f'--user must be EMAIL:PASSWORD, got {value!r}')
+            credentials.append((email, password))
+
+        concurrency = options['concurrency']
+        recorder = Recorder()
+        started_at = timezone.now()
+        started = time.monotonic()
+        deadline = started + options['duration']
+        workers = []
+        for i in range(concurrency):
+            worker = VirtualUser(
+                target, credentials[i % len(credentials)], recorder, deadline,
+                options['think_time'], options['timeout'], seed=options['seed'] + i,
+            )
+            worker.start()
+            workers.append(worker)
+            if options['ramp_up'] and i < concurrency - 1:
+                time.sleep(options['ramp_up'] / concurrency)
+        for worker in workers:
+            worker.join()
+        duration = time.monotonic() - started
+
+        failures = [worker.failure for worker in workers if worker.failure]
+        if len(failures) == len(workers):
+            raise CommandError(f'Every virtual user failed: {failures[0]}')
+
+        report = {
+            'label': options['label'],
+            'url': options['url'],
+            'started_at': started_at.isoformat(),
+            'duration_s': round(duration, 2),
+            'concurrency': concurrency,
+            'think_time_s': options['think_time'],
+            'failed_users': len(failures),
+            **recorder.summary(duration),
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            self.stderr.write(f"Wrote {report['requests']} requests to {options['output']}")
+        else:
+            self.stdout.write(output)
+        for failure in set(map(str, failures)):
+            self.stderr.write(self.style.WARNING(f'Virtual user failed: {failure}'))
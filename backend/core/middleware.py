@@ -0,0 +1,189 @@
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from .db import routers
+from .db.pool import get_pool_stats
+
+logger = logging.getLogger('core.timing')
+
+
+class QueryTimer:
+    """``execute_wrapper`` hook that counts queries and sums their duration.
+
+    One timer can wrap the connections of several threads.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.duration += elapsed
+                self.count += 1
+
+
+class RequestTimingMiddleware:
+    """Measure total and database time per request.
+
+    Adds a ``Server-Timing`` header (visible in browser dev tools) and writes
+    one JSON log line to the ``core.timing`` logger for a sample of requests,
+    plus every request slower than ``REQUEST_TIMING_SLOW_MS``. Settings:
+
+    ``REQUEST_TIMING_SAMPLE_RATE``  fraction of requests logged (0.0-1.0)
+    ``REQUEST_TIMING_SLOW_MS``      always log requests at least this slow
+    ``REQUEST_TIMING_HEADER``       emit the Server-Timing header
+
+    Log lines include this worker's connection pool metrics when the
+    pooled database backend is in use.
+
+    The timer is kept as ``request.query_timer``, so that a view running
+    queries on other threads can time their connections too (see
+    ``core/batch.py``). Database time is then summed over the threads.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 0.01)
+        self.slow_ms = getattr(settings, 'REQUEST_TIMING_SLOW_MS', 1000)
+        self.header = getattr(settings, 'REQUEST_TIMING_HEADER', True)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = request.query_timer = QueryTimer()
+        started = time.perf_counter()
+        with self.timed_connections(timer):
+            response = self.get_response(request)
+        return self.finish(request, response, timer, started)
+
+    async def __acall__(self, request):
+        timer = request.query_timer = QueryTimer()
+        started = time.perf_counter()
+        # Connections belong to the thread running the request's ORM calls,
+        # so the wrappers are installed and removed from that thread
+        stack = await sync_to_async(self.timed_connections)(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, timer, started)
+
+    @staticmethod
+    def timed_connections(timer):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        return stack
+
+    def finish(self, request, response, timer, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = timer.duration * 1000
+
+        if self.header:
+            response['Server-Timing'] = (
+                f'db;dur={db_ms:.1f};desc="{timer.count} queries", total;dur={total_ms:.1f}'
+            )
+        if total_ms >= self.slow_ms or random.random() < self.sample_rate:
+            match = getattr(request, 'resolver_match', None)
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                'total_ms': round(total_ms, 1),
+                'db_ms': round(db_ms, 1),
+                'queries': timer.count,
+                'db_pool': get_pool_stats() or None,
+            }))
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Let safe requests to views with ``replica_reads = True`` read from replicas.
+
+    Also pins users who write to the primary for a while afterwards; see
+    ``core/db/routers.py``.
+    """
+
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = routers.begin_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            routers.end_request(token)
+
+    async def __acall__(self, request):
+        token = routers.begin_request(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            routers.end_request(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        if request.method in self.safe_methods and getattr(view_class, 'replica_reads', False):
+            routers.allow_replica_reads()
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """WhiteNoise's middleware, able to run in an async middleware chain.
+
+    WhiteNoise 6 is sync-only, so under ASGI Django would run it, and every
+    middleware and view after it, in a worker thread. Looking up a static
+    file is a dictionary lookup that is safe in the event loop. Other
+    requests go straight on to the async chain.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
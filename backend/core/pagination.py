@@ -0,0 +1,155 @@
+"""Keyset (cursor) pagination for the tenant list endpoints.
+
+``KeysetPagination`` pages through a queryset ordered by one column and the
+primary key, e.g. ``(created_at, id)``. A page is fetched with
+``WHERE (created_at, id) < (last seen)`` rather than ``OFFSET``. With an
+index on ``(company, ..., created_at)`` the database seeks straight to the
+position, so the thousandth page costs the same as the first. InnoDB
+appends the primary key to every secondary index, so the index also serves
+the ``id`` tiebreak.
+
+The ordering is read from the queryset: one column, ascending or
+descending, as set by ``core.filters.IndexedFilterSet``. Responses are
+``{"next", "previous", "results"}``. The links carry an opaque ``?cursor=``,
+and ``?page_size=`` is capped at ``LIST_MAX_PAGE_SIZE``. There is no total
+count, because it would cost a scan of every matching row.
+
+Views whose serializer reads ``values()`` rows (see core/serializers.py) are
+paged from ``values()`` rows. The cursor columns are added to the columns the
+serializer reads. The async list views fetch the page with the async ORM in
+two steps, ``get_page_queryset`` and ``paginate_rows`` (see
+core/async_views.py).
+"""
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .serializers import ValuesSerializer
+
+
+def query_int(request, name, default, maximum=None):
+    """A positive integer query parameter, ``default`` if it is missing or malformed, capped at ``maximum``."""
+    try:
+        value = int(request.query_params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    value = max(value, 1)
+    return value if maximum is None else min(value, maximum)
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on ``(ordering column, pk)``; see the module docstring."""
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_rows(list(self.get_page_queryset(queryset, request, view)))
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """The query for one page, plus a row that tells whether there is another."""
+        self.request = request
+        self.page_size = query_int(
+            request, self.page_size_query_param,
+            getattr(settings, 'LIST_PAGE_SIZE', 100), getattr(settings, 'LIST_MAX_PAGE_SIZE', 1000),
+        )
+        ordering = queryset.query.order_by
+        if len(ordering) != 1:
+            raise ImproperlyConfigured(
+                f'{type(self).__name__} needs a queryset ordered by one column, not {list(ordering)!r}'
+            )
+        column = ordering[0]
+        self.descending = column.startswith('-')
+        self.keys = (column.lstrip('-'), queryset.model._meta.pk.attname)
+        self.key_fields = [queryset.model._meta.get_field(key) for key in self.keys]
+        self.position, self.reverse = self.decode_cursor(request)
+
+        # A previous page is read backwards from its first row
+        descending = self.descending != self.reverse
+        if self.position is not None:
+            (column, pk), (value, pk_value) = self.keys, self.position
+            after = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{column}__{after}': value}) | Q(**{column: value, f'{pk}__{after}': pk_value})
+            )
+        sign = '-' if descending else ''
+        queryset = queryset.order_by(*(sign + key for key in self.keys))
+
+        lookups = self.get_values_lookups(view)
+        if lookups is not None:
+            queryset = queryset.values(*dict.fromkeys([*lookups, *self.keys]))
+        return queryset[:self.page_size + 1]
+
+    def paginate_rows(self, rows):
+        """Trim the rows of ``get_page_queryset`` to the page and work out its links."""
+        more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.next_position = self.row_position(rows[-1]) if rows else self.position
+            self.previous_position = self.row_position(rows[0]) if more else None
+        else:
+            self.next_position = self.row_position(rows[-1]) if more else None
+            if self.position is None:
+                self.previous_position = None
+            else:
+                self.previous_position = self.row_position(rows[0]) if rows else self.position
+        return rows
+
+    @staticmethod
+    def get_values_lookups(view):
+        """The columns a values() serializer of ``view`` reads, or None if it serializes instances."""
+        if view is None:
+            return None
+        serializer = view.get_serializer()
+        return serializer.get_lookups() if isinstance(serializer, ValuesSerializer) else None
+
+    def row_position(self, row):
+        if isinstance(row, dict):
+            return tuple(row[key] for key in self.keys)
+        return tuple(getattr(row, key) for key in self.keys)
+
+    def encode_cursor(self, position, reverse):
+        payload = {'p': [str(value) for value in position]}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode())
+        return encoded.decode('ascii')
+
+    def decode_cursor(self, request):
+        """Return ``(position, reverse)`` from the request's cursor; ``(None, False)`` without one."""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            values = payload['p']
+            if len(values) != len(self.key_fields):
+                raise ValueError(values)
+            position = tuple(field.to_python(value) for field, value in zip(self.key_fields, values))
+            return position, bool(payload.get('r'))
+        except (
+            AttributeError, TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error, DjangoValidationError
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_link(self.next_position, reverse=False),
+            'previous': self.get_link(self.previous_position, reverse=True),
+            'results': data,
+        })
+
+    def get_link(self, position, reverse):
+        if position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
@@ -0,0 +1,54 @@
+"""JSON rendering through orjson.
+
+``FastJSONRenderer`` produces the same bytes as DRF's ``JSONRenderer`` for
+everything the API returns. orjson encodes dicts, lists, strings, numbers and
+UUIDs itself. Dates, times, Decimals, lazy translation strings and anything
+else go through DRF's ``JSONEncoder.default``, exactly as before. Requests for
+indented output (``application/json; indent=4``, the browsable API), non-UTF-8
+output, and values orjson rejects, such as integers beyond 64 bits, are
+rendered by the stock renderer instead.
+
+Floats, which the API only returns as an export job's ``progress``, differ in
+two ways. orjson spells some of them differently, e.g. ``1e-05`` as
+``0.00001`` and ``1e+16`` as ``1e16``; both parse back to the same value. And
+orjson writes NaN and infinity as ``null``, where the stock renderer refuses
+them.
+
+If orjson is not installed, the renderer behaves exactly like DRF's.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Dates and times go through DRF's encoder so their format is unchanged
+ORJSON_OPTIONS = (
+    (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS)
+    if orjson is not None else 0
+)
+
+_encoder = JSONEncoder()
+
+
+def dumps(data):
+    """Encode ``data`` as compact UTF-8 JSON, like ``JSONRenderer`` with default settings."""
+    ret = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+    # Match JSONRenderer: keep the output a strict JavaScript subset
+    return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return dumps(data)
+        except orjson.JSONEncodeError:
+            # Let the stock renderer handle, or report, what orjson cannot
+            return super().render(data, accepted_media_type, renderer_context)
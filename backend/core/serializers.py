@@ -0,0 +1,173 @@
+"""Read-only list serializers built on ``values()`` rows.
+
+A ``ModelSerializer`` builds a model instance for every row, and each of its
+fields, nested serializers included, then walks attributes on that instance.
+On large lists this costs far more than the SQL. ``ValuesSerializer``
+reproduces the output of an existing ``ModelSerializer`` from one
+``values()`` query instead:
+
+- The columns are derived once per class from the serializer's fields. A
+  source such as ``department.name`` becomes ``department__name``, and a
+  nested serializer contributes its fields under the relation's prefix.
+- Each value still goes through the original field's ``to_representation``,
+  so UUIDs, dates and choices are formatted exactly as before.
+- A null relation on a dotted source gives what DRF gives: the field's
+  default, ``None`` if it allows null, or no key at all.
+
+Fields that cannot be read from a column path are rejected when the plan is
+built, with ``ImproperlyConfigured``. Examples are method fields, properties,
+``source='*'``, reverse relations and serializers that override
+``to_representation``.
+
+Views opt in per view by returning a ``ValuesSerializer`` from
+``get_serializer_class`` for GET requests. The ``fields`` and ``expand``
+arguments of core/fieldsets.py are passed on to ``serializer_class``. The
+query then reads only the columns and joins that the selected fields need.
+"""
+import functools
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import models
+from rest_framework import serializers
+from rest_framework.fields import empty
+
+_SKIP = object()
+
+
+def _identity(value):
+    return value
+
+
+def _missing_value(field):
+    # Mirrors Field.get_attribute() when a relation on the source path is null
+    if field.default is not empty:
+        return field.get_default
+    if field.allow_null:
+        return lambda: None
+    if not field.required:
+        return lambda: _SKIP
+    raise ImproperlyConfigured(
+        f'{field.parent.__class__.__name__}.{field.field_name} is required but its source '
+        f'{field.source!r} crosses a nullable relation'
+    )
+
+
+def _converter(field, model_field):
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if not model_field.is_relation:
+            raise ImproperlyConfigured(f'{field.field_name}: {field.source!r} is not a relation')
+        # values() yields the related primary key itself
+        return field.pk_field.to_representation if field.pk_field is not None else _identity
+    if isinstance(field, serializers.RelatedField) or model_field.is_relation:
+        raise ImproperlyConfigured(f'{field.field_name}: only primary key relations can be read from values()')
+    if type(field) in (serializers.CharField, serializers.EmailField):
+        return _identity  # str(value) of a str
+    return field.to_representation
+
+
+def _build_plan(serializer, model, prefix=''):
+    if type(serializer).to_representation is not serializers.Serializer.to_representation:
+        raise ImproperlyConfigured(f'{serializer.__class__.__name__} overrides to_representation()')
+    plan = []
+    for field in serializer._readable_fields:
+        if field.source == '*' or isinstance(field, serializers.SerializerMethodField):
+            raise ImproperlyConfigured(f'{field.field_name}: source {field.source!r} has no column')
+        # Walk the source through the model, collecting the relations that may be null
+        current, guards, path = model, [], prefix
+        try:
+            for attr in field.source_attrs[:-1]:
+                relation = current._meta.get_field(attr)
+                if not (relation.many_to_one or relation.one_to_one) or not relation.concrete:
+                    raise ImproperlyConfigured(f'{field.field_name}: {attr!r} is not a forward relation')
+                if relation.null:
+                    guards.append(path + attr)
+                current, path = relation.related_model, f'{path}{attr}__'
+            model_field = current._meta.get_field(field.source_attrs[-1])
+        except FieldDoesNotExist as exc:
+            raise ImproperlyConfigured(f'{field.field_name}: {exc}') from exc
+        lookup = path + field.source_attrs[-1]
+        missing = _missing_value(field) if guards else None
+
+        if isinstance(field, serializers.ListSerializer):
+            raise ImproperlyConfigured(f'{field.field_name}: nested lists cannot be read from values()')
+        if isinstance(field, serializers.BaseSerializer):
+            if not (model_field.many_to_one or model_field.one_to_one) or not model_field.concrete:
+                raise ImproperlyConfigured(f'{field.field_name}: nested serializers need a forward relation')
+            nested = _build_plan(field, model_field.related_model, lookup + '__')
+            plan.append((field.field_name, lookup, None, guards, missing, nested))
+        else:
+            if model_field.many_to_many or model_field.one_to_many or not model_field.concrete:
+                raise ImproperlyConfigured(f'{field.field_name}: {field.source!r} is not a column')
+            plan.append((field.field_name, lookup, _converter(field, model_field), guards, missing, None))
+    return plan
+
+
+def _lookups(plan):
+    for _name, lookup, _convert, guards, _missing, nested in plan:
+        yield from guards
+        yield lookup
+        if nested is not None:
+            yield from _lookups(nested)
+
+
+def _represent(plan, row):
+    ret = {}
+    for name, lookup, convert, guards, missing, nested in plan:
+        if guards and any(row[guard] is None for guard in guards):
+            value = missing()
+            if value is not _SKIP:
+                ret[name] = value
+            continue
+        value = row[lookup]
+        if value is None:
+            ret[name] = None
+        elif nested is not None:
+            ret[name] = _represent(nested, row)
+        else:
+            ret[name] = convert(value)
+    return ret
+
+
+class ValuesListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        if isinstance(data, models.QuerySet):
+            data = data.values(*self.child.get_lookups())
+        return [self.child.to_representation(row) for row in data]
+
+    async def ato_representation(self, data):
+        """``to_representation`` reading the rows with the async ORM, for async views."""
+        if isinstance(data, models.Manager):
+            data = data.all()
+        if isinstance(data, models.QuerySet):
+            data = data.values(*self.child.get_lookups())
+            return [self.child.to_representation(row) async for row in data]
+        return self.to_representation(data)
+
+
+class ValuesSerializer(serializers.BaseSerializer):
+    """Read-only stand-in for ``serializer_class`` that serializes ``values()`` rows."""
+    serializer_class = None
+
+    class Meta:
+        list_serializer_class = ValuesListSerializer
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        self.fieldset = (fields, expand or frozenset())
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    @functools.lru_cache(maxsize=128)  # fieldsets come from query strings
+    def get_plan(cls, fields=None, expand=frozenset()):
+        if fields is None and not expand:
+            serializer = cls.serializer_class()
+        else:
+            serializer = cls.serializer_class(fields=fields, expand=expand)
+        return _build_plan(serializer, cls.serializer_class.Meta.model)
+
+    def get_lookups(self):
+        return list(dict.fromkeys(_lookups(self.get_plan(*self.fieldset))))
+
+    def to_representation(self, instance):
+        return _represent(self.get_plan(*self.fieldset), instance)
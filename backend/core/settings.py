@@ -45,49 +45,33 @@ INSTALLED_APPS = [
     'crispy_bootstrap5',
     'widget_tweaks',
     'rest_framework',
+    'rest_framework_simplejwt.token_blacklist',
+    'django_filters',
 
     # Local apps
     'accounts.apps.AccountsConfig',
     'companies.apps.CompaniesConfig',
     'employees.apps.EmployeesConfig',
+    'core',
 ]
 
-# Debug middleware class
-class DebugMiddleware:
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
-        if DEBUG:
-            print(f"DEBUG: Request method: {request.method}")
-            print(f"DEBUG: Request path: {request.path}")
-            print(f"DEBUG: Request scheme: {request.scheme}")
-            print(f"DEBUG: Request is_secure: {request.is_secure()}")
-            print(f"DEBUG: HTTP_X_FORWARDED_PROTO: {request.META.get('HTTP_X_FORWARDED_PROTO', 'Not set')}")
-        
-        response = self.get_response(request)
-        
-        if DEBUG:
-            print(f"DEBUG: Response status: {response.status_code}")
-            if hasattr(response, 'url'):
-                print(f"DEBUG: Response redirect URL: {response.url}")
-        
-        return response
-
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
-    'core.settings.DebugMiddleware',  # Debug middleware first
+    'core.middleware.RequestTimingMiddleware',  # First, so it times the whole stack
     # 'django.middleware.security.SecurityMiddleware',  # COMMENTED OUT FOR DEBUGGING
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.WhiteNoiseMiddleware',  # WhiteNoise, async-capable
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
+# Under ASGI, read endpoints are served by async views (see core/asgi.py)
+ASGI_URLCONF = 'core.urls_async'
 
 TEMPLATES = [
     {
@@ -110,26 +94,67 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Always use MySQL
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        # MySQL with a per-process connection pool (see core/db/pool.py)
+        'ENGINE': 'core.db.mysql_pool',
         'NAME': os.getenv('DB_NAME', 'erp_platform'),
         'USER': os.getenv('DB_USER', 'root'),
         'PASSWORD': os.getenv('DB_PASSWORD', 'Srishti123@'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '3306'),
-       
+        # Connections go back to the pool at the end of each request
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            # Keep MAX_SIZE at or above the worker's thread count
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            'TIMEOUT': 30,  # seconds to wait for a free connection
+            'RECYCLE': 3600,  # seconds; keep below the server's wait_timeout
+            'PRE_PING': True,
+        },
     }
 }
 
-# Add debug database logging
-if DEBUG:
-    print(f"DEBUG: settings.DATABASES = {DATABASES}")
+# Read replicas (see core/db/routers.py): comma-separated hosts that share the
+# primary's name and credentials, exposed as aliases replica1, replica2, ...
+for _number, _host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{_number}'] = {
+        **DATABASES['default'],
+        'HOST': _host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith('replica')]
+
+# Tenant shards (see companies/sharding.py): comma-separated hosts holding
+# additional tenants, exposed as aliases shard1, shard2, ... next to default.
+# Run ``migrate --database shardN`` for each.
+for _number, _host in enumerate(filter(None, os.getenv('DB_SHARD_HOSTS', '').split(',')), start=1):
+    DATABASES[f'shard{_number}'] = {
+        **DATABASES['default'],
+        'HOST': _host.strip(),
+    }
+TENANT_SHARDS = ['default', *(alias for alias in DATABASES if alias.startswith('shard'))]
+TENANT_SHARD_CACHE_TTL = 5  # seconds a worker caches where a company lives
+
+DATABASE_ROUTERS = ['core.db.routers.TenantShardRouter', 'core.db.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = 5  # keep a user on the primary this long after they write
+REPLICA_MAX_LAG = 5  # seconds; lagging replicas are skipped
+REPLICA_CHECK_INTERVAL = 5  # seconds between health checks per replica
 
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
+# Finds users on any tenant shard (see accounts/backends.py)
+AUTHENTICATION_BACKENDS = ['accounts.backends.ShardedModelBackend']
+
+# Per-process cache of each user's company (see companies/tenancy.py)
+TENANT_CACHE_SIZE = 1024
+TENANT_CACHE_TTL = 30  # seconds
 
 # Password validation - simplified for debugging
 AUTH_PASSWORD_VALIDATORS = []
 
+# Password hashing pool (see accounts/hashing.py). Workers default to the core count.
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', '0')) or None
+PASSWORD_HASHING_BATCH_THRESHOLD = 8
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -151,6 +176,10 @@ else:
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Background export jobs (see employees/exporters.py)
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '2'))  # threads per process; 0 runs jobs inline
+EXPORT_CHUNK_SIZE = 2000  # rows read per query and between progress updates
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -204,15 +233,17 @@ CORS_ALLOW_CREDENTIALS = True
 
 # Django REST Framework settings
 REST_FRAMEWORK = {
+    # orjson-backed drop-ins for DRF's JSON classes (see core/renderers.py)
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'core.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'core.parsers.FastJSONParser',
     ],
     'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication',
+        'core.authentication.BatchAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -226,12 +257,39 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
-    'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    'AUTH_TOKEN_CLASSES': ('accounts.tokens.ClaimsAccessToken',),
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.serializers.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.ClaimsTokenRefreshSerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'accounts.serializers.ClaimsTokenBlacklistSerializer',
 }
 
-print(f"DEBUG MODE: {DEBUG}")
-print(f"SECURE_SSL_REDIRECT: {SECURE_SSL_REDIRECT}")
-print(f"ALLOWED_HOSTS: {ALLOWED_HOSTS}")
+# How long a user's token version is cached before being re-read (see accounts/tokens.py)
+TOKEN_VERSION_CACHE_TTL = 60  # seconds
+
+# In-process JWT blacklist filter (see accounts/revocation.py)
+TOKEN_REVOCATION_REFRESH_INTERVAL = 5  # seconds between incremental loads
+TOKEN_REVOCATION_REBUILD_INTERVAL = 3600  # seconds between full rebuilds
+TOKEN_REVOCATION_ERROR_RATE = 0.001
+TOKEN_REVOCATION_PRELOAD = True  # build the filter as each worker starts (core/wsgi.py, core/asgi.py)
+
+# Batch endpoint (see core/batch.py)
+BATCH_MAX_REQUESTS = 20
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '4'))  # threads running a batch's reads; 0 runs them in turn
+
+# Employee search (see employees/search.py)
+SEARCH_MIN_TERM_LENGTH = 2  # shorter words of a query are ignored
+SEARCH_MAX_TERMS = 5
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+# Keyset pages of the employee, department and admin user lists (see core/pagination.py)
+LIST_PAGE_SIZE = 100
+LIST_MAX_PAGE_SIZE = 1000
+
+# Request timing (see core/middleware.py)
+REQUEST_TIMING_SAMPLE_RATE = float(os.getenv('REQUEST_TIMING_SAMPLE_RATE', '0.01'))
+REQUEST_TIMING_SLOW_MS = 1000
+REQUEST_TIMING_HEADER = True
 
 LOGGING = {
     'version': 1,
@@ -245,6 +303,13 @@ LOGGING = {
         'handlers': ['console'],
         'level': 'INFO',
     },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
     'django.request': {
         'handlers': ['console'],
         'level': 'DEBUG',  # Set to DEBUG to see all request logs
@@ -0,0 +1,42 @@
+"""Settings for the test suite: ``python manage.py test --settings=core.test_settings``."""
+import os
+
+from .settings import *  # noqa: F401,F403
+
+# SQLite by default; TEST_DATABASE=mysql uses the MySQL server configured in core.settings
+if os.getenv('TEST_DATABASE', 'sqlite') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'test.sqlite3',
+        },
+        # A separate database standing in for a read replica; only tests that
+        # enable DATABASE_REPLICAS use it (see core/tests/test_replica_routing.py)
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'test_replica.sqlite3',
+        },
+        # A second tenant shard; only tests that enable it in TENANT_SHARDS
+        # use it (see companies/tests.py)
+        'shard1': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'test_shard1.sqlite3',
+        },
+    }
+    DATABASE_REPLICAS = []
+    TENANT_SHARDS = ['default']
+
+# Hashing speed is not under test
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Export jobs run inline once the request's transaction commits
+EXPORT_WORKERS = 0
+
+# Batched reads run in the request's thread, inside the test transaction
+BATCH_WORKERS = 0
+
+# Importing core.asgi must not query the database before the test database exists
+TOKEN_REVOCATION_PRELOAD = False
+
+REQUEST_TIMING_SAMPLE_RATE = 0
+REQUEST_TIMING_SLOW_MS = float('inf')
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.revocation import revocation_filter
+from accounts.tokens import ClaimsAccessToken
+from companies.models import Company, Department
+from companies.tenancy import tenant_cache
+from employees.models import Employee
+
+PASSWORD = 'Passw0rd!'
+
+
+def create_tenant(prefix, employees=5, departments=3, admins=2):
+    """Create a company with an owner and the given number of rows of each kind."""
+    owner = User.objects.create_user(
+        email=f'owner@{prefix}.example', password=PASSWORD, role=User.UserRole.PARENT,
+        first_name='Owner', last_name=prefix
+    )
+    company = Company.objects.create(owner=owner, name=f'{prefix} Ltd', registration_number=prefix.upper())
+    owner.company = company
+    owner.save()
+
+    admin_users = [
+        User.objects.create_user(
+            email=f'admin{i}@{prefix}.example', password=PASSWORD, role=User.UserRole.ADMIN,
+            company=company, first_name='Admin', last_name=str(i)
+        )
+        for i in range(max(admins, 1))
+    ]
+    department_rows = [
+        Department.objects.create(company=company, name=f'Department {i}')
+        for i in range(max(departments, 1))
+    ]
+    employee_rows = []
+    for i in range(max(employees, 1)):
+        user = User.objects.create_user(
+            email=f'employee{i}@{prefix}.example', password=PASSWORD, role=User.UserRole.EMPLOYEE,
+            company=company, first_name='Employee', last_name=str(i)
+        )
+        employee_rows.append(Employee.objects.create(
+            user=user, company=company, department=department_rows[i % len(department_rows)], role='Engineer'
+        ))
+
+    return SimpleNamespace(
+        company=company,
+        owner=owner,
+        admin=admin_users[0],
+        admins=admin_users,
+        departments=department_rows,
+        employees=employee_rows,
+        employee=employee_rows[0],
+    )
+
+
+def reset_caches():
+    """Empty the caches that would otherwise carry state from one test to the next."""
+    cache.clear()
+    tenant_cache.clear()
+    revocation_filter.reset()
+
+
+class TenantTestMixin:
+    """Start every test with empty caches and sign API clients in as a user."""
+
+    def setUp(self):
+        super().setUp()
+        reset_caches()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsAccessToken.for_user(user)}')
+        return client
+
+
+class TenantTestCase(TenantTestMixin, TestCase):
+    """A ``TenantTestMixin`` case with a ``tenant`` built from ``prefix`` and ``sizes`` and a small ``other``."""
+
+    prefix = 'acme'
+    sizes = {'employees': 3, 'departments': 2, 'admins': 1}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = create_tenant(cls.prefix, **cls.sizes)
+        cls.other = create_tenant('other', employees=1, departments=1, admins=1)
@@ -0,0 +1,113 @@
+import json
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, AsyncRequestFactory, override_settings
+
+from accounts.tokens import ClaimsAccessToken
+from accounts.views import UserDetailAsyncView, UserDetailView
+from companies.models import CompanyStats, Department
+from core.asgi import AsyncURLConfASGIHandler
+from core.async_views import AsyncReadMixin
+from .factories import TenantTestCase, reset_caches
+
+USER_URL = '/accounts/api/user/'
+DEPARTMENTS_URL = '/companies/api/departments/'
+EMPLOYEES_URL = '/employees/api/employees/'
+
+
+class AsyncViewTests(TenantTestCase):
+    prefix = 'async'
+
+    def token(self, user):
+        return f'Bearer {ClaimsAccessToken.for_user(user)}'
+
+    def get_sync(self, user, url, **headers):
+        return self.client_for(user).get(url, headers=headers)
+
+    def request_async(self, method, user, url, data=None, **headers):
+        if user is not None:
+            headers['Authorization'] = self.token(user)
+        kwargs = {'headers': headers}
+        if method != 'get':
+            kwargs['content_type'] = 'application/json'
+        with override_settings(ROOT_URLCONF='core.urls_async'):
+            response = async_to_sync(getattr(AsyncClient(), method))(url, data, **kwargs)
+            # resolver_match is resolved lazily, against the current URLconf
+            response.view_class = response.resolver_match.func.cls
+        return response
+
+    def get_async(self, user, url, **headers):
+        response = self.request_async('get', user, url, **headers)
+        # Served by the async view, not the sync one behind it
+        self.assertTrue(response.view_class.__name__.endswith('AsyncView'), response.view_class)
+        return response
+
+    def test_responses_match_the_sync_views(self):
+        employee = self.tenant.employee
+        urls = [
+            USER_URL,
+            f'/companies/api/profile/{self.tenant.company.id}/',
+            f'/companies/api/profile/{self.other.company.id}/',
+            DEPARTMENTS_URL,
+            f'{DEPARTMENTS_URL}?fields=id,name',
+            EMPLOYEES_URL,
+            f'{EMPLOYEES_URL}?fields=employee_id,user.email&expand=department',
+            f'{EMPLOYEES_URL}?page_size=2&is_active=true&fields=id',
+            f'{EMPLOYEES_URL}{employee.id}/',
+            f'{EMPLOYEES_URL}{self.other.employee.id}/',
+        ]
+        for user in (self.tenant.owner, self.tenant.admin, employee.user):
+            for url in urls:
+                with self.subTest(role=user.role, url=url):
+                    reset_caches()
+                    expected = self.get_sync(user, url)
+                    reset_caches()
+                    response = self.get_async(user, url)
+                    self.assertEqual(response.status_code, expected.status_code)
+                    self.assertEqual(response.content, expected.content)
+                    self.assertEqual(response.get('ETag'), expected.get('ETag'))
+                    self.assertEqual(response['Content-Type'], expected['Content-Type'])
+
+    def test_company_profile_without_stats(self):
+        CompanyStats.objects.filter(company=self.tenant.company).delete()
+        url = f'/companies/api/profile/{self.tenant.company.id}/'
+        response = self.get_async(self.tenant.owner, url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['employees_count'], 3)
+
+    def test_errors(self):
+        self.assertEqual(self.request_async('get', None, EMPLOYEES_URL).status_code, 401)
+        response = self.request_async('get', None, USER_URL, Authorization='Bearer nonsense')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'token_not_valid')
+        response = self.get_async(self.tenant.owner, f'{EMPLOYEES_URL}?fields=salary')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json())
+
+    def test_not_modified(self):
+        etag = self.get_async(self.tenant.owner, DEPARTMENTS_URL)['ETag']
+        response = self.get_async(self.tenant.owner, DEPARTMENTS_URL, If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_writes_use_the_sync_views(self):
+        response = self.request_async('post', self.tenant.admin, DEPARTMENTS_URL, {'name': 'Async'})
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertTrue(Department.objects.filter(company=self.tenant.company, name='Async').exists())
+        response = self.request_async('patch', self.tenant.owner, USER_URL, {'first_name': 'Renamed'})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['first_name'], 'Renamed')
+
+    def test_asgi_handler_uses_the_async_urlconf(self):
+        request = AsyncRequestFactory().get(USER_URL, headers={'Authorization': self.token(self.tenant.admin)})
+        response = async_to_sync(AsyncURLConfASGIHandler().get_response_async)(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['email'], self.tenant.admin.email)
+        self.assertIs(request.resolver_match.func.cls, UserDetailAsyncView)
+
+    def test_aget_is_required(self):
+        class Unfinished(AsyncReadMixin, UserDetailView):
+            pass
+
+        with self.assertRaises(TypeError):
+            Unfinished()
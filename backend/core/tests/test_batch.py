@@ -0,0 +1,141 @@
+import re
+
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from companies.models import Department
+from .factories import TenantTestCase, TenantTestMixin, create_tenant
+
+BATCH_URL = '/api/batch/'
+
+
+def dashboard(tenant):
+    return [
+        f'/companies/api/profile/{tenant.company.id}/',
+        '/companies/api/departments/?fields=id,name',
+        '/companies/api/admin-users/',
+        '/employees/api/employees/',
+    ]
+
+
+class BatchTests(TenantTestCase):
+    prefix = 'batch'
+
+    def batch(self, user, *requests):
+        response = self.client_for(user).post(BATCH_URL, {'requests': list(requests)}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['responses']
+
+    def test_responses_match_separate_calls(self):
+        client = self.client_for(self.tenant.owner)
+        responses = self.batch(self.tenant.owner, *({'url': url} for url in dashboard(self.tenant)))
+        for url, batched in zip(dashboard(self.tenant), responses):
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(batched['status'], response.status_code)
+                self.assertEqual(batched['body'], response.json())
+                self.assertEqual(batched['headers'].get('ETag'), response.get('ETag'))
+
+    def test_authenticates_once(self):
+        client = self.client_for(self.tenant.owner)
+        separate = 0
+        for url in dashboard(self.tenant):
+            self.setUp()
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url)
+            separate += len(queries)
+        self.setUp()
+        with CaptureQueriesContext(connection) as queries:
+            self.batch(self.tenant.owner, *({'url': url} for url in dashboard(self.tenant)))
+        # The token check and the tenant lookup are not repeated per call
+        self.assertLessEqual(len(queries), separate - 2 * (len(dashboard(self.tenant)) - 1))
+
+    def test_writes_are_seen_by_later_requests(self):
+        created, listed, patched, user = self.batch(
+            self.tenant.admin,
+            {'method': 'POST', 'url': '/companies/api/departments/', 'body': {'name': 'Batched'}},
+            {'url': '/companies/api/departments/?fields=name'},
+            {'method': 'PATCH', 'url': '/accounts/api/user/', 'body': {'phone': '555'}},
+            {'url': '/accounts/api/user/'},
+        )
+        self.assertEqual(created['status'], 201, created)
+        self.assertIn({'name': 'Batched'}, listed['body']['results'])
+        self.assertEqual(patched['status'], 200, patched)
+        self.assertEqual(user['body']['phone'], '555')
+        self.assertTrue(Department.objects.filter(company=self.tenant.company, name='Batched').exists())
+
+    def test_sub_request_errors(self):
+        employee = self.tenant.employee.user
+        forbidden, missing, page, nested, conditional = self.batch(
+            employee,
+            {'method': 'POST', 'url': '/employees/api/exports/', 'body': {'kind': 'employees'}},
+            {'url': '/nowhere/'},
+            {'url': '/accounts/dashboard/'},
+            {'method': 'POST', 'url': BATCH_URL, 'body': {'requests': []}},
+            {'url': f'/employees/api/employees/{self.tenant.employee.id}/', 'headers': {'Accept': 'text/csv'}},
+        )
+        self.assertEqual(forbidden['status'], 403)
+        self.assertEqual(missing['status'], 404)
+        self.assertEqual(page['status'], 400)
+        self.assertEqual(nested['status'], 400)
+        self.assertEqual(conditional['status'], 406)
+
+    def test_not_modified(self):
+        url = '/companies/api/departments/'
+        etag = self.client_for(self.tenant.owner).get(url)['ETag']
+        [response] = self.batch(self.tenant.owner, {'url': url, 'headers': {'If-None-Match': etag}})
+        self.assertEqual(response['status'], 304)
+        self.assertIsNone(response['body'])
+
+    def test_validation(self):
+        client = self.client_for(self.tenant.owner)
+        self.assertEqual(APIClient().post(BATCH_URL, {'requests': [{'url': '/'}]}, format='json').status_code, 401)
+        for payload in (
+            {'requests': []},
+            {'requests': [{'url': 'https://example.com/'}]},
+            {'requests': [{'url': '/', 'method': 'TRACE'}]},
+            {'requests': [{'url': '/accounts/api/user/'}] * 21},
+        ):
+            with self.subTest(payload=str(payload)[:60]):
+                self.assertEqual(client.post(BATCH_URL, payload, format='json').status_code, 400)
+
+
+@override_settings(BATCH_WORKERS=2)
+class ConcurrentBatchTests(TenantTestMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tenant = create_tenant('threads', employees=2, departments=2, admins=1)
+
+    def test_reads_run_on_worker_threads(self):
+        client = self.client_for(self.tenant.owner)
+        urls = dashboard(self.tenant)
+        response = client.post(BATCH_URL, {'requests': [{'url': url} for url in urls]}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        for url, batched in zip(urls, response.json()['responses']):
+            with self.subTest(url=url):
+                self.assertEqual(batched['body'], client.get(url).json())
+
+        response = client.post(BATCH_URL, {'requests': [
+            {'url': '/companies/api/departments/?fields=name'},
+            {'method': 'POST', 'url': '/companies/api/departments/', 'body': {'name': 'Threaded'}},
+            {'url': '/companies/api/departments/?fields=name'},
+        ]}, format='json')
+        before, created, after = response.json()['responses']
+        self.assertEqual(created['status'], 201)
+        self.assertNotIn({'name': 'Threaded'}, before['body']['results'])
+        self.assertIn({'name': 'Threaded'}, after['body']['results'])
+
+    def test_server_timing_counts_the_worker_queries(self):
+        client = self.client_for(self.tenant.owner)
+        payload = {'requests': [{'url': url} for url in dashboard(self.tenant)]}
+
+        def queries():
+            response = client.post(BATCH_URL, payload, format='json')
+            return int(re.search(r'desc="(\d+) queries"', response['Server-Timing'])[1])
+
+        threaded = queries()
+        with override_settings(BATCH_WORKERS=0):
+            in_turn = queries()
+        self.assertGreaterEqual(threaded, in_turn)
@@ -0,0 +1,115 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from core.db.mysql_pool.base import ping
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+
+    def ping(self):
+        if not self.alive:
+            raise OSError('gone away')
+
+    def close(self):
+        self.closed = True
+
+
+class ReconnectingConnection(FakeConnection):
+    """Like PyMySQL's connection: ping() reopens a dead session unless told not to."""
+
+    def __init__(self):
+        super().__init__()
+        self.reconnects = 0
+
+    def ping(self, reconnect=True):
+        if not self.alive:
+            if not reconnect:
+                raise OSError('gone away')
+            self.alive = True
+            self.reconnects += 1
+
+
+def make_pool(**kwargs):
+    return ConnectionPool(
+        connect=FakeConnection, ping=FakeConnection.ping, close=FakeConnection.close, **kwargs
+    )
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def test_released_connection_is_reused(self):
+        pool = make_pool()
+        first, fresh = pool.acquire()
+        self.assertTrue(fresh)
+        pool.release(first)
+        second, fresh = pool.acquire()
+        self.assertIs(second, first)
+        self.assertFalse(fresh)
+        self.assertEqual(pool.stats()['created'], 1)
+        self.assertEqual(pool.stats()['checkouts'], 2)
+
+    def test_dead_connection_is_replaced_on_checkout(self):
+        pool = make_pool()
+        connection, _ = pool.acquire()
+        pool.release(connection)
+        connection.alive = False
+        replacement, fresh = pool.acquire()
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(fresh)
+        self.assertTrue(connection.closed)
+        stats = pool.stats()
+        self.assertEqual((stats['ping_failures'], stats['open']), (1, 1))
+
+    def test_mysql_ping_does_not_reconnect(self):
+        pool = ConnectionPool(connect=ReconnectingConnection, ping=ping, close=FakeConnection.close)
+        connection, _ = pool.acquire()
+        pool.release(connection)
+        connection.alive = False
+        replacement, fresh = pool.acquire()
+        # A fresh connection, which gets init_connection_state, replaces the dead one
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(fresh)
+        self.assertEqual(connection.reconnects, 0)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['ping_failures'], 1)
+
+    def test_old_connection_is_recycled(self):
+        pool = make_pool(recycle=0)
+        connection, _ = pool.acquire()
+        pool.release(connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['open'], 0)
+
+    def test_checkout_waits_for_a_free_connection(self):
+        pool = make_pool(max_size=1, timeout=5)
+        held, _ = pool.acquire()
+        threading.Timer(0.05, pool.release, [held]).start()
+        connection, _ = pool.acquire()
+        self.assertIs(connection, held)
+        stats = pool.stats()
+        self.assertEqual((stats['waits'], stats['open']), (1, 1))
+        self.assertGreater(stats['wait_ms'], 0)
+
+    def test_checkout_times_out_when_pool_is_exhausted(self):
+        pool = make_pool(max_size=1, timeout=0.05)
+        pool.acquire()
+        started = time.monotonic()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_failed_connect_frees_its_slot(self):
+        pool = ConnectionPool(connect=self.fail, ping=FakeConnection.ping, close=FakeConnection.close, max_size=1)
+        with self.assertRaises(OSError):
+            pool.acquire()
+        self.assertEqual(pool.stats()['open'], 0)
+
+    @staticmethod
+    def fail():
+        raise OSError('connection refused')
@@ -0,0 +1,96 @@
+import datetime
+import decimal
+import io
+import json
+import uuid
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+PAYLOADS = {
+    'scalars': [None, True, False, 0, -1, 2 ** 63 - 1, 1.5, 'text', ''],
+    'unicode': {'name': 'Zoë – 東京    "quoted" \\ \x1f', 'emoji': '🙂'},
+    'uuid': {'id': uuid.UUID('12345678-1234-5678-1234-567812345678')},
+    'datetimes': {
+        'aware': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'offset': datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=5, minutes=30))),
+        'naive': datetime.datetime(2024, 5, 1, 12, 30),
+        'now': timezone.now(),
+        'date': datetime.date(2024, 5, 1),
+        'time': datetime.time(8, 15, 0, 500),
+        'duration': datetime.timedelta(days=1, seconds=5),
+    },
+    'decimal': {'salary': decimal.Decimal('1234.50')},
+    'lazy': {'message': _('This field is required.')},
+    'containers': {'tuple': (1, 2), 'set': {3}, 'nested': [{'a': [{'b': None}]}], 'int keys': {1: 'one'}},
+    'big int': {'value': 2 ** 70},
+    'drf': ReturnDict({'results': ReturnList([{'id': 1}], serializer=None)}, serializer=None),
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_output_matches_stock_renderer(self):
+        for name, payload in PAYLOADS.items():
+            with self.subTest(payload=name):
+                self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    def test_indented_output_matches_stock_renderer(self):
+        payload = PAYLOADS['datetimes']
+        for media_type in ('application/json; indent=4', 'application/json; indent=0'):
+            with self.subTest(media_type=media_type):
+                self.assertEqual(
+                    FastJSONRenderer().render(payload, media_type), JSONRenderer().render(payload, media_type)
+                )
+
+    def test_none_renders_empty(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_floats_keep_their_value(self):
+        values = [0.1, 1 / 3, 1e-05, 2.5e-07, 1e16, 1e22, 1.0]
+        rendered = FastJSONRenderer().render({'values': values})
+        self.assertEqual(json.loads(rendered), {'values': values})
+        # Spelled differently from the stock renderer's 1e-05
+        self.assertEqual(FastJSONRenderer().render({'progress': 1e-05}), b'{"progress":0.00001}')
+        self.assertEqual(FastJSONRenderer().render({'progress': float('nan')}), b'{"progress":null}')
+
+    def test_unsupported_objects_fail_like_stock_renderer(self):
+        with self.assertRaises(TypeError):
+            JSONRenderer().render({'value': object()})
+        with self.assertRaises(TypeError):
+            FastJSONRenderer().render({'value': object()})
+
+
+class FastJSONParserTests(SimpleTestCase):
+    def parse(self, parser, body):
+        return parser.parse(io.BytesIO(body), 'application/json', {})
+
+    def test_result_matches_stock_parser(self):
+        bodies = [
+            b'{"a": 1, "b": [true, false, null], "c": "\\u00e9t\\u00e9", "d": 1.25}',
+            '{"name": "Zoë 東京"}'.encode(),
+            b'{"big": 123456789012345678901234567890}',
+            b'[-123456789012345678901234567890]',
+            b' 123456789012345678901234567890',
+            b'{"dup": 1, "dup": 2}',
+            b'[]',
+        ]
+        for body in bodies:
+            with self.subTest(body=body):
+                self.assertEqual(self.parse(FastJSONParser(), body), self.parse(JSONParser(), body))
+
+    def test_errors_match_stock_parser(self):
+        for body in (b'{"a": ', b'{"a": NaN}', b''):
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError) as stock:
+                    self.parse(JSONParser(), body)
+                with self.assertRaises(ParseError) as fast:
+                    self.parse(FastJSONParser(), body)
+                self.assertEqual(str(fast.exception), str(stock.exception))
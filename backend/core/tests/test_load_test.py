@@ -0,0 +1,113 @@
+import json
+from unittest import mock
+from urllib.parse import urlsplit
+
+from django.test import SimpleTestCase
+
+from core.management.commands.load_test import Recorder, VirtualUser, percentile
+
+EMPLOYEES = '/employees/api/employees/'
+
+
+class PercentileTests(SimpleTestCase):
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile(values, 1.0), 100)
+
+        values = list(range(1, 11))
+        self.assertEqual(percentile(values, 0.50), 5)
+        self.assertEqual(percentile(values, 0.95), 10)
+        self.assertEqual(percentile(values, 0.01), 1)
+        self.assertEqual(percentile(values, 0), 1)
+
+    def test_small_samples(self):
+        self.assertIsNone(percentile([], 0.5))
+        self.assertEqual(percentile([7], 0.99), 7)
+        self.assertEqual(percentile([1, 2], 0.5), 1)
+
+
+class FakeUser(VirtualUser):
+    """A virtual user answering from ``responses`` instead of a server."""
+
+    def __init__(self, responses, url='http://testserver'):
+        super().__init__(
+            urlsplit(url), ('user@example.com', 'secret'), Recorder(),
+            deadline=0, think_time=0, timeout=1, seed=0,
+        )
+        self.responses = responses
+        self.requested = []
+
+    def request(self, method, path, body=None, route=None):
+        self.requested.append(path)
+        self.recorder.record(f'{method} {route or path}', 0.01, True)
+        return 200, json.dumps(self.responses[path]).encode()
+
+
+class ReplayTests(SimpleTestCase):
+    def test_lists_load_their_first_page(self):
+        user = FakeUser({
+            EMPLOYEES: {'next': f'http://testserver{EMPLOYEES}?cursor=a', 'previous': None, 'results': [1]},
+        })
+        user.load('GET', EMPLOYEES)
+        self.assertEqual(user.requested, [EMPLOYEES])
+
+    def test_load_more_follows_the_last_next_link(self):
+        user = FakeUser({
+            EMPLOYEES: {'next': f'http://testserver{EMPLOYEES}?cursor=a', 'previous': None, 'results': [1]},
+            f'{EMPLOYEES}?cursor=a': {
+                'next': f'http://testserver{EMPLOYEES}?cursor=b&page_size=1', 'previous': None, 'results': [2],
+            },
+            f'{EMPLOYEES}?cursor=b&page_size=1': {'next': None, 'previous': None, 'results': [3]},
+        })
+        user.load('GET', EMPLOYEES)
+        for _ in range(3):
+            user.load('NEXT', EMPLOYEES)
+        self.assertEqual(user.requested, [
+            EMPLOYEES, f'{EMPLOYEES}?cursor=a', f'{EMPLOYEES}?cursor=b&page_size=1',
+        ])
+        routes = user.recorder.summary(1)['routes']
+        self.assertEqual(routes[f'GET {EMPLOYEES}']['requests'], 1)
+        self.assertEqual(routes[f'GET {EMPLOYEES}?cursor=']['requests'], 2)
+
+    def test_load_more_without_a_list_does_nothing(self):
+        user = FakeUser({})
+        user.load('NEXT', EMPLOYEES)
+        self.assertEqual(user.requested, [])
+
+    def test_other_calls_are_made_once(self):
+        user = FakeUser({'/accounts/api/user/': {'next': 'http://testserver/elsewhere/'}})
+        user.load('GET', '/accounts/api/user/')
+        self.assertEqual(user.requested, ['/accounts/api/user/'])
+
+    def test_load_more_behind_a_path_prefix(self):
+        user = FakeUser({
+            EMPLOYEES: {'next': f'http://testserver/backend{EMPLOYEES}?cursor=a', 'previous': None, 'results': [1]},
+            f'{EMPLOYEES}?cursor=a': {'next': None, 'previous': None, 'results': [2]},
+        }, url='http://testserver/backend/')
+        user.load('GET', EMPLOYEES)
+        user.load('NEXT', EMPLOYEES)
+        # request() adds the prefix back
+        self.assertEqual(user.requested, [EMPLOYEES, f'{EMPLOYEES}?cursor=a'])
+
+
+class PathPrefixTests(SimpleTestCase):
+    def test_routes_are_joined_onto_the_base_path(self):
+        for url, sent in (
+            ('http://testserver', '/accounts/api/user/'),
+            ('http://testserver/', '/accounts/api/user/'),
+            ('http://testserver/backend', '/backend/accounts/api/user/'),
+            ('http://testserver/backend/', '/backend/accounts/api/user/'),
+        ):
+            with self.subTest(url=url):
+                user = VirtualUser(
+                    urlsplit(url), ('user@example.com', 'secret'), Recorder(),
+                    deadline=0, think_time=0, timeout=1, seed=0,
+                )
+                user.connection = mock.Mock()
+                user.connection.getresponse.return_value.read.return_value = b'{}'
+                user.connection.getresponse.return_value.status = 200
+                user.request('GET', '/accounts/api/user/')
+                self.assertEqual(user.connection.request.call_args.args, ('GET', sent))
@@ -0,0 +1,142 @@
+import datetime
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from companies.filters import AdminUserFilter, DepartmentFilter
+from companies.models import Department
+from employees.filters import EmployeeFilter
+from employees.models import Employee
+from .factories import TenantTestCase
+
+EMPLOYEES_URL = '/employees/api/employees/'
+DEPARTMENTS_URL = '/companies/api/departments/'
+ADMIN_USERS_URL = '/companies/api/admin-users/'
+
+
+class KeysetPaginationTests(TenantTestCase):
+    prefix = 'pages'
+    sizes = {'employees': 7, 'departments': 2, 'admins': 3}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        employees = cls.tenant.employees
+        for n, employee in enumerate(employees):
+            employee.joining_date = datetime.date(2024, 1, 1) + datetime.timedelta(days=10 * n)
+            employee.is_active = n % 3 != 0
+            employee.role = 'Manager' if n in (1, 4) else 'Engineer'
+            employee.save()
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.tenant.owner)
+
+    def get(self, url, params=None, status=200):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status, response.content)
+        return response.json()
+
+    def walk(self, url, params):
+        """Follow ``next`` to the end and back along ``previous``; returns the ids in order."""
+        pages = [self.get(url, params)]
+        self.assertIsNone(pages[0]['previous'])
+        while pages[-1]['next']:
+            pages.append(self.get(pages[-1]['next']))
+        forward = [row['id'] for page in pages for row in page['results']]
+
+        backward = []
+        page = pages[-1]
+        while page['previous']:
+            page = self.get(page['previous'])
+            backward = [row['id'] for row in page['results']] + backward
+        self.assertEqual(backward, [row['id'] for page in pages[:-1] for row in page['results']])
+        return forward
+
+    def expected(self, ordering, **filters):
+        employees = Employee.objects.filter(company=self.tenant.company, **filters)
+        sign = '-' if ordering.startswith('-') else ''
+        return [str(pk) for pk in employees.order_by(ordering, f'{sign}id').values_list('id', flat=True)]
+
+    def test_pages_follow_the_keyset_order(self):
+        self.assertEqual(self.walk(EMPLOYEES_URL, {'page_size': 3}), self.expected('-created_at'))
+        self.assertEqual(
+            self.walk(EMPLOYEES_URL, {'page_size': 2, 'ordering': 'created_at', 'fields': 'id'}),
+            self.expected('created_at'),
+        )
+        self.assertEqual(
+            self.walk(EMPLOYEES_URL, {'page_size': 2, 'ordering': '-joining_date'}), self.expected('-joining_date')
+        )
+
+        departments = self.get(DEPARTMENTS_URL, {'page_size': 1, 'fields': 'name'})
+        self.assertEqual(departments['results'], [{'name': 'Department 0'}])
+        self.assertEqual(self.get(departments['next'])['results'], [{'name': 'Department 1'}])
+
+        emails = [self.get(ADMIN_USERS_URL, {'page_size': 5})['results'][n]['email'] for n in range(3)]
+        self.assertEqual(emails, [f'admin{n}@pages.example' for n in range(3)])
+
+    def test_filters(self):
+        department = self.tenant.departments[1]
+        cases = [
+            ({'department': department.id}, '-created_at', {'department': department}),
+            ({'is_active': 'false'}, '-created_at', {'is_active': False}),
+            ({'department': department.id, 'is_active': 'true'}, '-created_at',
+             {'department': department, 'is_active': True}),
+            ({'role': 'Manager'}, '-created_at', {'role': 'Manager'}),
+            ({'joined_after': '2024-01-15', 'joined_before': '2024-02-20', 'ordering': 'joining_date'},
+             'joining_date', {'joining_date__range': (datetime.date(2024, 1, 15), datetime.date(2024, 2, 20))}),
+        ]
+        for params, ordering, filters in cases:
+            with self.subTest(params=params):
+                expected = self.expected(ordering, **filters)
+                self.assertTrue(expected)
+                self.assertEqual(self.walk(EMPLOYEES_URL, {'page_size': 2, **params}), expected)
+
+    def test_unindexed_combinations_are_rejected(self):
+        for params in (
+            {'role': 'Manager', 'department': self.tenant.departments[0].id},
+            {'is_active': 'true', 'ordering': 'joining_date'},
+            {'joined_after': '2024-01-15'},
+            {'ordering': 'created_at,joining_date'},
+            {'ordering': 'role'},
+            {'department': 'not-a-uuid'},
+        ):
+            with self.subTest(params=params):
+                self.get(EMPLOYEES_URL, params, status=400)
+        self.get(EMPLOYEES_URL, {'cursor': 'bogus'}, status=404)
+        self.get(DEPARTMENTS_URL, {'ordering': 'created_at'}, status=400)
+
+    def test_filtersets_match_model_indexes(self):
+        for filterset, model, prefix in (
+            (EmployeeFilter, Employee, ['company']),
+            (DepartmentFilter, Department, ['company']),
+            (AdminUserFilter, User, ['company', 'role']),
+        ):
+            indexed = [list(index.fields) for index in model._meta.indexes]
+            indexed += [list(fields) for fields in model._meta.unique_together]
+            for fields, column in filterset.indexes:
+                with self.subTest(filterset=filterset.__name__, fields=fields, column=column):
+                    self.assertIn([*prefix, *fields, column], indexed)
+
+    def test_deep_pages_seek_instead_of_offset(self):
+        page = self.get(EMPLOYEES_URL, {'page_size': 2})
+        for _ in range(2):
+            page = self.get(page['next'])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(page['next'])
+        select = queries[-1]['sql']
+        self.assertNotIn('OFFSET', select)
+        self.assertIn('LIMIT 3', select)
+        self.assertIn('"employees_employee"."created_at" <', select)
+
+    def test_tenants_are_isolated(self):
+        ids = self.walk(EMPLOYEES_URL, {'page_size': 4})
+        self.assertEqual(len(ids), 7)
+        # Another company's cursor only positions within the caller's rows
+        theirs = self.client_for(self.other.owner)
+        cursor = self.get(EMPLOYEES_URL, {'page_size': 1})['next']
+        response = theirs.get(cursor)
+        self.assertEqual(response.status_code, 200)
+        other_ids = {str(employee.id) for employee in self.other.employees}
+        self.assertTrue({row['id'] for row in response.json()['results']} <= other_ids)
@@ -0,0 +1,375 @@
+"""Per-endpoint SQL query budgets, checked against a small and a large tenant."""
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.tokens import ClaimsRefreshToken
+from companies.models import DataVersionBump, Department
+from employees.models import Employee, ExportJob
+from .factories import PASSWORD, TenantTestCase, create_tenant, reset_caches
+
+SMALL_TENANT = int(os.getenv('QUERY_BUDGET_SMALL_TENANT', '3'))
+LARGE_TENANT = int(os.getenv('QUERY_BUDGET_LARGE_TENANT', '30'))
+
+ROLES = ('PARENT', 'ADMIN', 'EMPLOYEE')
+
+# Maximum queries per (URL name, method), whichever role makes the call.
+# A GET that sends an ETag reads the company's CompanyStats.data_version, and
+# a write to a tenant's data bumps it with one UPDATE after commit (see
+# companies/tenancy.py). Budgets above what they started at say which
+# queries were added.
+BUDGETS = {
+    ('accounts:api_register', 'post'): 8,  # +1: data_version bump
+    ('accounts:api_login', 'post'): 9,
+    ('accounts:api_logout', 'get'): 0,
+    ('accounts:api_user_detail', 'get'): 2,
+    ('accounts:api_user_detail', 'patch'): 4,  # +1: data_version bump
+    ('accounts:token_obtain_pair', 'post'): 2,
+    ('accounts:token_refresh', 'post'): 7,
+    ('accounts:token_blacklist', 'post'): 6,
+    ('accounts:test_view', 'get'): 0,
+    ('companies:api_company_register', 'post'): 4,
+    ('companies:api_company_profile', 'get'): 4,  # +1: data_version for the ETag
+    ('companies:api_company_profile', 'patch'): 6,  # +1: data_version bump
+    ('companies:api_company_dashboard', 'get'): 3,
+    ('companies:api_department_list_create', 'get'): 4,  # +1: data_version for the ETag
+    ('companies:api_department_list_create', 'post'): 5,  # +1: data_version bump
+    ('companies:api_department_detail', 'get'): 3,
+    ('companies:api_department_detail', 'patch'): 5,  # +1: data_version bump
+    # +2: the department's search tokens, data_version bump
+    ('companies:api_department_detail', 'delete'): 8,
+    ('companies:api_admin_user_list_create', 'get'): 4,  # +1: data_version for the ETag
+    ('companies:api_admin_user_list_create', 'post'): 6,  # +1: data_version bump
+    ('companies:api_admin_user_detail', 'get'): 3,
+    # +2: export jobs' requested_by set to NULL, data_version bump
+    ('companies:api_admin_user_detail', 'delete'): 13,
+    ('employees:employee_list_create', 'get'): 3,
+    # +1: search tokens, data_version bump; the department's company is no
+    # longer loaded
+    ('employees:employee_list_create', 'post'): 12,
+    ('employees:employee_detail', 'get'): 3,
+    # +2: search tokens replaced (DELETE and INSERT), data_version bump; the
+    # department's company is no longer loaded
+    ('employees:employee_detail', 'patch'): 7,
+    # +3: search tokens, export jobs' requested_by set to NULL, data_version bump
+    ('employees:employee_detail', 'delete'): 15,
+    # +2: search tokens, data_version bump
+    ('employees:employee_import', 'post'): 15,
+    ('employees:employee_search', 'get'): 4,
+    ('employees:export_list_create', 'get'): 3,
+    ('employees:export_list_create', 'post'): 3,
+    ('employees:export_detail', 'get'): 3,
+    ('employees:export_download', 'get'): 3,
+    # The dashboard's four reads in one batch; 15 queries as separate calls
+    ('api_batch', 'post'): 9,
+}
+
+# Template-based views that render pages this API-only backend does not ship
+NOT_BUDGETED = {
+    'accounts:account_login',
+    'accounts:account_signup',
+    'accounts:dashboard',
+    'accounts:account_logout',
+    'accounts:account_change_password',
+    'accounts:password_change_done',
+    'accounts:account_email',
+}
+
+BUDGETED_NAMESPACES = ('accounts', 'companies', 'employees')
+
+
+def by_role(parent, admin, employee):
+    """Expected status codes for ``assertWithinBudget``, by role."""
+    return {'PARENT': parent, 'ADMIN': admin, 'EMPLOYEE': employee}
+
+
+def _url_names(resolver, namespace=None):
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _url_names(pattern, pattern.namespace or namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name and namespace in BUDGETED_NAMESPACES:
+            yield f'{namespace}:{pattern.name}'
+
+
+class QueryBudgetTests(TenantTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.small = create_tenant('small', employees=SMALL_TENANT, departments=SMALL_TENANT, admins=SMALL_TENANT)
+        cls.large = create_tenant('large', employees=LARGE_TENANT, departments=LARGE_TENANT, admins=LARGE_TENANT)
+        cls.counter = 0
+
+    def unique(self, label):
+        type(self).counter += 1
+        return f'{label}{self.counter}'
+
+    def user_for(self, tenant, role):
+        return {'PARENT': tenant.owner, 'ADMIN': tenant.admin, 'EMPLOYEE': tenant.employee.user}[role]
+
+    def measure(self, user, method, url, data=None, format='json'):
+        client = APIClient() if user is None else self.client_for(user)
+        reset_caches()
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = getattr(client, method)(url, data=data, format=format)
+            # The data version bump runs once the request's transaction
+            # commits; exports run on a worker and are not counted
+            for callback in callbacks:
+                if isinstance(callback, DataVersionBump):
+                    callback()
+        return response, len(queries)
+
+    def assertWithinBudget(self, name, method, build, status=200, roles=ROLES, authenticated=True):
+        """Call ``build(tenant, user)`` -> (url, data[, format]) for both tenants and every role.
+
+        ``status`` is the expected status code, or a dict of them by role.
+        """
+        budget = BUDGETS[(name, method)]
+        for role in roles:
+            expected = status[role] if isinstance(status, dict) else status
+            with self.subTest(endpoint=name, method=method, role=role):
+                counts = []
+                for tenant in (self.small, self.large):
+                    user = self.user_for(tenant, role)
+                    url, data, *format = build(tenant, user)
+                    response, count = self.measure(
+                        user if authenticated else None, method, url, data, *(format or ['json'])
+                    )
+                    body = b'' if response.streaming else response.content[:200]
+                    self.assertEqual(response.status_code, expected, f'{method.upper()} {url}: {body}')
+                    counts.append(count)
+                self.assertEqual(
+                    counts[0], counts[1],
+                    f'{method.upper()} {name} as {role}: query count grows with tenant size {counts}'
+                )
+                self.assertLessEqual(
+                    counts[1], budget,
+                    f'{method.upper()} {name} as {role}: {counts[1]} queries, budget {budget}'
+                )
+
+    def test_every_api_route_has_a_budget(self):
+        budgeted = {name for name, _ in BUDGETS}
+        missing = set(_url_names(get_resolver())) - budgeted - NOT_BUDGETED
+        self.assertFalse(missing, f'Routes without a query budget: {sorted(missing)}')
+
+    # accounts
+
+    def test_accounts_register(self):
+        def build(tenant, user):
+            suffix = self.unique('reg')
+            return '/accounts/api/register/', {
+                'email': f'{suffix}@new.example', 'password': PASSWORD, 'confirm_password': PASSWORD,
+                'first_name': 'New', 'last_name': 'Owner', 'company_name': suffix,
+                'registration_number': suffix.upper(),
+            }
+        self.assertWithinBudget(
+            'accounts:api_register', 'post', build, status=201, roles=['PARENT'], authenticated=False
+        )
+
+    def test_accounts_session_login_logout(self):
+        def login(tenant, user):
+            return '/accounts/api/login/', {'email': user.email, 'password': PASSWORD}
+        self.assertWithinBudget('accounts:api_login', 'post', login, authenticated=False)
+        self.assertWithinBudget(
+            'accounts:api_logout', 'get', lambda tenant, user: ('/accounts/api/logout/', None), authenticated=False
+        )
+
+    def test_accounts_current_user(self):
+        self.assertWithinBudget('accounts:api_user_detail', 'get', lambda tenant, user: ('/accounts/api/user/', None))
+        self.assertWithinBudget(
+            'accounts:api_user_detail', 'patch', lambda tenant, user: ('/accounts/api/user/', {'phone': '12345'})
+        )
+
+    def test_accounts_tokens(self):
+        def obtain(tenant, user):
+            return '/accounts/api/token/', {'email': user.email, 'password': PASSWORD}
+
+        def refresh(tenant, user):
+            return '/accounts/api/token/refresh/', {'refresh': str(ClaimsRefreshToken.for_user(user))}
+
+        def blacklist(tenant, user):
+            return '/accounts/api/token/blacklist/', {'refresh': str(ClaimsRefreshToken.for_user(user))}
+
+        self.assertWithinBudget('accounts:token_obtain_pair', 'post', obtain, authenticated=False)
+        self.assertWithinBudget('accounts:token_refresh', 'post', refresh, authenticated=False)
+        self.assertWithinBudget('accounts:token_blacklist', 'post', blacklist, authenticated=False)
+
+    def test_accounts_test_view(self):
+        self.assertWithinBudget(
+            'accounts:test_view', 'get', lambda tenant, user: ('/accounts/test/', None), authenticated=False
+        )
+
+    # companies
+
+    def test_company_register(self):
+        counts = []
+        for tenant in (self.small, self.large):
+            suffix = self.unique('co')
+            # Registration needs a parent who does not own a company yet
+            parent = User.objects.create_user(
+                email=f'{suffix}@new.example', password=PASSWORD, role=User.UserRole.PARENT
+            )
+            response, count = self.measure(
+                parent, 'post', '/companies/api/register/', {'name': suffix, 'registration_number': suffix.upper()}
+            )
+            self.assertEqual(response.status_code, 201, response.content)
+            counts.append(count)
+        self.assertEqual(counts[0], counts[1], f'query count grows with tenant size {counts}')
+        self.assertLessEqual(counts[1], BUDGETS[('companies:api_company_register', 'post')])
+
+    def test_company_profile(self):
+        def profile(tenant, user):
+            return f'/companies/api/profile/{tenant.company.id}/', {'phone': '555'}
+        self.assertWithinBudget('companies:api_company_profile', 'get', profile)
+        self.assertWithinBudget('companies:api_company_profile', 'patch', profile, status=by_role(200, 403, 403))
+
+    def test_company_dashboard(self):
+        self.assertWithinBudget(
+            'companies:api_company_dashboard', 'get', lambda tenant, user: ('/companies/api/dashboard/', None),
+            status=by_role(200, 200, 403),
+        )
+
+    def test_department_list_create(self):
+        def create(tenant, user):
+            return '/companies/api/departments/', {'name': self.unique('Dept')}
+        self.assertWithinBudget(
+            'companies:api_department_list_create', 'get', lambda tenant, user: ('/companies/api/departments/', None)
+        )
+        self.assertWithinBudget(
+            'companies:api_department_list_create', 'post', create, status=by_role(201, 201, 403)
+        )
+
+    def test_department_detail(self):
+        def existing(tenant, user):
+            return f'/companies/api/departments/{tenant.departments[0].id}/', {'description': 'Updated'}
+
+        def fresh(tenant, user):
+            department = Department.objects.create(company=tenant.company, name=self.unique('Temp'))
+            return f'/companies/api/departments/{department.id}/', None
+
+        self.assertWithinBudget('companies:api_department_detail', 'get', existing, status=by_role(200, 200, 404))
+        self.assertWithinBudget('companies:api_department_detail', 'patch', existing, status=by_role(200, 200, 404))
+        self.assertWithinBudget('companies:api_department_detail', 'delete', fresh, status=by_role(204, 204, 404))
+
+    def test_admin_user_list_create(self):
+        def create(tenant, user):
+            suffix = self.unique('admin')
+            return '/companies/api/admin-users/', {
+                'email': f'{suffix}@new.example', 'first_name': 'New', 'last_name': 'Admin',
+                'password': PASSWORD, 'company_id': str(tenant.company.id),
+            }
+        self.assertWithinBudget(
+            'companies:api_admin_user_list_create', 'get', lambda tenant, user: ('/companies/api/admin-users/', None)
+        )
+        self.assertWithinBudget(
+            'companies:api_admin_user_list_create', 'post', create, status=by_role(201, 403, 403)
+        )
+
+    def test_admin_user_detail(self):
+        def fresh(tenant, user):
+            suffix = self.unique('admin')
+            admin = User.objects.create_user(
+                email=f'{suffix}@new.example', password=PASSWORD, role=User.UserRole.ADMIN, company=tenant.company
+            )
+            return f'/companies/api/admin-users/{admin.id}/', None
+
+        self.assertWithinBudget(
+            'companies:api_admin_user_detail', 'get',
+            lambda tenant, user: (f'/companies/api/admin-users/{tenant.admins[-1].id}/', None),
+            status=by_role(200, 404, 404),
+        )
+        self.assertWithinBudget('companies:api_admin_user_detail', 'delete', fresh, status=by_role(204, 404, 404))
+
+    # employees
+
+    def test_employee_list_create(self):
+        def create(tenant, user):
+            suffix = self.unique('emp')
+            return '/employees/api/employees/', {
+                'email': f'{suffix}@new.example', 'first_name': 'New', 'last_name': 'Hire',
+                'password': PASSWORD, 'company_id': str(tenant.company.id), 'role': 'Analyst',
+                'department': str(tenant.departments[0].id),
+            }
+        self.assertWithinBudget(
+            'employees:employee_list_create', 'get', lambda tenant, user: ('/employees/api/employees/', None)
+        )
+        self.assertWithinBudget('employees:employee_list_create', 'post', create, status=201)
+
+    def test_employee_detail(self):
+        def existing(tenant, user):
+            return f'/employees/api/employees/{tenant.employee.id}/', {'role': 'Lead'}
+
+        def fresh(tenant, user):
+            suffix = self.unique('emp')
+            hire = User.objects.create_user(email=f'{suffix}@new.example', password=PASSWORD, company=tenant.company)
+            employee = Employee.objects.create(user=hire, company=tenant.company, role='Temp')
+            return f'/employees/api/employees/{employee.id}/', None
+
+        self.assertWithinBudget('employees:employee_detail', 'get', existing)
+        self.assertWithinBudget('employees:employee_detail', 'patch', existing)
+        self.assertWithinBudget('employees:employee_detail', 'delete', fresh, status=by_role(204, 204, 404))
+
+    def test_employee_search(self):
+        self.assertWithinBudget(
+            'employees:employee_search', 'get',
+            lambda tenant, user: ('/employees/api/employees/search/?q=employee eng', None),
+            status=by_role(200, 200, 403),
+        )
+
+    def test_employee_import(self):
+        def build(tenant, user):
+            rows = '\n'.join(
+                f"{self.unique('imp')}@new.example,Imported,Person,{PASSWORD},Analyst,{tenant.departments[0].name}"
+                for _ in range(3)
+            )
+            upload = SimpleUploadedFile(
+                'employees.csv', f'email,first_name,last_name,password,role,department\n{rows}\n'.encode()
+            )
+            return '/employees/api/employees/import/', {'file': upload}, 'multipart'
+        self.assertWithinBudget('employees:employee_import', 'post', build, status=by_role(200, 200, 403))
+
+    def test_exports(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+
+        def finished(tenant, user):
+            job = ExportJob(company=tenant.company, status=ExportJob.Status.DONE)
+            job.file.save(f'{self.unique("export")}.csv.gz', ContentFile(b''))
+            return f'/employees/api/exports/{job.id}/', None
+
+        def download(tenant, user):
+            url, data = finished(tenant, user)
+            return f'{url}download/', data
+
+        with override_settings(MEDIA_ROOT=media_root):
+            self.assertWithinBudget(
+                'employees:export_list_create', 'post',
+                lambda tenant, user: ('/employees/api/exports/', {'kind': 'directory', 'format': 'ndjson'}),
+                status=by_role(202, 202, 403),
+            )
+            self.assertWithinBudget(
+                'employees:export_list_create', 'get', lambda tenant, user: ('/employees/api/exports/', None),
+                status=by_role(200, 200, 403),
+            )
+            self.assertWithinBudget('employees:export_detail', 'get', finished, status=by_role(200, 200, 403))
+            self.assertWithinBudget('employees:export_download', 'get', download, status=by_role(200, 200, 403))
+
+    # batch
+
+    def test_batch(self):
+        def dashboard(tenant, user):
+            return '/api/batch/', {'requests': [
+                {'url': f'/companies/api/profile/{tenant.company.id}/'},
+                {'url': '/companies/api/departments/'},
+                {'url': '/companies/api/admin-users/'},
+                {'url': '/employees/api/employees/'},
+            ]}
+        self.assertWithinBudget('api_batch', 'post', dashboard)
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import override_settings
+
+from accounts.models import User
+from companies.models import Company, CompanyStats, Department
+from core.db.routers import ReplicaRouter, replica_monitor
+from employees.models import Employee
+from .factories import TenantTestCase
+
+DEPARTMENTS_URL = '/companies/api/departments/'
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_PIN_SECONDS=60)
+class ReplicaRoutingTests(TenantTestCase):
+    databases = {'default', 'replica'}
+    prefix = 'replica'
+    sizes = {'employees': 2, 'departments': 2, 'admins': 2}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Copy the tenants to the replica, plus one department the primary does
+        # not have, so each response shows which database served it.
+        for model in (User, Company, CompanyStats, Department, Employee):
+            model.objects.using('replica').bulk_create(model.objects.all())
+        Department.objects.using('replica').bulk_create([
+            Department(company=cls.tenant.company, name='Replica only')
+        ])
+
+    def setUp(self):
+        super().setUp()
+        replica_monitor.reset()
+
+    def department_names(self, user):
+        response = self.client_for(user).get(DEPARTMENTS_URL)
+        self.assertEqual(response.status_code, 200)
+        return {department['name'] for department in response.json()['results']}
+
+    def test_safe_reads_use_replica(self):
+        self.assertIn('Replica only', self.department_names(self.tenant.admin))
+
+    def test_writer_reads_own_writes_from_primary(self):
+        response = self.client_for(self.tenant.admin).post(DEPARTMENTS_URL, {'name': 'Just added'}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        names = self.department_names(self.tenant.admin)
+        self.assertIn('Just added', names)
+        self.assertNotIn('Replica only', names)
+        # Other users are not pinned
+        self.assertIn('Replica only', self.department_names(self.tenant.owner))
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self):
+        self.client_for(self.tenant.admin).post(DEPARTMENTS_URL, {'name': 'Just added'}, format='json')
+        self.assertIn('Replica only', self.department_names(self.tenant.admin))
+
+    def test_lagging_replica_is_skipped(self):
+        with mock.patch('core.db.routers.replica_lag', return_value=60):
+            self.assertNotIn('Replica only', self.department_names(self.tenant.admin))
+
+    def test_unreachable_replica_is_skipped(self):
+        with mock.patch('core.db.routers.replica_lag', side_effect=OperationalError('down')):
+            self.assertNotIn('Replica only', self.department_names(self.tenant.admin))
+
+    def test_views_without_replica_reads_use_primary(self):
+        response = self.client_for(self.tenant.admin).get(f'/companies/api/departments/{self.tenant.departments[0].id}/')
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0, using='replica'):
+            self.client_for(self.tenant.admin).get(f'/companies/api/departments/{self.tenant.departments[0].id}/')
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(ReplicaRouter().db_for_read(Department), 'default')
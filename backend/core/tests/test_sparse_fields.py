@@ -0,0 +1,87 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from companies.views import AdminUserListCreateView, DepartmentListCreateView
+from employees.models import Employee
+from employees.views import EmployeeListCreateView
+from .factories import TenantTestCase
+
+EMPLOYEES_URL = '/employees/api/employees/'
+DEPARTMENTS_URL = '/companies/api/departments/'
+ADMIN_USERS_URL = '/companies/api/admin-users/'
+
+
+class SparseFieldsTests(TenantTestCase):
+    prefix = 'sparse'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Employee.objects.filter(pk=cls.tenant.employees[2].pk).update(department=None)
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.tenant.owner)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['results'], queries[-1]['sql']
+
+    def test_fields_trim_json_and_sql(self):
+        rows, sql = self.get(EMPLOYEES_URL, fields='id,employee_id,user.email')
+        self.assertEqual(len(rows), 3)
+        for row in rows:
+            self.assertEqual(list(row), ['id', 'user', 'employee_id'])
+            self.assertEqual(list(row['user']), ['email'])
+        self.assertNotIn('companies_department', sql)
+        self.assertNotIn('"role"', sql)
+
+        rows, sql = self.get(DEPARTMENTS_URL, fields='id,name')
+        self.assertEqual([list(row) for row in rows], [['id', 'name']] * 2)
+        self.assertNotIn('JOIN', sql)
+
+        rows, _ = self.get(ADMIN_USERS_URL, fields='email')
+        self.assertEqual(rows, [{'email': self.tenant.admin.email}])
+
+    def test_expand(self):
+        rows, _ = self.get(EMPLOYEES_URL, expand='department,company', fields='employee_id,department,company.name')
+        by_id = {row['employee_id']: row for row in rows}
+        employee = self.tenant.employees[0]
+        self.assertEqual(by_id[employee.employee_id]['department'], {
+            'id': str(employee.department.id), 'name': employee.department.name,
+        })
+        self.assertIsNone(by_id[self.tenant.employees[2].employee_id]['department'])
+        self.assertEqual(by_id[employee.employee_id]['company'], {'name': self.tenant.company.name})
+
+        rows, _ = self.get(ADMIN_USERS_URL, expand='company', fields='id,company')
+        self.assertEqual(rows[0]['company'], {'id': str(self.tenant.company.id), 'name': self.tenant.company.name})
+
+    def test_values_and_instance_paths_agree(self):
+        for view, url, params in (
+            (EmployeeListCreateView, EMPLOYEES_URL,
+             {'fields': 'id,user.email,department.name,department_name', 'expand': 'company'}),
+            (DepartmentListCreateView, DEPARTMENTS_URL, {'fields': 'id,name,company', 'expand': 'company'}),
+            (AdminUserListCreateView, ADMIN_USERS_URL, {'fields': 'id,email,company.id'}),
+        ):
+            with self.subTest(url=url):
+                fast = self.client.get(url, params)
+                with mock.patch.object(view, 'values_list', False):
+                    stock = self.client.get(url, params)
+                self.assertEqual(fast.status_code, 200, fast.content)
+                self.assertEqual(fast.content, stock.content)
+
+    def test_unknown_names_are_rejected(self):
+        for params in ({'fields': 'id,salary'}, {'fields': 'user.salary'}, {'fields': 'role.name'}, {'expand': 'user'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(EMPLOYEES_URL, params).status_code, 400)
+
+    def test_fieldsets_get_their_own_etag(self):
+        full = self.client.get(DEPARTMENTS_URL)['ETag']
+        sparse = self.client.get(DEPARTMENTS_URL, {'fields': 'id'})
+        self.assertNotEqual(sparse['ETag'], full)
+        response = self.client.get(DEPARTMENTS_URL, {'fields': 'id'}, HTTP_IF_NONE_MATCH=full)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,109 @@
+import json
+import re
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from accounts.models import User
+from core.middleware import RequestTimingMiddleware
+
+SERVER_TIMING = re.compile(r'^db;dur=(\d+\.\d);desc="(\d+) queries", total;dur=(\d+\.\d)$')
+
+
+def view(request):
+    User.objects.count()
+    User.objects.exists()
+    return HttpResponse(status=201)
+
+
+async def async_view(request):
+    await sync_to_async(User.objects.count)()
+    await sync_to_async(User.objects.exists)()
+    return HttpResponse(status=201)
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=0, REQUEST_TIMING_SLOW_MS=float('inf'), REQUEST_TIMING_HEADER=True)
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/timed/')
+
+    def assertServerTiming(self, response, queries):
+        match = SERVER_TIMING.match(response['Server-Timing'])
+        self.assertIsNotNone(match, response['Server-Timing'])
+        db_ms, count, total_ms = float(match[1]), int(match[2]), float(match[3])
+        self.assertEqual(count, queries)
+        self.assertLessEqual(db_ms, total_ms)
+
+    def assertLogged(self, logs, queries):
+        self.assertEqual(len(logs.records), 1)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['method'], 'GET')
+        self.assertEqual(line['path'], '/timed/')
+        self.assertEqual(line['status'], 201)
+        self.assertEqual(line['queries'], queries)
+        self.assertLessEqual(line['db_ms'], line['total_ms'])
+
+    def test_server_timing_header(self):
+        response = RequestTimingMiddleware(view)(self.request)
+        self.assertEqual(response.status_code, 201)
+        self.assertServerTiming(response, queries=2)
+
+    async def test_server_timing_header_async(self):
+        middleware = RequestTimingMiddleware(async_view)
+        response = await middleware(self.request)
+        self.assertEqual(response.status_code, 201)
+        self.assertServerTiming(response, queries=2)
+
+    @override_settings(REQUEST_TIMING_HEADER=False)
+    def test_header_can_be_turned_off(self):
+        response = RequestTimingMiddleware(view)(self.request)
+        self.assertNotIn('Server-Timing', response)
+
+    def test_unsampled_requests_are_not_logged(self):
+        with self.assertNoLogs('core.timing'):
+            RequestTimingMiddleware(view)(self.request)
+
+    async def test_unsampled_requests_are_not_logged_async(self):
+        with self.assertNoLogs('core.timing'):
+            await RequestTimingMiddleware(async_view)(self.request)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0.25)
+    def test_sampled_requests_are_logged(self):
+        middleware = RequestTimingMiddleware(view)
+        with mock.patch('core.middleware.random.random', return_value=0.5), self.assertNoLogs('core.timing'):
+            middleware(self.request)
+        with mock.patch('core.middleware.random.random', return_value=0.1), self.assertLogs('core.timing') as logs:
+            middleware(self.request)
+        self.assertLogged(logs, queries=2)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0.25)
+    async def test_sampled_requests_are_logged_async(self):
+        middleware = RequestTimingMiddleware(async_view)
+        with mock.patch('core.middleware.random.random', return_value=0.5), self.assertNoLogs('core.timing'):
+            await middleware(self.request)
+        with mock.patch('core.middleware.random.random', return_value=0.1), self.assertLogs('core.timing') as logs:
+            await middleware(self.request)
+        self.assertLogged(logs, queries=2)
+
+    @override_settings(REQUEST_TIMING_SLOW_MS=0)
+    def test_slow_requests_are_always_logged(self):
+        with self.assertLogs('core.timing') as logs:
+            RequestTimingMiddleware(view)(self.request)
+        self.assertLogged(logs, queries=2)
+
+    @override_settings(REQUEST_TIMING_SLOW_MS=0)
+    async def test_slow_requests_are_always_logged_async(self):
+        with self.assertLogs('core.timing') as logs:
+            await RequestTimingMiddleware(async_view)(self.request)
+        self.assertLogged(logs, queries=2)
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=1)
+    def test_full_stack_logs_the_view_name(self):
+        with self.assertLogs('core.timing') as logs:
+            response = self.client.get('/accounts/api/user/')
+        self.assertServerTiming(response, queries=0)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['status'], 401)
+        self.assertIsNotNone(line['view'])
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import User
+from companies.serializers import AdminUserSerializer, AdminUserValuesSerializer
+from companies.tenancy import tenant_cache
+from companies.views import AdminUserListCreateView
+from core.serializers import ValuesSerializer
+from employees.models import Employee
+from employees.serializers import EmployeeSerializer, EmployeeValuesSerializer
+from employees.views import EmployeeListCreateView
+from .factories import TenantTestCase
+
+EMPLOYEES_URL = '/employees/api/employees/'
+ADMIN_USERS_URL = '/companies/api/admin-users/'
+
+
+class ValuesSerializerTests(TenantTestCase):
+    prefix = 'values'
+    sizes = {'employees': 4, 'departments': 2, 'admins': 2}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # A null department drops department_name, like EmployeeSerializer does
+        Employee.objects.filter(pk=cls.tenant.employees[1].pk).update(department=None)
+        User.objects.filter(pk=cls.tenant.admins[1].pk).update(phone='+1 555 0100', is_active=False)
+
+    def assertSameOutput(self, values_serializer, serializer, queryset):
+        expected = serializer(queryset, many=True).data
+        with self.assertNumQueries(1):
+            data = values_serializer(queryset, many=True).data
+        self.assertEqual(data, expected)
+        self.assertEqual(JSONRenderer().render(data), JSONRenderer().render(expected))
+
+    def test_employee_output_matches(self):
+        queryset = Employee.objects.filter(company=self.tenant.company).select_related('user', 'company', 'department')
+        self.assertSameOutput(EmployeeValuesSerializer, EmployeeSerializer, queryset)
+        row = EmployeeValuesSerializer(queryset, many=True).data[[e.pk for e in queryset].index(self.tenant.employees[1].pk)]
+        self.assertNotIn('department_name', row)
+        self.assertIsNone(row['department'])
+
+    def test_admin_user_output_matches(self):
+        queryset = User.objects.filter(company=self.tenant.company, role=User.UserRole.ADMIN)
+        self.assertSameOutput(AdminUserValuesSerializer, AdminUserSerializer, queryset)
+
+    def test_list_views_match_model_serializers(self):
+        client = self.client_for(self.tenant.owner)
+        for view, url in ((EmployeeListCreateView, EMPLOYEES_URL), (AdminUserListCreateView, ADMIN_USERS_URL)):
+            with self.subTest(url=url):
+                fast = client.get(url)
+                with mock.patch.object(view, 'values_list', False):
+                    tenant_cache.clear()
+                    stock = client.get(url)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, stock.content)
+
+    def test_unsupported_fields_are_rejected(self):
+        class MethodSerializer(serializers.ModelSerializer):
+            full_name = serializers.SerializerMethodField()
+
+            class Meta:
+                model = User
+                fields = ['id', 'full_name']
+
+            def get_full_name(self, user):
+                return user.get_full_name()
+
+        class PropertySerializer(serializers.ModelSerializer):
+            full_name = serializers.CharField(read_only=True)
+
+            class Meta:
+                model = Employee
+                fields = ['id', 'full_name']
+
+        for serializer_class in (MethodSerializer, PropertySerializer):
+            values_serializer = type('Values', (ValuesSerializer,), {'serializer_class': serializer_class})
+            with self.subTest(serializer=serializer_class.__name__), self.assertRaises(ImproperlyConfigured):
+                values_serializer.get_plan()
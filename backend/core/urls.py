@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from .batch import BatchView
 # from django.views.generic import TemplateView # Removed TemplateView
 
 urlpatterns = [
@@ -17,6 +18,9 @@ urlpatterns = [
     # App URLs
     path('companies/', include('companies.urls')),
     path('employees/', include('employees.urls')),
+
+    # Several API calls in one request (see core/batch.py)
+    path('api/batch/', BatchView.as_view(), name='api_batch'),
 ]
 
 # Debug toolbar and static/media files in development
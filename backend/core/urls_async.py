@@ -0,0 +1,22 @@
+"""URLconf used under ASGI (see core/asgi.py).
+
+The read endpoints below are served by their async views (see
+core/async_views.py). They sit at the same paths as their sync views in
+``core.urls`` and come first, so they take precedence. Every other URL,
+and every URL name, comes from ``core.urls``.
+"""
+from django.urls import path
+
+from accounts.views import UserDetailAsyncView
+from companies.views import CompanyDetailAsyncView, DepartmentListAsyncView
+from employees.views import EmployeeDetailAsyncView, EmployeeListAsyncView
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('accounts/api/user/', UserDetailAsyncView.as_view()),
+    path('companies/api/profile/<uuid:id>/', CompanyDetailAsyncView.as_view()),
+    path('companies/api/departments/', DepartmentListAsyncView.as_view()),
+    path('employees/api/employees/', EmployeeListAsyncView.as_view()),
+    path('employees/api/employees/<uuid:id>/', EmployeeDetailAsyncView.as_view()),
+    *sync_urlpatterns,
+]
@@ -13,4 +13,9 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_wsgi_application() 
\ No newline at end of file
+application = get_wsgi_application()
+
+# Each worker starts with the JWT blacklist filter loaded (see accounts/revocation.py)
+from accounts.revocation import revocation_filter  # noqa: E402
+
+revocation_filter.preload()
@@ -0,0 +1,178 @@
+"""Background exports of a company's employees or user directory.
+
+``start_export`` queues an ``ExportJob`` once the creating transaction
+commits. Jobs run on a small per-process thread pool (``EXPORT_WORKERS``
+threads; ``0`` runs them inline, for tests and development), and
+``run_export_jobs`` picks up jobs left pending by a restart.
+
+An export never holds the company's rows in memory at once. Rows are read in
+keyset pages of ``EXPORT_CHUNK_SIZE`` primary keys, each streamed with
+``iterator(chunk_size=...)``. Paging matters on MySQL, whose driver buffers a
+whole result set even for ``iterator()``. The rows are encoded one at a time
+into a gzip-compressed CSV or NDJSON file under ``MEDIA_ROOT/exports/``.
+``rows_written`` is saved after every page, so clients can poll progress.
+"""
+import csv
+import gzip
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import User
+from companies.models import Company
+from core.db.routers import use_shard
+from core.renderers import FastJSONRenderer
+from .models import Employee, ExportJob
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FAILED = 'The export failed. Please try again.'
+
+# (header, values() lookup) per export kind. The employee columns match the
+# import format (see importers.py), apart from the password.
+EXPORT_COLUMNS = {
+    ExportJob.Kind.EMPLOYEES: [
+        ('employee_id', 'employee_id'),
+        ('email', 'user__email'),
+        ('first_name', 'user__first_name'),
+        ('last_name', 'user__last_name'),
+        ('phone', 'user__phone'),
+        ('role', 'role'),
+        ('department', 'department__name'),
+        ('date_of_birth', 'date_of_birth'),
+        ('joining_date', 'joining_date'),
+        ('is_active', 'is_active'),
+    ],
+    ExportJob.Kind.DIRECTORY: [
+        ('email', 'email'),
+        ('first_name', 'first_name'),
+        ('last_name', 'last_name'),
+        ('phone', 'phone'),
+        ('role', 'role'),
+        ('employee_id', 'employee_profile__employee_id'),
+        ('job_title', 'employee_profile__role'),
+        ('department', 'employee_profile__department__name'),
+        ('is_active', 'is_active'),
+    ],
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'EXPORT_WORKERS', 2), thread_name_prefix='export'
+            )
+        return _executor
+
+
+def start_export(job):
+    """Run ``job`` in the background once the current transaction commits."""
+    using = job._state.db or router.db_for_write(ExportJob, instance=job)
+    if getattr(settings, 'EXPORT_WORKERS', 2) == 0:
+        transaction.on_commit(lambda: ExportRunner(job.pk, using).run(), using=using)
+    else:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job.pk, using), using=using)
+
+
+def _run_in_thread(job_id, using):
+    try:
+        ExportRunner(job_id, using).run()
+    finally:
+        # Worker threads have their own connections; do not leave them open
+        connections.close_all()
+
+
+class ExportRunner:
+    """Writes the file for one export job on the ``using`` database."""
+
+    def __init__(self, job_id, using, chunk_size=None):
+        self.job_id = job_id
+        self.using = using
+        self.chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+        self.jobs = ExportJob.objects.using(using).filter(pk=job_id)
+
+    def run(self):
+        # Claiming with a conditional UPDATE keeps two workers off the same job
+        if not self.jobs.filter(status=ExportJob.Status.PENDING).update(
+            status=ExportJob.Status.RUNNING, started_at=timezone.now()
+        ):
+            return
+        job = self.jobs.get()
+        name = f'exports/{job.company_id}/{job.pk}.{job.format}.gz'
+        path = job.file.storage.path(name)
+        partial = f'{path}.part'
+        try:
+            with use_shard(self.using):
+                queryset = self.queryset(job)
+                self.jobs.update(rows_total=queryset.count())
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Level 6 is gzip's default: most of level 9's ratio at a fraction of its cost
+                with gzip.open(partial, 'wb', compresslevel=6) as output:
+                    written = self.write(job, queryset, output)
+            os.replace(partial, path)
+        except Exception:
+            logger.exception('Export job %s failed', job.pk)
+            if os.path.exists(partial):
+                os.remove(partial)
+            # The details are in the log; database and OS errors are not for clients
+            self.jobs.update(status=ExportJob.Status.FAILED, error=EXPORT_FAILED, finished_at=timezone.now())
+            return
+        self.jobs.update(
+            status=ExportJob.Status.DONE, file=name, rows_written=written, finished_at=timezone.now()
+        )
+
+    def queryset(self, job):
+        if job.kind == ExportJob.Kind.DIRECTORY:
+            # The owner belongs to the company even where its company column is unset
+            owner_id = Company.objects.filter(pk=job.company_id).values_list('owner_id', flat=True).first()
+            return User.objects.filter(Q(company_id=job.company_id) | Q(pk=owner_id))
+        return Employee.objects.filter(company_id=job.company_id)
+
+    def rows(self, queryset, lookups):
+        """Yield the rows of ``queryset`` as tuples of ``lookups``, one keyset page at a time."""
+        queryset = queryset.order_by('pk')
+        last_pk = None
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            count = 0
+            for row in page.values_list('pk', *lookups)[:self.chunk_size].iterator(chunk_size=self.chunk_size):
+                count += 1
+                last_pk = row[0]
+                yield row[1:]
+            if count < self.chunk_size:
+                return
+
+    def write(self, job, queryset, output):
+        headers, lookups = zip(*EXPORT_COLUMNS[job.kind])
+        written = 0
+        if job.format == ExportJob.Format.CSV:
+            text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+            writer = csv.writer(text)
+            writer.writerow(headers)
+            encode = writer.writerow
+        else:
+            renderer = FastJSONRenderer()
+
+            def encode(row):
+                output.write(renderer.render(dict(zip(headers, row))) + b'\n')
+        for row in self.rows(queryset, lookups):
+            encode(row)
+            written += 1
+            if written % self.chunk_size == 0:
+                self.jobs.update(rows_written=written)
+        if job.format == ExportJob.Format.CSV:
+            text.flush()
+            text.detach()
+        return written
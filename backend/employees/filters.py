@@ -0,0 +1,29 @@
+import django_filters
+
+from core.filters import IndexedFilterSet
+from .models import Employee
+
+
+class EmployeeFilter(IndexedFilterSet):
+    """``?department=``, ``?is_active=``, ``?role=``, ``?joined_after=``/``?joined_before=`` and ``?ordering=``."""
+    department = django_filters.UUIDFilter(field_name='department')
+    is_active = django_filters.BooleanFilter()
+    role = django_filters.CharFilter()
+    joined_after = django_filters.DateFilter(field_name='joining_date', lookup_expr='gte')
+    joined_before = django_filters.DateFilter(field_name='joining_date', lookup_expr='lte')
+    ordering = django_filters.OrderingFilter(fields=('created_at', 'joining_date'))
+
+    default_ordering = '-created_at'
+    # Each is an index of Employee.Meta.indexes, after company
+    indexes = [
+        ((), 'created_at'),
+        (('department',), 'created_at'),
+        (('is_active',), 'created_at'),
+        (('department', 'is_active'), 'created_at'),
+        (('role',), 'created_at'),
+        ((), 'joining_date'),
+    ]
+
+    class Meta:
+        model = Employee
+        fields = []
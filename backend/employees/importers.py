@@ -0,0 +1,220 @@
+import csv
+import io
+import json
+import logging
+
+from django.db import IntegrityError, router, transaction
+
+from accounts.hashing import hash_passwords
+from accounts.models import User
+from companies.models import CompanyStats, Department
+from companies.sharding import get_shards
+from .models import Employee, EmployeeIdSequence
+from .search import index_employees
+from .serializers import EmployeeImportRowSerializer
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+SAVE_FAILED = 'Could not save this row. Check that its email and employee ID are not already in use.'
+
+logger = logging.getLogger(__name__)
+
+
+def guess_import_format(filename):
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return None
+
+
+def iter_import_rows(upload, import_format):
+    """Return an iterator of ``(row_number, data)`` pairs from an uploaded CSV or NDJSON file.
+
+    The file is read line by line, so memory use does not depend on its size.
+    ``data`` is a dict of the row's values, or an error message string when
+    the line could not be decoded. An unsupported format raises ``ValueError``
+    straight away; a file that cannot be decoded raises when that line is read.
+    """
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format. Use one of: {', '.join(IMPORT_FORMATS)}.")
+    text = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    if import_format == 'csv':
+        return _iter_csv_rows(text)
+    return _iter_ndjson_rows(text)
+
+
+def _iter_csv_rows(text):
+    reader = csv.DictReader(text)
+    for data in reader:
+        yield reader.line_num, data
+
+
+def _iter_ndjson_rows(text):
+    for row_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield row_number, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(data, dict):
+            yield row_number, 'Each line must be a JSON object.'
+            continue
+        yield row_number, data
+
+
+class EmployeeImporter:
+    """Creates employees for one company from an iterable of import rows.
+
+    Rows are validated and written in batches of ``batch_size``: one query
+    checks the batch's emails, the employee IDs for the batch are reserved in
+    one go, and the ``User`` and ``Employee`` rows are written with
+    ``bulk_create``. A row that fails validation is reported in ``errors``
+    without stopping the rest of the file. A batch that fails to insert is
+    retried row by row, so only the rows that conflict are reported.
+
+    Batches are committed as they go. If the file cannot be read to the end,
+    the rows read so far are still imported, the row where reading stopped is
+    reported, and ``complete`` is false in the result.
+    """
+    batch_size = 500
+
+    def __init__(self, company, batch_size=None):
+        self.company = company
+        if batch_size:
+            self.batch_size = batch_size
+        # Departments are resolved by name from a single lookup per import
+        self.departments = {
+            department.name: department
+            for department in Department.objects.filter(company=company)
+        }
+        self.seen_emails = set()
+        self.created = 0
+        self.errors = []
+        self.complete = True
+
+    def run(self, rows):
+        batch = []
+        for row in self._read(rows):
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch)
+                batch = []
+        if batch:
+            self._import_batch(batch)
+        return {
+            'created': self.created,
+            'failed': len(self.errors),
+            'complete': self.complete,
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+        }
+
+    def _read(self, rows):
+        """Yield ``rows`` until the file cannot be read any further."""
+        row_number = 0
+        try:
+            for row_number, data in rows:
+                yield row_number, data
+        except (ValueError, csv.Error) as exc:
+            # Earlier batches are already committed, so report how far the import got
+            self.complete = False
+            self._error(row_number + 1, {'non_field_errors': [f"Could not read the file from this row on: {exc}"]})
+
+    def _error(self, row_number, errors):
+        self.errors.append({'row': row_number, 'errors': errors})
+
+    def _validate(self, batch):
+        valid = []
+        for row_number, data in batch:
+            if isinstance(data, str):
+                self._error(row_number, {'non_field_errors': [data]})
+                continue
+            # Empty CSV cells mean "not provided" rather than an empty value
+            data = {key: value for key, value in data.items() if key and value not in ('', None)}
+            serializer = EmployeeImportRowSerializer(data=data)
+            if not serializer.is_valid():
+                self._error(row_number, serializer.errors)
+                continue
+            row = serializer.validated_data
+            row['email'] = User.objects.normalize_email(row['email'])
+            department_name = row.pop('department', '')
+            if department_name:
+                row['department'] = self.departments.get(department_name)
+                if row['department'] is None:
+                    self._error(row_number, {'department': [f"Department '{department_name}' not found."]})
+                    continue
+            if row['email'] in self.seen_emails:
+                self._error(row_number, {'email': ['Duplicate email in import file.']})
+                continue
+            self.seen_emails.add(row['email'])
+            valid.append((row_number, row))
+
+        # Emails are unique across all tenants, so every shard is checked
+        emails = [row['email'] for _, row in valid]
+        existing = set()
+        for shard in get_shards():
+            existing.update(User.objects.using(shard).filter(email__in=emails).values_list('email', flat=True))
+        for row_number, row in valid:
+            if row['email'] in existing:
+                self._error(row_number, {'email': ['A user with this email already exists.']})
+        return [(row_number, row) for row_number, row in valid if row['email'] not in existing]
+
+    def _import_batch(self, batch):
+        valid = self._validate(batch)
+        if not valid:
+            return
+
+        rows = []
+        employee_ids = EmployeeIdSequence.allocate_ids(self.company, len(valid))
+        # Hashing dominates the cost of a batch, so spread it across the pool
+        passwords = hash_passwords(row['password'] for _, row in valid)
+        for (row_number, row), employee_id, password in zip(valid, employee_ids, passwords):
+            user = User(
+                email=row['email'],
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                phone=row.get('phone', ''),
+                role=User.UserRole.EMPLOYEE,
+                company=self.company,
+            )
+            user.password = password
+            employee = Employee(
+                employee_id=employee_id,
+                user=user,
+                company=self.company,
+                department=row.get('department'),
+                role=row['role'],
+                date_of_birth=row.get('date_of_birth'),
+            )
+            if row.get('joining_date'):
+                employee.joining_date = row['joining_date']
+            rows.append((row_number, user, employee))
+
+        try:
+            self._save(rows)
+        except IntegrityError:
+            # Another request took an email since the batch was checked; find the rows affected
+            for row_number, user, employee in rows:
+                try:
+                    self._save([(row_number, user, employee)])
+                except IntegrityError:
+                    # The database's message names columns and values; keep it in the log
+                    logger.warning(
+                        'Import row %s for company %s could not be saved', row_number, self.company.pk, exc_info=True
+                    )
+                    self._error(row_number, {'non_field_errors': [SAVE_FAILED]})
+
+    def _save(self, rows):
+        users = [user for _, user, _ in rows]
+        employees = [employee for _, _, employee in rows]
+        with transaction.atomic(using=router.db_for_write(Employee, instance=self.company)):
+            User.objects.bulk_create(users)
+            Employee.objects.bulk_create(employees)
+            # bulk_create does not send post_save, so keep the counts in step here
+            CompanyStats.move_employees(
+                self.company.id, joining=[employee.counted_as() for employee in employees]
+            )
+            index_employees(employees, created=True)
+        self.created += len(employees)
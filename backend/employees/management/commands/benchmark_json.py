@@ -0,0 +1,102 @@
+import io
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import User
+from companies.models import Company, Department
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer, orjson
+from employees.models import Employee
+from employees.serializers import EmployeeSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the stock DRF JSON renderer and parser against the orjson-backed ones on '
+        'EmployeeSerializer list payloads, and check that their output is identical.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Employees per payload.')
+        parser.add_argument('--repeat', type=int, default=50, help='Timed runs per implementation.')
+        parser.add_argument(
+            '--company', metavar='COMPANY_ID',
+            help="Serialize this company's employees from the database instead of generated ones."
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson is not installed; the fast classes fall back to the stock ones.')
+        employees = self.load(options['company'], options['rows']) if options['company'] else self.build(options['rows'])
+        data = EmployeeSerializer(employees, many=True).data
+
+        stock, fast = JSONRenderer().render(data), FastJSONRenderer().render(data)
+        if stock != fast:
+            raise CommandError('Rendered output differs from the stock renderer')
+        if JSONParser().parse(io.BytesIO(stock)) != FastJSONParser().parse(io.BytesIO(stock)):
+            raise CommandError('Parsed data differs from the stock parser')
+
+        self.stdout.write(
+            f"{len(employees)} employees, {len(stock) / 1024:.1f} KiB, {options['repeat']} runs; times in ms"
+        )
+        self.stdout.write(f"{'':<16} {'p50':>8} {'p95':>8} {'MiB/s':>8}")
+        # A single employee, the size of a typical request body
+        record = JSONRenderer().render(data[0])
+        rows = [
+            ('render stock', stock, lambda: JSONRenderer().render(data)),
+            ('render fast', stock, lambda: FastJSONRenderer().render(data)),
+            ('parse stock', stock, lambda: JSONParser().parse(io.BytesIO(stock))),
+            ('parse fast', stock, lambda: FastJSONParser().parse(io.BytesIO(stock))),
+            ('parse 1 stock', record, lambda: JSONParser().parse(io.BytesIO(record))),
+            ('parse 1 fast', record, lambda: FastJSONParser().parse(io.BytesIO(record))),
+        ]
+        for label, payload, run in rows:
+            timings = self.measure(run, options['repeat'])
+            median = statistics.median(timings)
+            self.stdout.write(
+                f"{label:<16} {median:>8.3f} {statistics.quantiles(timings, n=20)[-1]:>8.3f} "
+                f"{len(payload) / 1024 / 1024 / (median / 1000):>8.1f}"
+            )
+
+    def measure(self, run, repeat):
+        run()  # warm up
+        timings = []
+        for _ in range(max(repeat, 2)):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    def load(self, company_id, rows):
+        employees = list(
+            Employee.objects.for_company(company_id).select_related('user', 'company', 'department')[:rows]
+        )
+        if not employees:
+            raise CommandError(f'Company {company_id} has no employees')
+        return employees
+
+    def build(self, rows):
+        # Unsaved instances with their relations set, so serializing them runs no queries
+        owner = User(id=uuid.uuid4(), email='owner@bench.example', role=User.UserRole.PARENT)
+        company = Company(id=uuid.uuid4(), owner=owner, name='Benchmark Ltd', registration_number='BENCH')
+        departments = [Department(id=uuid.uuid4(), company=company, name=f'Department {i}') for i in range(10)]
+        employees = []
+        for i in range(rows):
+            user = User(
+                id=uuid.uuid4(), email=f'employee{i}@bench.example', first_name='Employee', last_name=f'Nº {i}',
+                role=User.UserRole.EMPLOYEE, phone='+1 555 0100', company=company,
+                date_joined=timezone.now(),
+            )
+            employees.append(Employee(
+                id=uuid.uuid4(), user=user, company=company, department=departments[i % len(departments)],
+                employee_id=f'BENCH-{i + 1:04d}', role='Engineer', is_active=i % 10 != 0,
+                joining_date=date(2020, 1, 1) + timedelta(days=i % 1500),
+            ))
+        return employees
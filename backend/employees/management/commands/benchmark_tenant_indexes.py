@@ -0,0 +1,187 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import User
+from companies.models import Company, CompanyStats, Department
+from employees.models import Employee, EmployeeSearchToken
+from employees.search import index_employees, ranked_employee_ids, rebuild_index
+
+BENCH_PREFIX = 'BENCH'
+PAGE_SIZE = 50
+
+# The composite indexes under test, as declared in each model's Meta.indexes
+INDEXES = {
+    Employee: [
+        'employee_company_created_idx', 'employee_company_active_idx', 'employee_company_dept_idx',
+        'employee_dept_active_idx', 'employee_company_role_idx', 'employee_company_joined_idx',
+    ],
+    User: ['user_company_role_idx'],
+    EmployeeSearchToken: ['searchtoken_company_token_idx'],
+}
+
+
+def keyset_page(queryset, ordering, position=None):
+    """One list page after ``position``, ``(value, id)``, as core.pagination.KeysetPagination reads it."""
+    column = ordering.lstrip('-')
+    after = 'lt' if ordering.startswith('-') else 'gt'
+    if position is not None:
+        value, pk = position
+        queryset = queryset.filter(Q(**{f'{column}__{after}': value}) | Q(**{column: value, f'id__{after}': pk}))
+    sign = '-' if ordering.startswith('-') else ''
+    return queryset.select_related('user', 'company', 'department').order_by(ordering, f'{sign}id')[:PAGE_SIZE]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large multi-tenant dataset and time the tenant-scoped list and count queries '
+        'with and without the composite indexes. Run it against a scratch database: it inserts '
+        'the rows and temporarily drops the indexes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=1_000_000, help='Employees across all benchmark companies.')
+        parser.add_argument('--companies', type=int, default=100, help='Number of benchmark companies.')
+        parser.add_argument('--admins', type=int, default=20, help='Admin users per company.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query and phase.')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows per bulk insert while seeding.')
+
+    def handle(self, *args, **options):
+        companies = self.seed(options)
+        target = companies[len(companies) // 2]
+        sample = Employee.objects.filter(company=target).values_list('employee_id', flat=True).first()
+        # The seeded emails are employee<n>@bench<c>.invalid
+        name = Employee.objects.filter(company=target).values_list('user__email', flat=True).first().split('@')[0]
+        department = Department.objects.filter(company=target).first()
+        # Deep pages start halfway through the list, as a client following next links would reach them
+        employees = Employee.objects.filter(company=target)
+        in_department = employees.filter(department=department, is_active=True)
+        middle = employees.order_by('-created_at', '-id').values_list('created_at', 'id')[employees.count() // 2]
+        middle_of_department = (
+            in_department.order_by('-created_at', '-id').values_list('created_at', 'id')[in_department.count() // 2]
+        )
+        joined = employees.order_by('joining_date', 'id').values_list('joining_date', flat=True)
+        joined_from = joined[employees.count() // 2]
+        queries = {
+            'employee list page': lambda: list(keyset_page(employees, '-created_at')),
+            'employee page, deep': lambda: list(keyset_page(employees, '-created_at', middle)),
+            'dept active page, deep': lambda: list(keyset_page(in_department, '-created_at', middle_of_department)),
+            'joined since page': lambda: list(
+                keyset_page(employees.filter(joining_date__gte=joined_from), 'joining_date')
+            ),
+            'employee count': lambda: Employee.objects.filter(company=target).count(),
+            'active employee count': lambda: Employee.objects.filter(company=target, is_active=True).count(),
+            'employee by employee_id': lambda: Employee.objects.filter(company=target, employee_id=sample).first(),
+            'admin user list': lambda: list(User.objects.filter(company=target, role=User.UserRole.ADMIN)),
+            'admin user count': lambda: User.objects.filter(company=target, role=User.UserRole.ADMIN).count(),
+            'search by employee ID': lambda: list(ranked_employee_ids(target.pk, [sample.rsplit('-', 1)[-1]])[:20]),
+            'search by name prefix': lambda: list(ranked_employee_ids(target.pk, [name[:-1]])[:20]),
+        }
+
+        self.set_indexes(present=False)
+        try:
+            before = self.measure(queries, options['repeat'])
+        finally:
+            self.set_indexes(present=True)
+        after = self.measure(queries, options['repeat'])
+
+        self.stdout.write(
+            f"{connection.vendor}, {Employee.objects.count()} employees, "
+            f"target company has {Employee.objects.filter(company=target).count()}, "
+            f"median of {options['repeat']} runs in ms"
+        )
+        self.stdout.write(f"{'query':<26} {'before':>10} {'after':>10} {'speedup':>8}")
+        for name in queries:
+            speedup = before[name] / after[name] if after[name] else float('inf')
+            self.stdout.write(f"{name:<26} {before[name]:>10.2f} {after[name]:>10.2f} {speedup:>7.1f}x")
+
+    def seed(self, options):
+        existing = list(Company.objects.filter(registration_number__startswith=BENCH_PREFIX).order_by('registration_number'))
+        if existing:
+            self.stdout.write(f'Reusing {len(existing)} benchmark companies.')
+            if not EmployeeSearchToken.objects.filter(company__in=existing).exists():
+                rebuild_index([company.id for company in existing], batch_size=options['batch_size'])
+            return existing
+
+        count = options['companies']
+        per_company = max(1, options['employees'] // count)
+        batch_size = options['batch_size']
+        now = timezone.now()
+        self.stdout.write(f'Seeding {count} companies with {per_company} employees each...')
+
+        owners = User.objects.bulk_create([
+            User(email=f'owner@bench{c}.invalid', password='!', role=User.UserRole.PARENT) for c in range(count)
+        ], batch_size=batch_size)
+        companies = Company.objects.bulk_create([
+            Company(owner=owner, name=f'Benchmark {c}', registration_number=f'{BENCH_PREFIX}{c:04d}')
+            for c, owner in enumerate(owners)
+        ], batch_size=batch_size)
+        User.objects.bulk_update(
+            [User(id=owner.id, company_id=company.id) for owner, company in zip(owners, companies)],
+            ['company'], batch_size=batch_size
+        )
+
+        for c, company in enumerate(companies):
+            with transaction.atomic():
+                departments = Department.objects.bulk_create([
+                    Department(company=company, name=f'Department {d}') for d in range(10)
+                ])
+                User.objects.bulk_create([
+                    User(email=f'admin{a}@bench{c}.invalid', password='!', role=User.UserRole.ADMIN, company=company)
+                    for a in range(options['admins'])
+                ], batch_size=batch_size)
+                for start in range(0, per_company, batch_size):
+                    numbers = range(start, min(start + batch_size, per_company))
+                    users = User.objects.bulk_create([
+                        User(email=f'employee{n}@bench{c}.invalid', password='!', company=company) for n in numbers
+                    ], batch_size=batch_size)
+                    employees = Employee.objects.bulk_create([
+                        Employee(
+                            user=user, company=company, department=departments[n % len(departments)],
+                            employee_id=f'{BENCH_PREFIX}{c:04d}-{n:07d}', role='Engineer',
+                            is_active=random.random() < 0.9,
+                        )
+                        for n, user in zip(numbers, users)
+                    ], batch_size=batch_size)
+                    # auto_now_add stamps every row of a batch alike; spread them out as real hires would be
+                    Employee.objects.bulk_update([
+                        Employee(
+                            id=employee.id, created_at=now - timedelta(minutes=per_company - n),
+                            joining_date=(now - timedelta(minutes=per_company - n)).date(),
+                        )
+                        for n, employee in zip(numbers, employees)
+                    ], ['created_at', 'joining_date'], batch_size=batch_size)
+                    index_employees(employees, created=True)
+            self.stdout.write(f'  company {c + 1}/{count}')
+
+        CompanyStats.rebuild([company.id for company in companies])
+        return companies
+
+    def set_indexes(self, present):
+        with connection.schema_editor() as editor:
+            for model, names in INDEXES.items():
+                for index in model._meta.indexes:
+                    if index.name in names:
+                        (editor.add_index if present else editor.remove_index)(model, index)
+        if connection.vendor == 'mysql':
+            with connection.cursor() as cursor:
+                for model in INDEXES:
+                    cursor.execute(f'ANALYZE TABLE {connection.ops.quote_name(model._meta.db_table)}')
+
+    def measure(self, queries, repeat):
+        results = {}
+        for name, query in queries.items():
+            query()  # warm the buffer pool so both phases read from memory
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                query()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(timings)
+        return results
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from companies.sharding import get_shards
+from core.db.routers import use_shard
+from employees.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the employee search index (see employees/search.py) from the source tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company', action='append', dest='company_ids', metavar='COMPANY_ID',
+            help='Only rebuild the given company (may be repeated). Defaults to all companies.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Employees re-indexed per batch.')
+
+    def handle(self, *args, **options):
+        indexed = 0
+        for shard in get_shards():
+            with use_shard(shard):
+                indexed += rebuild_index(options['company_ids'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} employees.'))
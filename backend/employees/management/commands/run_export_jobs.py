@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from companies.sharding import get_shards
+from employees.exporters import ExportRunner
+from employees.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Run pending export jobs in this process, e.g. ones left behind by a restart, '
+        'and optionally delete old exports and their files.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-minutes', type=int,
+            help='Also rerun jobs that have been running for longer than this, presumably in a dead worker.'
+        )
+        parser.add_argument(
+            '--purge-days', type=int,
+            help='Delete finished and failed jobs, with their files, created more than this many days ago.'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        ran = purged = 0
+        for shard in get_shards():
+            jobs = ExportJob.objects.using(shard)
+            if options['stale_minutes'] is not None:
+                jobs.filter(
+                    status=ExportJob.Status.RUNNING,
+                    started_at__lt=now - timedelta(minutes=options['stale_minutes']),
+                ).update(status=ExportJob.Status.PENDING, rows_written=0)
+            for job_id in jobs.filter(status=ExportJob.Status.PENDING).order_by('created_at').values_list('pk', flat=True):
+                ExportRunner(job_id, shard).run()
+                ran += 1
+            if options['purge_days'] is not None:
+                finished = jobs.filter(
+                    status__in=[ExportJob.Status.DONE, ExportJob.Status.FAILED],
+                    created_at__lt=now - timedelta(days=options['purge_days']),
+                )
+                for job in finished.iterator():
+                    if job.file:
+                        job.file.delete(save=False)
+                    job.delete()
+                    purged += 1
+        self.stdout.write(self.style.SUCCESS(f'Ran {ran} export jobs, purged {purged}.'))
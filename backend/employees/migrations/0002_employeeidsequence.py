@@ -0,0 +1,26 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_companystats'),
+        ('employees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeIdSequence',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='employee_id_sequence', serialize=False, to='companies.company')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='last value')),
+            ],
+            options={
+                'verbose_name': 'employee ID sequence',
+                'verbose_name_plural': 'employee ID sequences',
+            },
+        ),
+    ]
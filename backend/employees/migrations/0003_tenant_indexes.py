@@ -0,0 +1,24 @@
+# Generated by Django 5.0.2 on 2026-10-18 10:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_companystats'),
+        ('employees', '0002_employeeidsequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['company', '-created_at'], name='employee_company_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['company', 'is_active'], name='employee_company_active_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:11
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0008_companystats_data_version'),
+        ('employees', '0003_tenant_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('employees', 'Employees'), ('directory', 'Directory')], default='employees', max_length=20, verbose_name='kind')),
+                ('format', models.CharField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')], default='csv', max_length=10, verbose_name='format')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10, verbose_name='status')),
+                ('rows_total', models.PositiveIntegerField(blank=True, null=True, verbose_name='rows total')),
+                ('rows_written', models.PositiveIntegerField(default=0, verbose_name='rows written')),
+                ('file', models.FileField(blank=True, upload_to='exports/', verbose_name='file')),
+                ('error', models.TextField(blank=True, verbose_name='error')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='companies.company')),
+                ('requested_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'export job',
+                'verbose_name_plural': 'export jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['company', '-created_at'], name='exportjob_company_created_idx')],
+            },
+        ),
+    ]
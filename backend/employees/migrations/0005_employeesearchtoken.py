@@ -0,0 +1,71 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:34
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# As employees/search.py tokenizes at the time of this migration
+WORD = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    return list(dict.fromkeys(word[:64] for word in WORD.findall((text or '').lower())))
+
+
+def backfill_search_tokens(apps, schema_editor):
+    Employee = apps.get_model('employees', 'Employee')
+    EmployeeSearchToken = apps.get_model('employees', 'EmployeeSearchToken')
+    # Each shard is migrated on its own and holds its own tenants' rows
+    db_alias = schema_editor.connection.alias
+
+    employees = Employee.objects.using(db_alias).select_related('user', 'department').order_by('pk')
+    last_pk = None
+    while True:
+        page = employees if last_pk is None else employees.filter(pk__gt=last_pk)
+        batch = list(page[:1000])
+        if not batch:
+            return
+        tokens = []
+        for employee in batch:
+            texts = {
+                'name': f'{employee.user.first_name} {employee.user.last_name}',
+                'email': employee.user.email,
+                'employee_id': employee.employee_id,
+                'role': employee.role,
+                'department': employee.department.name if employee.department_id else '',
+            }
+            tokens += [
+                EmployeeSearchToken(company_id=employee.company_id, employee_id=employee.pk, field=field, token=token)
+                for field, text in texts.items()
+                for token in tokenize(text)
+            ]
+        EmployeeSearchToken.objects.using(db_alias).bulk_create(tokens, batch_size=1000)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0009_companystats_breakdowns'),
+        ('employees', '0004_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('name', 'Name'), ('email', 'Email'), ('employee_id', 'Employee ID'), ('role', 'Role'), ('department', 'Department')], max_length=16, verbose_name='field')),
+                ('token', models.CharField(max_length=64, verbose_name='token')),
+                ('company', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='companies.company')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='employees.employee')),
+            ],
+            options={
+                'verbose_name': 'employee search token',
+                'verbose_name_plural': 'employee search tokens',
+                'indexes': [models.Index(fields=['company', 'token'], name='searchtoken_company_token_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_search_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.2 on 2026-10-18 11:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0009_companystats_breakdowns'),
+        ('employees', '0005_employeesearchtoken'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='employee',
+            name='employee_company_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='employee',
+            name='employee_company_active_idx',
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['company', 'created_at'], name='employee_company_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['company', 'is_active', 'created_at'], name='employee_company_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['company', 'department', 'created_at'], name='employee_company_dept_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['company', 'department', 'is_active', 'created_at'], name='employee_dept_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['company', 'role', 'created_at'], name='employee_company_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['company', 'joining_date'], name='employee_company_joined_idx'),
+        ),
+    ]
@@ -1,9 +1,11 @@
 import uuid
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import DEFERRED, F
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from accounts.models import User
 from companies.models import Company, Department
+from companies.sharding import TenantManager
 
 class Employee(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -32,32 +34,61 @@ class Employee(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TenantManager()
+
     class Meta:
         verbose_name = _('employee')
         verbose_name_plural = _('employees')
         ordering = ['-created_at']
+        # Also serves lookups by (company, employee_id)
         unique_together = ['company', 'employee_id']
+        # Tenant-scoped lists, one per filter combination of
+        # employees.filters.EmployeeFilter, ending with the ordering column;
+        # InnoDB appends the primary key, the keyset tiebreak
+        indexes = [
+            models.Index(fields=['company', 'created_at'], name='employee_company_created_idx'),
+            # Also serves the active count
+            models.Index(fields=['company', 'is_active', 'created_at'], name='employee_company_active_idx'),
+            models.Index(fields=['company', 'department', 'created_at'], name='employee_company_dept_idx'),
+            models.Index(
+                fields=['company', 'department', 'is_active', 'created_at'], name='employee_dept_active_idx'
+            ),
+            models.Index(fields=['company', 'role', 'created_at'], name='employee_company_role_idx'),
+            models.Index(fields=['company', 'joining_date'], name='employee_company_joined_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.employee_id}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what CompanyStats counts the employee under, as loaded, so
+        # companies.signals can move it between counts on save.
+        # Columns that were deferred are recorded as DEFERRED, i.e. unknown.
+        loaded = instance.__dict__
+        instance._loaded_stats = (
+            loaded.get('company_id', DEFERRED),
+            tuple(loaded.get(field, DEFERRED) for field in ('department_id', 'is_active', 'joining_date')),
+        )
+        # Likewise for the columns the search index is built from (see employees/search.py)
+        instance._loaded_search = tuple(loaded.get(field, DEFERRED) for field in cls.SEARCH_COLUMNS)
+        return instance
+
+    SEARCH_COLUMNS = ('user_id', 'department_id', 'employee_id', 'role')
+
+    def counted_as(self):
+        """The ``(department_id, is_active, joining_date)`` CompanyStats counts the employee under."""
+        return self.department_id, self.is_active, self.joining_date
+
     def save(self, *args, **kwargs):
         if not self.employee_id:
             # Generate employee ID based on company and sequence
-            last_employee = Employee.objects.filter(
-                company=self.company
-            ).order_by('-employee_id').first()
-            
-            if last_employee:
-                last_id = int(last_employee.employee_id.split('-')[-1])
-                new_id = last_id + 1
-            else:
-                new_id = 1
-                
-            self.employee_id = f"{self.company.registration_number}-{new_id:04d}"
+            self.employee_id = EmployeeIdSequence.allocate_ids(self.company)[0]
         
         # Ensure department belongs to the same company
-        if self.department and self.department.company != self.company:
+        # Compared by id, so neither company has to be loaded
+        if self.department and self.department.company_id != self.company_id:
             raise ValueError(_('Department must belong to the same company'))
             
         super().save(*args, **kwargs)
@@ -72,4 +103,160 @@ class Employee(models.Model):
 
     @property
     def phone(self):
-        return self.user.phone 
\ No newline at end of file
+        return self.user.phone 
+
+
+class EmployeeIdSequence(models.Model):
+    """Per-company counter behind the ``<registration_number>-NNNN`` employee IDs.
+
+    Numbers are handed out with an atomic ``UPDATE ... SET last_value =
+    last_value + n``, so concurrent creates never receive the same number and
+    a block of any size costs the same two queries.
+    """
+    company = models.OneToOneField(
+        Company,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='employee_id_sequence'
+    )
+    last_value = models.PositiveIntegerField(_('last value'), default=0)
+
+    class Meta:
+        verbose_name = _('employee ID sequence')
+        verbose_name_plural = _('employee ID sequences')
+
+    def __str__(self):
+        return f"{self.company_id} - {self.last_value}"
+
+    @staticmethod
+    def format_id(company, number):
+        return f"{company.registration_number}-{number:04d}"
+
+    @classmethod
+    def reserve(cls, company, count=1):
+        """Reserve ``count`` consecutive numbers for ``company`` and return them as a range."""
+        if count < 1:
+            raise ValueError(_('At least one employee ID must be reserved'))
+        # The company's shard, even outside a request (see companies/sharding.py)
+        using = router.db_for_write(cls, instance=company)
+        with transaction.atomic(using=using):
+            # The UPDATE takes the row lock, which is held until commit, so the
+            # value read back below belongs to this reservation alone.
+            sequence = cls.objects.using(using).filter(company_id=company.pk)
+            if not sequence.update(last_value=F('last_value') + count):
+                cls._create_for(company, using)
+                sequence.update(last_value=F('last_value') + count)
+            last_value = sequence.values_list('last_value', flat=True).get()
+        return range(last_value - count + 1, last_value + 1)
+
+    @classmethod
+    def allocate_ids(cls, company, count=1):
+        """Reserve ``count`` numbers and return them as formatted employee IDs."""
+        return [cls.format_id(company, number) for number in cls.reserve(company, count)]
+
+    @classmethod
+    def _create_for(cls, company, using):
+        # Companies that hired before the sequence existed continue from their
+        # highest numeric suffix rather than from 1.
+        start = 0
+        employee_ids = Employee.objects.using(using).filter(company_id=company.pk).values_list('employee_id', flat=True)
+        for employee_id in employee_ids:
+            suffix = employee_id.rsplit('-', 1)[-1]
+            if suffix.isdigit():
+                start = max(start, int(suffix))
+        try:
+            with transaction.atomic(using=using):
+                cls.objects.using(using).create(company_id=company.pk, last_value=start)
+        except IntegrityError:
+            pass  # Another request created the sequence first
+
+
+class EmployeeSearchToken(models.Model):
+    """One word of an employee's searchable fields; the search index (see employees/search.py)."""
+    class Field(models.TextChoices):
+        NAME = 'name', _('Name')
+        EMAIL = 'email', _('Email')
+        EMPLOYEE_ID = 'employee_id', _('Employee ID')
+        ROLE = 'role', _('Role')
+        DEPARTMENT = 'department', _('Department')
+
+    # The leading column of the search index, which also serves the foreign key
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='+', db_index=False)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='search_tokens')
+    field = models.CharField(_('field'), max_length=16, choices=Field.choices)
+    token = models.CharField(_('token'), max_length=64)
+
+    objects = TenantManager()
+
+    class Meta:
+        verbose_name = _('employee search token')
+        verbose_name_plural = _('employee search tokens')
+        indexes = [
+            # Prefix searches are range scans within one tenant
+            models.Index(fields=['company', 'token'], name='searchtoken_company_token_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} {self.field}: {self.token}"
+
+
+class ExportJob(models.Model):
+    """A background export of a company's employees or user directory (see employees/exporters.py)."""
+    class Kind(models.TextChoices):
+        EMPLOYEES = 'employees', _('Employees')
+        DIRECTORY = 'directory', _('Directory')
+
+    class Format(models.TextChoices):
+        CSV = 'csv', _('CSV')
+        NDJSON = 'ndjson', _('NDJSON')
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        RUNNING = 'running', _('Running')
+        DONE = 'done', _('Done')
+        FAILED = 'failed', _('Failed')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name='export_jobs'
+    )
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='export_jobs'
+    )
+    kind = models.CharField(_('kind'), max_length=20, choices=Kind.choices, default=Kind.EMPLOYEES)
+    format = models.CharField(_('format'), max_length=10, choices=Format.choices, default=Format.CSV)
+    status = models.CharField(_('status'), max_length=10, choices=Status.choices, default=Status.PENDING)
+    rows_total = models.PositiveIntegerField(_('rows total'), null=True, blank=True)
+    rows_written = models.PositiveIntegerField(_('rows written'), default=0)
+    file = models.FileField(_('file'), upload_to='exports/', blank=True)
+    error = models.TextField(_('error'), blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    objects = TenantManager()
+
+    class Meta:
+        verbose_name = _('export job')
+        verbose_name_plural = _('export jobs')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['company', '-created_at'], name='exportjob_company_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.company_id} {self.kind}.{self.format} ({self.status})"
+
+    @property
+    def progress(self):
+        """Share of rows written, from 0 to 1, or None before the rows are counted."""
+        if self.status == self.Status.DONE:
+            return 1.0
+        if not self.rows_total:
+            return None
+        return min(self.rows_written / self.rows_total, 1.0)
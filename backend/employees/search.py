@@ -0,0 +1,195 @@
+"""Tenant-scoped employee search.
+
+``GET /employees/api/employees/search/?q=ann eng`` finds a company's
+employees by first and last name, email, employee ID, role and department
+name, best matches first.
+
+The index is the EmployeeSearchToken table: one row per word of those
+fields, lowercased and split on anything that is not a letter or a digit.
+``ann.lee@acme.example`` is stored as ``ann``, ``lee``, ``acme`` and
+``example``, and ``ACME-0042`` as ``acme`` and ``0042``. The table is
+indexed on ``(company, token)``. A query is split the same way, and each
+term matches the tokens it is a prefix of. Each term is therefore a range
+scan over one tenant's part of the index. A search costs as much as the
+number of tokens its terms match, however many employees the table holds.
+Terms shorter than ``SEARCH_MIN_TERM_LENGTH`` match too many tokens to be
+useful and are ignored.
+
+An employee must match every term. Results are ranked by the sum of the
+weights in ``FIELD_WEIGHTS`` over the matching tokens, doubled where a term
+is the whole word rather than a prefix.
+
+The tokens are kept in step by the signal handlers in ``employees.signals``
+and by the importer. Bulk ``QuerySet.update()`` calls bypass both; to
+rebuild the index after one, run ``rebuild_search_index``.
+"""
+import re
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, Max, Q, Sum, Value, When
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from core.pagination import query_int
+from .models import Employee, EmployeeSearchToken
+
+Field = EmployeeSearchToken.Field
+
+FIELD_WEIGHTS = {
+    Field.EMPLOYEE_ID: 8,
+    Field.NAME: 6,
+    Field.EMAIL: 4,
+    Field.DEPARTMENT: 2,
+    Field.ROLE: 2,
+}
+
+# Letters and digits; \w without the underscore
+_WORD = re.compile(r'[^\W_]+')
+_TOKEN_LENGTH = EmployeeSearchToken._meta.get_field('token').max_length
+
+
+def tokenize(text):
+    """Return the distinct lowercased words of ``text``, in order."""
+    return list(dict.fromkeys(word[:_TOKEN_LENGTH] for word in _WORD.findall((text or '').lower())))
+
+
+def parse_query(query):
+    """Return the search terms of ``query``, or an empty list if none is long enough."""
+    min_length = getattr(settings, 'SEARCH_MIN_TERM_LENGTH', 2)
+    terms = [term for term in tokenize(query) if len(term) >= min_length]
+    return terms[:getattr(settings, 'SEARCH_MAX_TERMS', 5)]
+
+
+def employee_texts(employee, fields=None):
+    """Return ``{field: text}`` for the searchable fields of ``employee``."""
+    user = employee.user
+    texts = {
+        Field.NAME: f'{user.first_name} {user.last_name}',
+        Field.EMAIL: user.email,
+        Field.EMPLOYEE_ID: employee.employee_id,
+        Field.ROLE: employee.role,
+        Field.DEPARTMENT: employee.department.name if employee.department_id else '',
+    }
+    return texts if fields is None else {field: texts[field] for field in fields}
+
+
+def make_tokens(company_id, employee_id, texts):
+    return [
+        EmployeeSearchToken(company_id=company_id, employee_id=employee_id, field=field, token=token)
+        for field, text in texts.items()
+        for token in tokenize(text)
+    ]
+
+
+def replace_tokens(employee_ids, tokens, using=None, fields=None, created=False):
+    """Delete the tokens of ``fields`` (all by default) of the employees and insert ``tokens``.
+
+    New employees, ``created``, have no tokens to delete.
+    """
+    if not created:
+        stale = EmployeeSearchToken.objects.db_manager(using).filter(employee_id__in=employee_ids)
+        if fields is not None:
+            stale = stale.filter(field__in=fields)
+        stale.delete()
+    EmployeeSearchToken.objects.db_manager(using).bulk_create(tokens, batch_size=1000)
+
+
+def index_employees(employees, using=None, created=False):
+    """(Re)build the tokens of ``employees``; their user and department should be joined."""
+    employees = list(employees)
+    if employees:
+        replace_tokens(
+            [employee.pk for employee in employees],
+            [
+                token
+                for employee in employees
+                for token in make_tokens(employee.company_id, employee.pk, employee_texts(employee))
+            ],
+            using,
+            created=created,
+        )
+
+
+def rebuild_index(company_ids=None, using=None, batch_size=1000):
+    """Rebuild the tokens of every employee of the given companies (all by default); returns the count."""
+    employees = Employee.objects.db_manager(using).select_related('user', 'department').order_by('pk')
+    if company_ids is not None:
+        employees = employees.filter(company_id__in=company_ids)
+    indexed = 0
+    last_pk = None
+    while True:
+        page = employees if last_pk is None else employees.filter(pk__gt=last_pk)
+        batch = list(page[:batch_size])
+        if not batch:
+            return indexed
+        index_employees(batch, using)
+        indexed += len(batch)
+        last_pk = batch[-1].pk
+
+
+def ranked_employee_ids(company_id, terms):
+    """A values queryset of ``{"employee_id", "score"}`` matching every term, best first."""
+    weight = Case(
+        *(When(field=field, then=Value(value)) for field, value in FIELD_WEIGHTS.items()),
+        default=Value(1), output_field=IntegerField(),
+    )
+    # Tokens are lowercase like the terms; istartswith is the LIKE 'term%' that
+    # MySQL serves from the index, where startswith would compare as binary.
+    matches = [Q(token__istartswith=term) for term in terms]
+    # How many of the terms the employee's tokens match
+    matched_terms = sum(
+        (Max(Case(When(match, then=Value(1)), default=Value(0), output_field=IntegerField())) for match in matches),
+        Value(0),
+    )
+    score = Sum(Case(
+        *(When(token=term, then=weight * 2) for term in terms),
+        *(When(match, then=weight) for match in matches),
+        default=Value(0), output_field=IntegerField(),
+    ))
+    any_term = Q()
+    for match in matches:
+        any_term |= match
+    return (
+        EmployeeSearchToken.objects.filter(any_term, company_id=company_id)
+        .values('employee_id')
+        .alias(matched_terms=matched_terms)
+        .annotate(score=score)
+        .filter(matched_terms=len(terms))
+        .order_by('-score', 'employee_id')
+    )
+
+
+class SearchPagination(BasePagination):
+    """Page-numbered results without a total count, which would aggregate every match again.
+
+    ``?page=`` starts at 1; ``?page_size=`` is capped at ``SEARCH_MAX_PAGE_SIZE``.
+    """
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page = query_int(request, self.page_query_param, 1)
+        self.page_size = query_int(
+            request, self.page_size_query_param,
+            getattr(settings, 'SEARCH_PAGE_SIZE', 20), getattr(settings, 'SEARCH_MAX_PAGE_SIZE', 100),
+        )
+        offset = (self.page - 1) * self.page_size
+        # One row more than the page tells whether there is a next page
+        rows = list(queryset[offset:offset + self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        return rows[:self.page_size]
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.page_link(self.page + 1) if self.has_next else None,
+            'previous': self.page_link(self.page - 1) if self.page > 1 else None,
+            'results': data,
+        })
+
+    def page_link(self, page):
+        url = self.request.build_absolute_uri()
+        if page == 1:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, page)
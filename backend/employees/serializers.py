@@ -1,9 +1,13 @@
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Employee
+from .models import Employee, ExportJob
 from accounts.serializers import UserSerializer  # Import UserSerializer from accounts app
 from companies.models import Company
+from companies.serializers import CompanySummarySerializer, DepartmentSummarySerializer
+from core.fieldsets import SparseFieldsMixin
+from core.serializers import ValuesSerializer
 
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     company_name = serializers.CharField(source='company.name', read_only=True)
     department_name = serializers.CharField(source='department.name', read_only=True)
@@ -15,6 +19,12 @@ class EmployeeSerializer(serializers.ModelSerializer):
             'is_active', 'employee_id', 'department', 'department_name'
         ]
         read_only_fields = ('id', 'joining_date', 'user', 'company', 'company_name', 'employee_id', 'department_name')
+        expandable_fields = {'company': CompanySummarySerializer, 'department': DepartmentSummarySerializer}
+
+
+class EmployeeValuesSerializer(ValuesSerializer):
+    """EmployeeSerializer's output for list views, read from values() rows."""
+    serializer_class = EmployeeSerializer
 
 
 class EmployeeCreateSerializer(serializers.ModelSerializer):
@@ -83,4 +93,39 @@ class EmployeeDetailSerializer(serializers.ModelSerializer):
             'id', 'user', 'company', 'role', 'joining_date',
             'is_active', 'employee_id', 'department', 'department_name'
         ]
-        read_only_fields = ('id', 'joining_date', 'user', 'employee_id', 'department_name') 
\ No newline at end of file
+        read_only_fields = ('id', 'joining_date', 'user', 'employee_id', 'department_name') 
+
+
+class EmployeeImportRowSerializer(serializers.Serializer):
+    """Validates one row of a bulk employee import file."""
+    email = serializers.EmailField()
+    first_name = serializers.CharField(max_length=150)
+    last_name = serializers.CharField(max_length=150)
+    password = serializers.CharField()
+    phone = serializers.CharField(max_length=15, required=False, allow_blank=True)
+    role = serializers.CharField(max_length=100)
+    department = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    date_of_birth = serializers.DateField(required=False, allow_null=True)
+    joining_date = serializers.DateField(required=False)
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id', 'kind', 'format', 'status', 'rows_total', 'rows_written', 'progress',
+            'error', 'created_at', 'started_at', 'finished_at', 'download_url'
+        ]
+        read_only_fields = (
+            'id', 'status', 'rows_total', 'rows_written', 'error', 'created_at', 'started_at', 'finished_at'
+        )
+
+    def get_download_url(self, job):
+        if job.status != ExportJob.Status.DONE:
+            return None
+        url = reverse('employees:export_download', kwargs={'id': job.id})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,69 @@
+from django.db.models import DEFERRED
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import User
+from companies.models import Department
+from .models import Employee, EmployeeSearchToken
+from .search import index_employees, make_tokens, replace_tokens
+
+Field = EmployeeSearchToken.Field
+
+
+# Deleting an employee deletes its tokens through the foreign key
+@receiver(post_save, sender=Employee)
+def employee_saved(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    loaded = None if created else getattr(instance, '_loaded_search', (DEFERRED,) * len(Employee.SEARCH_COLUMNS))
+    current = tuple(getattr(instance, column) for column in Employee.SEARCH_COLUMNS)
+    instance._loaded_search = current
+    # Columns that were not loaded (DEFERRED) count as changed
+    if loaded != current:
+        index_employees([instance], using, created=created)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, using=None, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not set(update_fields) & set(User.SEARCH_FIELDS)):
+        # Saves of users with deferred columns only write the loaded ones
+        return
+    loaded = None if created else getattr(instance, '_loaded_names', (DEFERRED,) * len(User.SEARCH_FIELDS))
+    current = tuple(getattr(instance, field) for field in User.SEARCH_FIELDS)
+    instance._loaded_names = current
+    # A new user has no employee profile yet; owners never have one
+    if created or loaded == current or instance.is_parent:
+        return
+    employee = Employee.objects.db_manager(using).filter(user_id=instance.pk).values_list('pk', 'company_id').first()
+    if employee is not None:
+        employee_id, company_id = employee
+        fields = [Field.NAME, Field.EMAIL]
+        texts = {Field.NAME: f'{instance.first_name} {instance.last_name}', Field.EMAIL: instance.email}
+        replace_tokens([employee_id], make_tokens(company_id, employee_id, texts), using, fields)
+
+
+@receiver(post_save, sender=Department)
+def department_saved(sender, instance, created, raw=False, using=None, **kwargs):
+    loaded = getattr(instance, '_loaded_name', DEFERRED)
+    # A new department has no employees yet
+    if raw or created or loaded == instance.name:
+        return
+    employee_ids = list(
+        Employee.objects.db_manager(using).filter(department_id=instance.pk).values_list('pk', flat=True)
+    )
+    for start in range(0, len(employee_ids), 1000):
+        batch = employee_ids[start:start + 1000]
+        tokens = [
+            token
+            for employee_id in batch
+            for token in make_tokens(instance.company_id, employee_id, {Field.DEPARTMENT: instance.name})
+        ]
+        replace_tokens(batch, tokens, using, [Field.DEPARTMENT])
+
+
+@receiver(pre_delete, sender=Department)
+def department_deleted(sender, instance, using=None, **kwargs):
+    # Its employees are unassigned by an UPDATE that sends no signals
+    EmployeeSearchToken.objects.using(using).filter(
+        company_id=instance.company_id, field=Field.DEPARTMENT, employee__department_id=instance.pk
+    ).delete()
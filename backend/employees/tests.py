@@ -0,0 +1,394 @@
+import csv
+import gzip
+import io
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from companies.models import CompanyStats, Department
+from core.tests.factories import PASSWORD, TenantTestCase
+from employees.exporters import EXPORT_FAILED, ExportRunner
+from employees.importers import SAVE_FAILED, EmployeeImporter
+from employees.models import Employee, EmployeeIdSequence, EmployeeSearchToken, ExportJob
+from employees.search import tokenize
+
+IMPORT_URL = '/employees/api/employees/import/'
+HEADER = 'email,first_name,last_name,password,role\n'
+EXPORTS_URL = '/employees/api/exports/'
+SEARCH_URL = '/employees/api/employees/search/'
+
+
+class EmployeeIdSequenceTests(TenantTestCase):
+    prefix = 'seq'
+    sizes = {'employees': 3, 'departments': 1, 'admins': 1}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.company = cls.tenant.company
+
+    def test_ids_follow_the_registration_number(self):
+        self.assertEqual(
+            sorted(employee.employee_id for employee in self.tenant.employees), ['SEQ-0001', 'SEQ-0002', 'SEQ-0003']
+        )
+
+    def test_a_new_sequence_continues_after_existing_suffixes(self):
+        # A company that hired before the sequence existed
+        EmployeeIdSequence.objects.filter(company=self.company).delete()
+        for employee, employee_id in zip(self.tenant.employees, ['LEGACY-X', 'SEQ-0007', 'SEQ-0003']):
+            Employee.objects.filter(pk=employee.pk).update(employee_id=employee_id)
+
+        self.assertEqual(EmployeeIdSequence.allocate_ids(self.company), ['SEQ-0008'])
+        self.assertEqual(EmployeeIdSequence.objects.get(company=self.company).last_value, 8)
+
+    def test_a_block_is_reserved_in_two_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            block = EmployeeIdSequence.reserve(self.company, 500)
+        # Inside the test's transaction the atomic block adds a savepoint
+        statements = [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(len(statements), 2, statements)
+        self.assertEqual(block, range(4, 504))
+        self.assertEqual(EmployeeIdSequence.allocate_ids(self.company, 2), ['SEQ-0504', 'SEQ-0505'])
+        with self.assertRaises(ValueError):
+            EmployeeIdSequence.reserve(self.company, 0)
+
+    def test_allocations_do_not_collide(self):
+        first = EmployeeIdSequence.allocate_ids(self.company, 3)
+        second = EmployeeIdSequence.allocate_ids(self.company, 3)
+        single = EmployeeIdSequence.allocate_ids(self.company)
+        allocated = first + second + single
+        self.assertEqual(len(set(allocated)), 7)
+        existing = set(Employee.objects.filter(company=self.company).values_list('employee_id', flat=True))
+        self.assertFalse(existing & set(allocated))
+
+    def test_concurrent_first_allocations_do_not_collide(self):
+        EmployeeIdSequence.objects.filter(company=self.company).delete()
+        create_for = EmployeeIdSequence._create_for.__func__
+        racing = []
+
+        def create_after_another_request(cls, company, using):
+            # Another request creates the sequence and takes a number in between
+            # this request's failed UPDATE and its INSERT
+            if not racing:
+                racing.append(True)
+                racing.append(EmployeeIdSequence.allocate_ids(company))
+            create_for(cls, company, using)
+
+        with mock.patch.object(EmployeeIdSequence, '_create_for', classmethod(create_after_another_request)):
+            mine = EmployeeIdSequence.allocate_ids(self.company)
+        self.assertEqual(racing[1], ['SEQ-0004'])
+        self.assertEqual(mine, ['SEQ-0005'])
+
+
+def csv_row(n):
+    return f'imported{n}@imp.example,Imported,{n},{PASSWORD},Engineer\n'
+
+
+class EmployeeImportTests(TenantTestCase):
+    prefix = 'imp'
+    sizes = {'employees': 1, 'departments': 1, 'admins': 1}
+
+    def upload(self, content, name='employees.csv'):
+        response = self.client_for(self.tenant.owner).post(
+            IMPORT_URL, {'file': SimpleUploadedFile(name, content)}, format='multipart'
+        )
+        return response
+
+    def imported(self):
+        return Employee.objects.filter(company=self.tenant.company, user__email__endswith='@imp.example').exclude(
+            pk=self.tenant.employee.pk
+        )
+
+    def test_imports_rows(self):
+        response = self.upload((HEADER + csv_row(1) + csv_row(2)).encode())
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {'created': 2, 'failed': 0, 'complete': True, 'errors': []})
+        self.assertEqual(self.imported().count(), 2)
+
+    def test_unsupported_format_is_rejected(self):
+        response = self.upload(b'whatever', name='employees.xlsx')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unsupported import format', response.json()['error'])
+
+    def test_undecodable_file_reports_what_was_imported(self):
+        # The file is decoded in chunks of a few kilobytes, so the bad bytes sit past the first chunk
+        rows = 200
+        content = (HEADER + ''.join(csv_row(n) for n in range(rows))).encode() + b'\xff\xfe,broken\n'
+        with mock.patch.object(EmployeeImporter, 'batch_size', 50):
+            response = self.upload(content)
+
+        self.assertEqual(response.status_code, 200, response.content)
+        result = response.json()
+        self.assertFalse(result['complete'])
+        self.assertEqual(result['failed'], 1)
+        [error] = result['errors']
+        self.assertIn('Could not read the file', error['errors']['non_field_errors'][0])
+        # Every row before the one reported was saved, and none after it
+        self.assertGreater(result['created'], 0)
+        self.assertEqual(error['row'], result['created'] + 2)
+        self.assertEqual(self.imported().count(), result['created'])
+        stats = CompanyStats.objects.get(company=self.tenant.company)
+        self.assertEqual(stats.employees_count, 1 + result['created'])
+
+    def test_read_error_after_committed_batches(self):
+        def rows():
+            for n in range(1, 6):
+                yield n + 1, {
+                    'email': f'imported{n}@imp.example', 'first_name': 'Imported', 'last_name': str(n),
+                    'password': PASSWORD, 'role': 'Engineer',
+                }
+            raise UnicodeDecodeError('utf-8', b'\xff', 0, 1, 'invalid start byte')
+
+        result = EmployeeImporter(self.tenant.company, batch_size=2).run(rows())
+        self.assertEqual(result['created'], 5)
+        self.assertFalse(result['complete'])
+        self.assertEqual([error['row'] for error in result['errors']], [7])
+        self.assertEqual(self.imported().count(), 5)
+
+    def test_conflicting_rows_are_found_and_the_rest_saved(self):
+        User.objects.create_user(email='imported2@imp.example', password=PASSWORD, role=User.UserRole.EMPLOYEE)
+        content = (HEADER + csv_row(1) + csv_row(2) + csv_row(3)).encode()
+        # Skip the email check, as if another request took the email after the batch was checked
+        with mock.patch('employees.importers.get_shards', return_value=[]), \
+                self.assertLogs('employees.importers', 'WARNING'):
+            response = self.upload(content)
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {
+            'created': 2, 'failed': 1, 'complete': True,
+            'errors': [{'row': 3, 'errors': {'non_field_errors': [SAVE_FAILED]}}],
+        })
+        self.assertEqual(
+            sorted(self.imported().values_list('user__email', flat=True)),
+            ['imported1@imp.example', 'imported3@imp.example'],
+        )
+        stats = CompanyStats.objects.get(company=self.tenant.company)
+        self.assertEqual(stats.employees_count, 3)
+
+
+class ExportJobTests(TenantTestCase):
+    prefix = 'export'
+    sizes = {'employees': 5, 'departments': 2, 'admins': 1}
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def export(self, client, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(EXPORTS_URL, data, format='json')
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertEqual(response.json()['status'], 'pending')
+        job = client.get(f"{EXPORTS_URL}{response.json()['id']}/").json()
+        self.assertEqual(job['status'], 'done', job)
+        download = client.get(job['download_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(download['Content-Type'], 'application/gzip')
+        return job, gzip.decompress(b''.join(download.streaming_content)).decode()
+
+    def test_csv_employee_export(self):
+        job, content = self.export(self.client_for(self.tenant.admin), kind='employees', format='csv')
+        self.assertEqual((job['rows_total'], job['rows_written'], job['progress']), (5, 5, 1.0))
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(
+            sorted(row['employee_id'] for row in rows),
+            sorted(employee.employee_id for employee in self.tenant.employees),
+        )
+        row = next(row for row in rows if row['employee_id'] == self.tenant.employee.employee_id)
+        self.assertEqual(row['email'], self.tenant.employee.user.email)
+        self.assertEqual(row['department'], self.tenant.employee.department.name)
+
+    def test_ndjson_directory_export(self):
+        job, content = self.export(self.client_for(self.tenant.owner), kind='directory', format='ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        # Owner, admin and employees; nobody from the other company
+        self.assertEqual(len(rows), job['rows_written'])
+        self.assertEqual(len(rows), 7)
+        emails = {row['email'] for row in rows}
+        self.assertIn(self.tenant.owner.email, emails)
+        self.assertNotIn(self.other.admin.email, emails)
+
+    def test_rows_are_read_in_pages(self):
+        job = ExportJob.objects.create(company=self.tenant.company, format=ExportJob.Format.NDJSON)
+        # Claim, load, count and total, then 5 rows in pages of 2 with a
+        # progress update after each full page, then the final update
+        with self.assertNumQueries(10):
+            ExportRunner(job.pk, 'default', chunk_size=2).run()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_written), (ExportJob.Status.DONE, 5))
+        with job.file.open('rb') as file:
+            self.assertEqual(len(gzip.decompress(file.read()).splitlines()), 5)
+
+    def test_failure_is_logged_not_shown(self):
+        job = ExportJob.objects.create(company=self.tenant.company)
+        error = OSError("[Errno 13] Permission denied: '/srv/media/exports'")
+        with mock.patch('employees.exporters.os.makedirs', side_effect=error), \
+                self.assertLogs('employees.exporters', 'ERROR') as logs:
+            ExportRunner(job.pk, 'default').run()
+        self.assertIn('Permission denied', logs.output[0])
+        response = self.client_for(self.tenant.admin).get(f'{EXPORTS_URL}{job.pk}/')
+        self.assertEqual(response.json()['status'], 'failed')
+        self.assertEqual(response.json()['error'], EXPORT_FAILED)
+
+    def test_access(self):
+        employee = self.client_for(self.tenant.employee.user)
+        self.assertEqual(employee.post(EXPORTS_URL, {'kind': 'employees'}, format='json').status_code, 403)
+        self.assertEqual(employee.get(EXPORTS_URL).status_code, 403)
+
+        job = ExportJob.objects.create(company=self.other.company)
+        admin = self.client_for(self.tenant.admin)
+        self.assertEqual(admin.get(f'{EXPORTS_URL}{job.pk}/').status_code, 404)
+        self.assertEqual(admin.get(f'{EXPORTS_URL}{job.pk}/download/').status_code, 404)
+
+    def test_unfinished_export_cannot_be_downloaded(self):
+        job = ExportJob.objects.create(company=self.tenant.company)
+        response = self.client_for(self.tenant.admin).get(f'{EXPORTS_URL}{job.pk}/download/')
+        self.assertEqual(response.status_code, 409)
+
+    def test_run_export_jobs_command(self):
+        job = ExportJob.objects.create(company=self.tenant.company)
+        call_command('run_export_jobs', stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.Status.DONE)
+
+        ExportJob.objects.filter(pk=job.pk).update(created_at=job.created_at.replace(year=2000))
+        call_command('run_export_jobs', purge_days=30, stdout=io.StringIO())
+        self.assertFalse(ExportJob.objects.filter(pk=job.pk).exists())
+        self.assertFalse(job.file.storage.exists(job.file.name))
+
+
+class EmployeeSearchTests(TenantTestCase):
+    prefix = 'search'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        company = cls.tenant.company
+        cls.sales = Department.objects.create(company=company, name='Sales Annex')
+        cls.ann = cls.hire('ann.lee@search.example', 'Ann', 'Lee', 'Account Manager', cls.sales)
+        cls.annabel = cls.hire('annabel@search.example', 'Annabel', 'Smith', 'Engineer', cls.tenant.departments[0])
+        cls.outsider = cls.hire('ann@elsewhere.example', 'Ann', 'Other', 'Engineer', None, tenant=cls.other)
+
+    @classmethod
+    def hire(cls, email, first_name, last_name, role, department, tenant=None):
+        company = (tenant or cls.tenant).company
+        user = User.objects.create_user(
+            email=email, password=PASSWORD, company=company, first_name=first_name, last_name=last_name
+        )
+        return Employee.objects.create(user=user, company=company, department=department, role=role)
+
+    def search(self, query, user=None, **params):
+        response = self.client_for(user or self.tenant.admin).get(SEARCH_URL, {'q': query, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def found(self, query):
+        return [result['id'] for result in self.search(query)['results']]
+
+    def tokens(self, employee):
+        return set(EmployeeSearchToken.objects.filter(employee=employee).values_list('field', 'token'))
+
+    def assertIndexCurrent(self):
+        """The incrementally maintained tokens must equal a rebuilt index."""
+        before = set(EmployeeSearchToken.objects.values_list('employee_id', 'field', 'token'))
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(before, set(EmployeeSearchToken.objects.values_list('employee_id', 'field', 'token')))
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('Ann.Lee@Search.example'), ['ann', 'lee', 'search', 'example'])
+        self.assertEqual(tokenize('SEARCH-0001 snake_case Zoë'), ['search', '0001', 'snake', 'case', 'zoë'])
+        self.assertEqual(tokenize(None), [])
+
+    def test_ranking(self):
+        # A whole-word name match outranks a prefix of a name, which outranks a department match
+        self.assertEqual(self.found('ann'), [str(self.ann.id), str(self.annabel.id)])
+        self.assertEqual(self.found('Annabel'), [str(self.annabel.id)])
+        # Every term must match, in any field
+        self.assertEqual(self.found('ann engineer'), [str(self.annabel.id)])
+        self.assertEqual(self.found('sales manager'), [str(self.ann.id)])
+        self.assertEqual(self.found('ann.lee@search.example'), [str(self.ann.id)])
+        self.assertEqual(self.found(self.ann.employee_id), [str(self.ann.id)])
+        self.assertEqual(self.found('nobody'), [])
+
+    def test_results(self):
+        result = self.search('lee')['results'][0]
+        self.assertEqual(result['user']['email'], 'ann.lee@search.example')
+        self.assertEqual(result['department_name'], 'Sales Annex')
+        # The other company's Ann stays there
+        self.assertEqual(self.search('ann', user=self.other.owner)['results'][0]['id'], str(self.outsider.id))
+
+    def test_pagination(self):
+        first = self.search('employee', page_size=2)
+        self.assertEqual(len(first['results']), 2)
+        self.assertIsNone(first['previous'])
+        second = self.client_for(self.tenant.admin).get(first['next']).json()
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNone(second['next'])
+        self.assertNotIn('page=', second['previous'])
+        ids = [result['id'] for result in first['results'] + second['results']]
+        self.assertCountEqual(ids, [str(employee.id) for employee in self.tenant.employees])
+
+    def test_errors(self):
+        client = self.client_for(self.tenant.admin)
+        for query in ('', 'a', '!!'):
+            with self.subTest(query=query):
+                self.assertEqual(client.get(SEARCH_URL, {'q': query}).status_code, 400)
+        response = self.client_for(self.tenant.employee.user).get(SEARCH_URL, {'q': 'ann'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(APIClient().get(SEARCH_URL, {'q': 'ann'}).status_code, 401)
+
+    def test_index_follows_writes(self):
+        # The user renames themselves through the API, authenticated from token claims
+        response = self.client_for(self.ann.user).patch('/accounts/api/user/', {'last_name': 'Lewis'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.found('lewis'), [str(self.ann.id)])
+        self.assertEqual(self.found('lee'), [str(self.ann.id)])  # still in the email
+
+        response = self.client_for(self.tenant.admin).patch(
+            f'/employees/api/employees/{self.ann.id}/',
+            {'role': 'Director', 'department': str(self.tenant.departments[1].id)}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.found('director'), [str(self.ann.id)])
+        self.assertEqual(self.found('sales'), [])
+
+        department = self.tenant.departments[1]
+        department.name = 'Research'
+        department.save()
+        self.assertIn(str(self.ann.id), self.found('research'))
+        self.assertIndexCurrent()
+
+        department.delete()
+        self.assertEqual(self.found('research'), [])
+        self.assertNotIn(('department', 'research'), self.tokens(self.ann))
+        self.assertIndexCurrent()
+
+        self.ann.delete()
+        self.assertEqual(self.found('director'), [])
+        self.assertIndexCurrent()
+
+    def test_import_is_indexed(self):
+        upload = SimpleUploadedFile('employees.csv', (
+            'email,first_name,last_name,password,role,department\n'
+            f'zed@imp.example,Zed,Quinn,{PASSWORD},Analyst,{self.sales.name}\n'
+        ).encode())
+        response = self.client_for(self.tenant.admin).post(
+            '/employees/api/employees/import/', {'file': upload}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        [result] = self.search('quinn analyst annex')['results']
+        self.assertEqual(result['user']['email'], 'zed@imp.example')
+        self.assertIndexCurrent()
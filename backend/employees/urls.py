@@ -8,6 +8,11 @@ urlpatterns = [
     # API endpoints for employees
     path('api/employees/', views.EmployeeListCreateView.as_view(), name='employee_list_create'),
     path('api/employees/<uuid:id>/', views.EmployeeDetailView.as_view(), name='employee_detail'),
+    path('api/employees/import/', views.EmployeeImportView.as_view(), name='employee_import'),
+    path('api/employees/search/', views.EmployeeSearchView.as_view(), name='employee_search'),
+    path('api/exports/', views.ExportJobListCreateView.as_view(), name='export_list_create'),
+    path('api/exports/<uuid:id>/', views.ExportJobDetailView.as_view(), name='export_detail'),
+    path('api/exports/<uuid:id>/download/', views.ExportJobDownloadView.as_view(), name='export_download'),
 
     # Removed template-based URLs
     # path('', views.employee_list, name='employee_list'),
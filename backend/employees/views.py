@@ -2,14 +2,30 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
-from .models import Employee
+from django.http import FileResponse
+from .models import Employee, ExportJob
 from .forms import EmployeeForm, EmployeeEditForm
 from companies.models import Company
+from companies.tenancy import TenantMixin
+from core.async_views import AsyncListMixin, AsyncRetrieveMixin
+from core.fieldsets import SparseFieldsViewMixin
+from core.pagination import KeysetPagination
 from accounts.models import User
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, status
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
-from .serializers import EmployeeSerializer, EmployeeCreateSerializer, EmployeeUpdateSerializer, EmployeeDetailSerializer
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from .serializers import (
+    EmployeeSerializer, EmployeeCreateSerializer, EmployeeUpdateSerializer, EmployeeDetailSerializer,
+    EmployeeValuesSerializer, ExportJobSerializer,
+)
+from .exporters import start_export
+from .filters import EmployeeFilter
+from .importers import EmployeeImporter, guess_import_format, iter_import_rows
+from .search import SearchPagination, parse_query, ranked_employee_ids
 
 def is_admin(user):
     return user.is_authenticated and user.is_admin
@@ -134,34 +150,50 @@ def employee_dashboard(request):
     return render(request, 'employees/dashboard.html', {'employee': employee, 'company': company})
 
 # ---- API VIEWS FROM api_views.py ----
-class EmployeeListCreateView(generics.ListCreateAPIView):
-    queryset = Employee.objects.all()
+class EmployeeListCreateView(SparseFieldsViewMixin, TenantMixin, generics.ListCreateAPIView):
+    # EmployeeSerializer reads user, company.name and department.name for every
+    # row, so they are joined up front and a list call runs a constant number
+    # of queries regardless of how many employees the tenant has.
+    queryset = Employee.objects.select_related('user', 'company', 'department')
     permission_classes = [IsAuthenticated]
+    replica_reads = True  # see core/db/routers.py
+    # Indexed filters and keyset pages (see core/filters.py, core/pagination.py)
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = EmployeeFilter
+    pagination_class = KeysetPagination
+    # Lists are read from values() rows without building model instances
+    # (see core/serializers.py); set to False to serialize instances instead.
+    values_list = True
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return EmployeeCreateSerializer
+        if self.values_list:
+            return EmployeeValuesSerializer
         return EmployeeSerializer
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_parent:
-            # Parent users can see employees of companies they own
-            return Employee.objects.filter(company__owner=user)
-        elif user.is_admin:
-            # Admin users can see employees within their company
-            return Employee.objects.filter(company=user.company)
+        queryset = super().get_queryset()
+        if user.is_parent or user.is_admin:
+            # Parent and admin users can see employees of their company
+            return queryset.filter(company=self.get_company())
         elif user.is_employee:
             # Employees can only see their own profile
-            return Employee.objects.filter(user=user)
-        return Employee.objects.none() # Or handle as unauthorized
+            return queryset.filter(user=user)
+        return queryset.none() # Or handle as unauthorized
     
     def perform_create(self, serializer):
         # The create logic is already handled in EmployeeCreateSerializer.create method
         serializer.save()
 
-class EmployeeDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Employee.objects.all()
+class EmployeeListAsyncView(AsyncListMixin, EmployeeListCreateView):
+    """``EmployeeListCreateView`` with an async GET, for ASGI (see core/async_views.py)."""
+
+class EmployeeDetailView(TenantMixin, generics.RetrieveUpdateDestroyAPIView):
+    # Same guarantee as the list view: the user and department are joined so a
+    # retrieve is a single SELECT after authentication.
+    queryset = Employee.objects.select_related('user', 'company', 'department')
     permission_classes = [IsAuthenticated]
     lookup_field = 'id' # Use 'id' field for lookup
 
@@ -172,19 +204,133 @@ class EmployeeDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_parent:
-            # Parent users can manage employees of companies they own
-            return Employee.objects.filter(company__owner=user)
-        elif user.is_admin:
-            # Admin users can manage employees within their company
-            return Employee.objects.filter(company=user.company)
+        queryset = super().get_queryset()
+        if user.is_parent or user.is_admin:
+            # Parent and admin users can manage employees of their company
+            return queryset.filter(company=self.get_company())
         elif user.is_employee:
             # Employees can only retrieve their own profile
-            return Employee.objects.filter(user=user)
-        return Employee.objects.none()
+            return queryset.filter(user=user)
+        return queryset.none()
 
     def perform_destroy(self, instance):
         # Also delete the associated User object
         user = instance.user
         instance.delete()
-        user.delete() 
\ No newline at end of file
+        user.delete() 
+
+class EmployeeDetailAsyncView(AsyncRetrieveMixin, EmployeeDetailView):
+    """``EmployeeDetailView`` with an async GET, for ASGI (see core/async_views.py)."""
+
+class EmployeeSearchView(TenantMixin, generics.GenericAPIView):
+    """Ranked search of the company's employees, ``?q=`` (see employees/search.py).
+
+    Answers ``{"next", "previous", "results"}``, one page of EmployeeSerializer
+    objects, best match first.
+    """
+    queryset = Employee.objects.select_related('user', 'company', 'department')
+    serializer_class = EmployeeSerializer
+    pagination_class = SearchPagination
+    permission_classes = [IsAuthenticated]
+    replica_reads = True  # see core/db/routers.py
+
+    def get(self, request, *args, **kwargs):
+        user = request.user
+        company = self.get_company()
+        if not (user.is_parent or user.is_admin) or company is None:
+            raise PermissionDenied("Only company owners and admins can search employees.")
+        terms = parse_query(request.query_params.get('q', ''))
+        if not terms:
+            raise ValidationError({'q': ['Enter at least one word to search for.']})
+
+        ranked = self.paginate_queryset(ranked_employee_ids(company.pk, terms))
+        employees = self.get_queryset().filter(company=company).in_bulk([row['employee_id'] for row in ranked])
+        results = [employees[row['employee_id']] for row in ranked if row['employee_id'] in employees]
+        return self.get_paginated_response(self.get_serializer(results, many=True).data)
+
+
+class EmployeeImportView(TenantMixin, APIView):
+    """Bulk-create employees from an uploaded CSV or NDJSON file.
+
+    Expects a multipart upload in the ``file`` field. The format is taken from
+    the optional ``format`` field (``csv`` or ``ndjson``) or the file
+    extension. Columns: email, first_name, last_name, password, role and
+    optionally phone, department (by name), date_of_birth, joining_date.
+
+    Answers ``{"created", "failed", "complete", "errors"}``, where ``errors``
+    lists the rejected rows by row number. Rows are saved in batches as the
+    file is read, so a file that cannot be read to the end still answers 200
+    with ``complete`` false and the row where reading stopped in ``errors``.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        user = request.user
+        company = self.get_company()
+        if not (user.is_parent or user.is_admin) or company is None:
+            raise PermissionDenied("Only company owners and admins can import employees.")
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'No file uploaded.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        import_format = request.data.get('format') or guess_import_format(upload.name)
+        try:
+            rows = iter_import_rows(upload, import_format)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        # A file that stops decoding partway still answers with what was imported
+        result = EmployeeImporter(company).run(rows)
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class ExportJobMixin(TenantMixin):
+    """Export jobs of the request's company, visible to its owner and admins."""
+
+    def get_queryset(self):
+        user = self.request.user
+        company = self.get_company()
+        if not (user.is_parent or user.is_admin) or company is None:
+            raise PermissionDenied("Only company owners and admins can export employees.")
+        return ExportJob.objects.filter(company=company)
+
+
+class ExportJobListCreateView(ExportJobMixin, generics.ListCreateAPIView):
+    """Start a background export (see employees/exporters.py), or list past ones.
+
+    POST ``{"kind": "employees" | "directory", "format": "csv" | "ndjson"}``
+    answers 202 with the job. Poll the job until its status is ``done``, then
+    fetch ``download_url``.
+    """
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def create(self, request, *args, **kwargs):
+        self.get_queryset()  # Checks the user may export
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save(company=self.get_company(), requested_by=request.user)
+        start_export(job)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+
+class ExportJobDetailView(ExportJobMixin, generics.RetrieveAPIView):
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'id'
+
+
+class ExportJobDownloadView(ExportJobMixin, generics.GenericAPIView):
+    """Serve a finished export as a gzip file."""
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'id'
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.status != ExportJob.Status.DONE:
+            return Response({'error': 'The export has not finished.'}, status=status.HTTP_409_CONFLICT)
+        filename = f'{job.kind}-{job.created_at:%Y%m%d-%H%M%S}.{job.format}.gz'
+        return FileResponse(
+            job.file.open('rb'), as_attachment=True, filename=filename, content_type='application/gzip'
+        )
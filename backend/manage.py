@@ -9,9 +9,6 @@ def main():
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
     try:
         from django.core.management import execute_from_command_line
-        from django.conf import settings
-        # Add this line for debugging
-        print(f"DEBUG: settings.DATABASES = {settings.DATABASES}")
     except ImportError as exc:
         raise ImportError(
             "Couldn't import Django. Are you sure it's installed and "
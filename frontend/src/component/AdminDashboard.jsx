@@ -2,19 +2,16 @@ import React, { useEffect } from 'react';
 import { Users, Building2, Settings, UserPlus } from 'lucide-react';
 import { useSelector, useDispatch } from 'react-redux';
 import { Navigate, useNavigate } from 'react-router-dom';
-import { fetchEmployees } from '../store/employeeSlice';
-import { fetchDepartments, fetchCompanyProfile } from '../store/companySlice';
+import { fetchCompanyProfile } from '../store/companySlice';
 
 const AdminDashboard = () => {
   const { user } = useSelector((state) => state.auth);
-  const { employees, loading } = useSelector((state) => state.employees);
-  const { departments, profile: companyProfile } = useSelector((state) => state.company);
+  // The profile carries the company's counts; the lists are paged
+  const { profile: companyProfile, loading } = useSelector((state) => state.company);
   const dispatch = useDispatch();
   const navigate = useNavigate();
 
   useEffect(() => {
-    dispatch(fetchEmployees());
-    dispatch(fetchDepartments());
     if (user?.company) {
       dispatch(fetchCompanyProfile(user.company));
     }
@@ -42,7 +39,7 @@ const AdminDashboard = () => {
           <div style={{ display: 'flex', alignItems: 'flex-start', justifyContent: 'space-between', marginBottom: '20px' }}>
             <div>
               <h3 style={{ fontSize: '18px', fontWeight: '600', margin: '0 0 8px 0' }}>Employees</h3>
-              <div style={{ fontSize: '36px', fontWeight: 'bold', margin: '0' }}>{loading.list ? '...' : employees.length}</div>
+              <div style={{ fontSize: '36px', fontWeight: 'bold', margin: '0' }}>{loading.profile ? '...' : companyProfile?.employees_count ?? 0}</div>
             </div>
             <Users size={32} style={{ opacity: 0.9 }} />
           </div>
@@ -55,7 +52,7 @@ const AdminDashboard = () => {
           <div style={{ display: 'flex', alignItems: 'flex-start', justifyContent: 'space-between', marginBottom: '20px' }}>
             <div>
               <h3 style={{ fontSize: '18px', fontWeight: '600', margin: '0 0 8px 0' }}>Departments</h3>
-              <div style={{ fontSize: '36px', fontWeight: 'bold', margin: '0' }}>{departments.length}</div>
+              <div style={{ fontSize: '36px', fontWeight: 'bold', margin: '0' }}>{companyProfile?.departments_count ?? 0}</div>
             </div>
             <Building2 size={32} style={{ opacity: 0.9 }} />
           </div>
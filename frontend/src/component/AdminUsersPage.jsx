@@ -3,11 +3,12 @@ import { useNavigate } from 'react-router-dom';
 import { Plus, Edit, Trash2, Mail, Phone, Shield, X, Eye, EyeOff } from 'lucide-react';
 import { useDispatch, useSelector } from 'react-redux';
 import { fetchAdminUsers, deleteAdminUser, createAdminUser } from '../store/companySlice';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 const AdminUsersPage = () => {
   const navigate = useNavigate();
   const dispatch = useDispatch();
-  const { adminUsers, loading } = useSelector((state) => state.company);
+  const { adminUsers, next, loading } = useSelector((state) => state.company);
   const user = useSelector((state) => state.auth.user);
 
   // Modal state
@@ -400,7 +401,7 @@ const AdminUsersPage = () => {
     <div style={styles.container}>
       {/* Header */}
       <div style={styles.header}>
-        <h1 style={styles.title}>Admin Users ({adminUsers.length})</h1>
+        <h1 style={styles.title}>Admin Users ({adminUsers.length}{next.adminUsers ? '+' : ''})</h1>
         <button 
           style={styles.addButton}
           onClick={handleAddAdmin}
@@ -509,6 +510,11 @@ const AdminUsersPage = () => {
             </tbody>
           </table>
         )}
+        <LoadMoreButton
+          next={next.adminUsers}
+          loading={loading.adminUsersMore}
+          onLoadMore={(page) => dispatch(fetchAdminUsers(page))}
+        />
       </div>
 
       {/* Add Admin Modal */}
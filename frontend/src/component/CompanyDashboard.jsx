@@ -4,7 +4,6 @@ import { Building2, MapPin, Edit, Shield, Users, BarChart3, UserPlus, UserCog, S
 import { useNavigate, Navigate } from 'react-router-dom';
 import { useSelector, useDispatch } from 'react-redux';
 import { fetchCompanyProfile } from '../store/companySlice';
-import { fetchEmployees } from '../store/employeeSlice';
 
 const CompanyDashboard = () => {
   const navigate = useNavigate();
@@ -13,7 +12,6 @@ const CompanyDashboard = () => {
   // Redux state
   const { user } = useSelector((state) => state.auth);
   const { profile: companyData, loading, errors } = useSelector((state) => state.company);
-  const { employees } = useSelector((state) => state.employees);
   
   const [hoveredCard, setHoveredCard] = useState(null);
   const [hoveredButton, setHoveredButton] = useState(null);
@@ -22,7 +20,6 @@ const CompanyDashboard = () => {
     // Only fetch data if user is authenticated and is a parent user
     if (user && user.role === 'PARENT' && user.company) {
       dispatch(fetchCompanyProfile(user.company));
-      dispatch(fetchEmployees());
     } else if (user && user.role !== 'PARENT') {
       navigate('/dashboard'); // Redirect non-parent users
     }
@@ -241,10 +238,6 @@ const CompanyDashboard = () => {
     return <div style={styles.error}>No company data found</div>;
   }
 
-  // Calculate employee statistics from actual data
-  const activeEmployees = employees.filter(emp => emp.is_active).length;
-  const totalEmployees = employees.length;
-
   const handleEditProfile = () => {
     // TODO: Implement edit profile functionality
     console.log('Edit profile clicked');
@@ -339,7 +332,7 @@ const CompanyDashboard = () => {
               <h3 style={styles.statTitle}>Employees</h3>
               <Users size={28} style={styles.statIcon} />
             </div>
-            <div style={styles.statCount}>{companyData.employees_count || totalEmployees}</div>
+            <div style={styles.statCount}>{companyData.employees_count || 0}</div>
             <div style={styles.statCTA}>View Employees →</div>
           </div>
         </section>
@@ -1,10 +1,11 @@
 import React, { useEffect, useState } from 'react';
 import { useDispatch, useSelector } from 'react-redux';
 import { fetchDepartments, createDepartment, updateDepartment, deleteDepartment } from '../store/companySlice';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 const Departments = () => {
   const dispatch = useDispatch();
-  const { departments, loading, errors } = useSelector((state) => state.company);
+  const { departments, next, loading, errors } = useSelector((state) => state.company);
   const [form, setForm] = useState({ name: '', description: '' });
   const [showAdd, setShowAdd] = useState(false);
   const [editId, setEditId] = useState(null);
@@ -153,6 +154,11 @@ const Departments = () => {
               </tbody>
             </table>
           )}
+          <LoadMoreButton
+            next={next.departments}
+            loading={loading.departmentsMore}
+            onLoadMore={(page) => dispatch(fetchDepartments(page))}
+          />
         </div>
       )}
     </div>
@@ -3,6 +3,7 @@ import { Plus, Users, Edit, Trash2 } from 'lucide-react';
 import { useSelector, useDispatch } from 'react-redux';
 import { fetchEmployees, createEmployee } from '../store/employeeSlice';
 import { fetchDepartments } from '../store/companySlice';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 // Add Employee Modal Component
 const AddEmployeeModal = ({ isOpen, onClose, onEmployeeAdded }) => {
@@ -23,7 +24,8 @@ const AddEmployeeModal = ({ isOpen, onClose, onEmployeeAdded }) => {
 
   useEffect(() => {
     if (isOpen) {
-      dispatch(fetchDepartments());
+      // The dropdown needs every department, so ask for the largest page
+      dispatch(fetchDepartments({ page_size: 1000 }));
     }
   }, [dispatch, isOpen]);
 
@@ -522,7 +524,7 @@ const AddEmployeeModal = ({ isOpen, onClose, onEmployeeAdded }) => {
 // Updated Employees Page Component
 const EmployeesPage = () => {
   const dispatch = useDispatch();
-  const { employees, loading } = useSelector((state) => state.employees);
+  const { employees, next, loading } = useSelector((state) => state.employees);
   const [showAddModal, setShowAddModal] = useState(false);
 
   useEffect(() => {
@@ -688,7 +690,7 @@ const EmployeesPage = () => {
   return (
     <div style={styles.container}>
       <div style={styles.header}>
-        <h1 style={styles.title}>Employees ({employees.length})</h1>
+        <h1 style={styles.title}>Employees ({employees.length}{next ? '+' : ''})</h1>
         <button 
           style={styles.addButton} 
           onClick={() => setShowAddModal(true)}
@@ -786,6 +788,11 @@ const EmployeesPage = () => {
             </tbody>
           </table>
         )}
+        <LoadMoreButton
+          next={next}
+          loading={loading.more}
+          onLoadMore={(page) => dispatch(fetchEmployees(page))}
+        />
       </div>
 
       {/* Add Employee Modal */}
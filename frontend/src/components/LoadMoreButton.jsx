@@ -0,0 +1,32 @@
+import React from 'react';
+
+// Shown under a paged list while the API has more pages; `next` is the link
+// to the page after the last one loaded.
+const LoadMoreButton = ({ next, loading, onLoadMore }) => {
+    if (!next) {
+        return null;
+    }
+
+    return (
+        <div style={{ display: 'flex', justifyContent: 'center', marginTop: '24px' }}>
+            <button
+                style={{
+                    background: '#f3f4f6',
+                    border: 'none',
+                    borderRadius: '8px',
+                    padding: '10px 24px',
+                    cursor: loading ? 'default' : 'pointer',
+                    color: '#7E44EE',
+                    fontWeight: 600,
+                    opacity: loading ? 0.6 : 1
+                }}
+                disabled={loading}
+                onClick={() => onLoadMore({ next })}
+            >
+                {loading ? 'Loading...' : 'Load more'}
+            </button>
+        </div>
+    );
+};
+
+export default LoadMoreButton;
@@ -42,6 +42,13 @@ apiClient.interceptors.response.use(
   }
 );
 
+// List endpoints answer one page at a time ({ next, previous, results }).
+// Called without arguments the list functions fetch the first page; other
+// keys (filters, page_size) are sent as query parameters. Pass the `next`
+// link of the last page loaded to fetch the page after it.
+const getPage = (url, { next, ...params } = {}) =>
+  next ? apiClient.get(next) : apiClient.get(url, { params });
+
 // Auth API calls
 export const authAPI = {
   login: (credentials) => apiClient.post('/accounts/api/token/', credentials),
@@ -58,20 +65,20 @@ export const companyAPI = {
   registerCompany: (companyData) => apiClient.post('/companies/api/register/', companyData),
   
   // Departments
-  getDepartments: () => apiClient.get('/companies/api/departments/'),
+  getDepartments: (page) => getPage('/companies/api/departments/', page),
   createDepartment: (departmentData) => apiClient.post('/companies/api/departments/', departmentData),
   updateDepartment: (deptId, data) => apiClient.patch(`/companies/api/departments/${deptId}/`, data),
   deleteDepartment: (deptId) => apiClient.delete(`/companies/api/departments/${deptId}/`),
   
   // Admin Users
-  getAdminUsers: () => apiClient.get('/companies/api/admin-users/'),
+  getAdminUsers: (page) => getPage('/companies/api/admin-users/', page),
   createAdminUser: (userData) => apiClient.post('/companies/api/admin-users/', userData),
   deleteAdminUser: (userId) => apiClient.delete(`/companies/api/admin-users/${userId}/`),
 };
 
 // Employee API calls
 export const employeeAPI = {
-  getEmployees: () => apiClient.get('/employees/api/employees/'),
+  getEmployees: (page) => getPage('/employees/api/employees/', page),
   createEmployee: (employeeData) => apiClient.post('/employees/api/employees/', employeeData),
   getEmployee: (employeeId) => apiClient.get(`/employees/api/employees/${employeeId}/`),
   updateEmployee: (employeeId, data) => apiClient.patch(`/employees/api/employees/${employeeId}/`, data),
@@ -34,9 +34,9 @@ export const updateCompanyProfile = createAsyncThunk(
 // Department operations
 export const fetchDepartments = createAsyncThunk(
   'company/fetchDepartments',
-  async (_, { rejectWithValue }) => {
+  async (page, { rejectWithValue }) => {
     try {
-      const response = await companyAPI.getDepartments();
+      const response = await companyAPI.getDepartments(page);
       return response.data;
     } catch (error) {
       return rejectWithValue(
@@ -91,9 +91,9 @@ export const deleteDepartment = createAsyncThunk(
 // Admin users operations
 export const fetchAdminUsers = createAsyncThunk(
   'company/fetchAdminUsers',
-  async (_, { rejectWithValue }) => {
+  async (page, { rejectWithValue }) => {
     try {
-      const response = await companyAPI.getAdminUsers();
+      const response = await companyAPI.getAdminUsers(page);
       return response.data;
     } catch (error) {
       return rejectWithValue(
@@ -135,10 +135,17 @@ const initialState = {
   profile: null,
   departments: [],
   adminUsers: [],
+  // Links to the page after the last one loaded; null once a list is complete
+  next: {
+    departments: null,
+    adminUsers: null,
+  },
   loading: {
     profile: false,
     departments: false,
+    departmentsMore: false,
     adminUsers: false,
+    adminUsersMore: false,
   },
   errors: {
     profile: null,
@@ -201,17 +208,22 @@ const companySlice = createSlice({
       })
       
       // Departments
-      .addCase(fetchDepartments.pending, (state) => {
-        state.loading.departments = true;
+      // Called with { next } to append the following page
+      .addCase(fetchDepartments.pending, (state, action) => {
+        state.loading[action.meta.arg?.next ? 'departmentsMore' : 'departments'] = true;
         state.errors.departments = null;
       })
       .addCase(fetchDepartments.fulfilled, (state, action) => {
+        const { next, results } = action.payload;
         state.loading.departments = false;
-        state.departments = action.payload;
+        state.loading.departmentsMore = false;
+        state.departments = action.meta.arg?.next ? [...state.departments, ...results] : results;
+        state.next.departments = next;
         state.errors.departments = null;
       })
       .addCase(fetchDepartments.rejected, (state, action) => {
         state.loading.departments = false;
+        state.loading.departmentsMore = false;
         state.errors.departments = action.payload;
       })
       
@@ -231,17 +243,22 @@ const companySlice = createSlice({
       })
       
       // Admin Users
-      .addCase(fetchAdminUsers.pending, (state) => {
-        state.loading.adminUsers = true;
+      // Called with { next } to append the following page
+      .addCase(fetchAdminUsers.pending, (state, action) => {
+        state.loading[action.meta.arg?.next ? 'adminUsersMore' : 'adminUsers'] = true;
         state.errors.adminUsers = null;
       })
       .addCase(fetchAdminUsers.fulfilled, (state, action) => {
+        const { next, results } = action.payload;
         state.loading.adminUsers = false;
-        state.adminUsers = action.payload;
+        state.loading.adminUsersMore = false;
+        state.adminUsers = action.meta.arg?.next ? [...state.adminUsers, ...results] : results;
+        state.next.adminUsers = next;
         state.errors.adminUsers = null;
       })
       .addCase(fetchAdminUsers.rejected, (state, action) => {
         state.loading.adminUsers = false;
+        state.loading.adminUsersMore = false;
         state.errors.adminUsers = action.payload;
       })
       
@@ -5,9 +5,9 @@ import { employeeAPI } from '../services/api';
 // Async thunks for employee operations
 export const fetchEmployees = createAsyncThunk(
   'employees/fetchEmployees',
-  async (_, { rejectWithValue }) => {
+  async (page, { rejectWithValue }) => {
     try {
-      const response = await employeeAPI.getEmployees();
+      const response = await employeeAPI.getEmployees(page);
       return response.data;
     } catch (error) {
       return rejectWithValue(
@@ -78,6 +78,7 @@ const initialState = {
   selectedEmployee: null,
   loading: {
     list: false,
+    more: false,
     create: false,
     update: false,
     delete: false,
@@ -95,12 +96,8 @@ const initialState = {
     department: '',
     status: 'all',
   },
-  pagination: {
-    currentPage: 1,
-    totalPages: 1,
-    pageSize: 10,
-    totalItems: 0,
-  }
+  // Link to the page after the last one loaded; null once the list is complete
+  next: null,
 };
 
 const employeeSlice = createSlice({
@@ -125,9 +122,6 @@ const employeeSlice = createSlice({
     setFilters: (state, action) => {
       state.filters = { ...state.filters, ...action.payload };
     },
-    setPagination: (state, action) => {
-      state.pagination = { ...state.pagination, ...action.payload };
-    },
     clearSelectedEmployee: (state) => {
       state.selectedEmployee = null;
     },
@@ -138,21 +132,22 @@ const employeeSlice = createSlice({
   extraReducers: (builder) => {
     builder
       // Fetch Employees
-      .addCase(fetchEmployees.pending, (state) => {
-        state.loading.list = true;
+      // Called with { next } to append the following page
+      .addCase(fetchEmployees.pending, (state, action) => {
+        state.loading[action.meta.arg?.next ? 'more' : 'list'] = true;
         state.errors.list = null;
       })
       .addCase(fetchEmployees.fulfilled, (state, action) => {
+        const { next, results } = action.payload;
         state.loading.list = false;
-        state.employees = action.payload;
+        state.loading.more = false;
+        state.employees = action.meta.arg?.next ? [...state.employees, ...results] : results;
+        state.next = next;
         state.errors.list = null;
-        // Update pagination if response includes pagination data
-        if (action.payload.pagination) {
-          state.pagination = { ...state.pagination, ...action.payload.pagination };
-        }
       })
       .addCase(fetchEmployees.rejected, (state, action) => {
         state.loading.list = false;
+        state.loading.more = false;
         state.errors.list = action.payload;
       })
       
@@ -234,7 +229,6 @@ export const {
   clearErrors, 
   clearEmployeeError, 
   setFilters, 
-  setPagination,
   clearSelectedEmployee,
   resetEmployeeState 
 } = employeeSlice.actions;